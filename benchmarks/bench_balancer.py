@@ -0,0 +1,60 @@
+"""
+Measure how read throughput scales with the number of API nodes behind one client.
+
+Every stub node serves a limited number of requests at once, like an API
+node bound by its OrbitDB instance, and all of them share the same
+databases, like replicas. Run from the repository root:
+    python -m benchmarks.bench_balancer --nodes 1 2 4 --threads 32 --duration 3
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def run(nodes, args):
+    dbs = {}
+    servers = [StubServer(latency=args.latency, workers=args.workers, dbs=dbs) for _n in range(nodes)]
+    for server in servers: server.__enter__()
+    try:
+        with OrbitDbAPI(nodes=[s.base_url for s in servers], load_balancing=args.balancing,
+                        coalesce_requests=False, max_connections=args.threads) as client:
+            db = client.db('bench_balancer', json={'create': True, 'type': 'keyvalue'})
+            db.put({'key': 'key', 'value': 'x' * 100})
+            deadline = time.perf_counter() + args.duration
+            counts = []
+            lock = threading.Lock()
+
+            def reader():
+                count = 0
+                while time.perf_counter() < deadline:
+                    db.get('key', cache=False)
+                    count += 1
+                with lock: counts.append(count)
+
+            with ThreadPoolExecutor(args.threads) as pool:
+                for _t in range(args.threads): pool.submit(reader)
+            spread = [stats['requests'] for stats in client.balancer.stats.values()]
+            print(f'nodes={nodes}  {sum(counts) / args.duration:8.0f} reads/s  requests per node {spread}')
+    finally:
+        for server in servers: server.__exit__(None, None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--latency', type=float, default=0.02, help='Stub server delay per request in seconds')
+    parser.add_argument('--workers', type=int, default=2, help='Requests a stub node handles at once')
+    parser.add_argument('--balancing', choices=['least_outstanding', 'latency'], default='least_outstanding')
+    args = parser.parse_args()
+    for nodes in args.nodes:
+        run(nodes, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Compare a DB.put loop against DB.put_many on the local stub server.
+
+Run from the repository root:
+    python -m benchmarks.bench_bulk --docs 500 --latency 0.005
+"""
+import argparse
+import time
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def docs(count, prefix):
+    return ({'key': f'{prefix}{i}', 'value': 'x' * 100} for i in range(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.005, help='Stub server delay per request in seconds')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16, 64])
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        with OrbitDbAPI(base_url=server.base_url) as client:
+            db = client.db('bench_bulk', json={'create': True, 'type': 'keyvalue'})
+
+            start = time.perf_counter()
+            for doc in docs(args.docs, 'loop'):
+                db.put(doc)
+            baseline = time.perf_counter() - start
+            print(f'put loop:               {args.docs / baseline:9.1f} docs/s')
+
+            for concurrency in args.concurrency:
+                start = time.perf_counter()
+                failed = sum(isinstance(result, Exception) for _doc, result in db.put_many(docs(args.docs, f'c{concurrency}-'), concurrency=concurrency))
+                elapsed = time.perf_counter() - start
+                print(f'put_many concurrency={concurrency:<3} {args.docs / elapsed:9.1f} docs/s  x{baseline / elapsed:5.1f}  failed={failed}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Measure the latency of a DB.get cache hit with and without immutable reads.
+
+Run from the repository root:
+    python -m benchmarks.bench_cache_reads
+"""
+import argparse
+import timeit
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def nested_doc(width, depth):
+    if depth == 0:
+        return 'x' * 16
+    return {f'field{i}': [nested_doc(width, depth - 1)] for i in range(width)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    with StubServer() as server:
+        with OrbitDbAPI(base_url=server.base_url) as client:
+            for width, depth in [(4, 1), (8, 2), (8, 3)]:
+                key = f'doc{width}x{depth}'
+                doc = {'key': key, 'value': nested_doc(width, depth)}
+                line = [f'{key:<10}']
+                for immutable in (False, True):
+                    db = client.db('bench_reads', json={'create': True, 'type': 'keyvalue'}, local_options={'immutable_reads': immutable})
+                    db.put(doc, cache=False)
+                    db.get(key)
+                    seconds = min(timeit.repeat(lambda: db.get(key), number=args.number, repeat=5))
+                    line.append(f'{"immutable" if immutable else "deepcopy ":<9} {seconds / args.number * 1e6:10.2f} us/hit')
+                mutable = min(timeit.repeat(lambda: db.get(key, mutable=True), number=args.number, repeat=5))
+                line.append(f'mutable=True {mutable / args.number * 1e6:10.2f} us/hit')
+                print('  '.join(line))
+
+
+if __name__ == '__main__':
+    main()
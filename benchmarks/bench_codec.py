@@ -0,0 +1,59 @@
+"""
+Compare the JSON codecs decoding an iterator_raw() response, and the memory of dict vs Entry results.
+
+Run from the repository root:
+    python -m benchmarks.bench_codec --entries 10000
+"""
+import argparse
+import timeit
+import tracemalloc
+
+from orbitdbapi.codec import CODECS
+from orbitdbapi.entry import Entry
+
+
+def raw_entry(i):
+    return {
+        'hash': f'zdpuHash{i:036d}', 'id': '/orbitdb/zdpuStub/feed',
+        'payload': {'op': 'ADD', 'key': None, 'value': {'_id': f'doc{i}', 'author': f'author{i % 7}', 'created': i}},
+        'next': [f'zdpuHash{i - 1:036d}'] if i else [], 'refs': [], 'v': 2,
+        'clock': {'id': '04' + 'ab' * 64, 'time': i + 1},
+        'key': '04' + 'cd' * 64, 'identity': {'id': '03' + 'ef' * 32, 'type': 'orbitdb'}, 'sig': '30' + '12' * 70,
+    }
+
+
+def retained(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--number', type=int, default=5)
+    args = parser.parse_args()
+
+    body = CODECS['json']().dumps([raw_entry(i) for i in range(args.entries)])
+    print(f'{args.entries} entries, {len(body) / 2**20:.1f} MiB')
+    for name, codec_class in CODECS.items():
+        try:
+            codec = codec_class()
+        except ImportError:
+            print(f'{name:<8} not installed')
+            continue
+        decode = min(timeit.repeat(lambda: codec.loads(body), number=args.number, repeat=3)) / args.number
+        typed = min(timeit.repeat(lambda: [Entry.from_dict(e) for e in codec.loads(body)], number=args.number, repeat=3)) / args.number
+        print(f'{name:<8} decode {decode * 1000:8.1f} ms   decode + Entry {typed * 1000:8.1f} ms')
+
+    codec = CODECS['json']()
+    dicts = retained(lambda: codec.loads(body))
+    entries = retained(lambda: [Entry.from_dict(e) for e in codec.loads(body)])
+    print(f'retained: dicts {dicts / 2**20:.1f} MiB   Entry {entries / 2**20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
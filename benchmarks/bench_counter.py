@@ -0,0 +1,56 @@
+"""
+Compare a DB.inc per event against an aggregating counter on the local stub server.
+
+Several threads count events at once, like the request handlers of a
+service would. Run from the repository root:
+    python -m benchmarks.bench_counter --events 2000 --threads 8 --latency 0.005
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def count(inc, events, threads):
+    """
+    Call inc(1) events times spread over threads, and return the seconds it took.
+    """
+    def worker(calls):
+        for _c in range(calls):
+            inc(1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(worker, [events // threads + (i < events % threads) for i in range(threads)]))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.005, help='Stub server delay per request in seconds')
+    parser.add_argument('--max-delay', type=float, nargs='+', default=[0.01, 0.1, 1.0], help='max_delay settings of the aggregating counter')
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        with OrbitDbAPI(base_url=server.base_url) as client:
+            db = client.db('bench_counter', json={'create': True, 'type': 'counter'})
+            expected = db.value()
+
+            baseline = count(db.inc, args.events, args.threads)
+            expected += args.events
+            print(f'inc per event:          {args.events / baseline:11.1f} events/s  requests={args.events:<6}  value={db.value() == expected}')
+
+            for max_delay in args.max_delay:
+                counter = db.aggregating_counter(max_delay=max_delay)
+                elapsed = count(counter.inc, args.events, args.threads)
+                counter.close()
+                expected += args.events
+                requests = counter.stats['requests']
+                print(f'aggregating {max_delay:<6}s     {args.events / elapsed:11.1f} events/s  requests={requests:<6}  value={db.value() == expected}  x{baseline / elapsed:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare fetching a page of keys one get() at a time with one get_many() call.
+
+Run from the repository root:
+    python -m benchmarks.bench_get_many --keys 1000 --page 100 --latency 0.005
+"""
+import argparse
+import random
+import time
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--keys', type=int, default=1000, help='Keys in the store')
+    parser.add_argument('--page', type=int, default=100, help='Keys per page')
+    parser.add_argument('--latency', type=float, default=0.005, help='Stub server delay per request in seconds')
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        with OrbitDbAPI(base_url=server.base_url) as client:
+            db = client.db('bench_get_many', json={'create': True, 'type': 'keyvalue'})
+            for _k, result in db.put_many(({'key': f'key{i}', 'value': {'n': i}} for i in range(args.keys)), concurrency=32):
+                if isinstance(result, Exception): raise result
+            page = random.sample([f'key{i}' for i in range(args.keys)], args.page)
+
+            db.clear_cache()
+            _r, loop = timed(lambda: [db.get(key) for key in page])
+            db.clear_cache()
+            _r, cold = timed(lambda: db.get_many(page, concurrency=args.concurrency))
+            _r, warm = timed(lambda: db.get_many(page))
+            db.all()
+            db.clear_cache()
+            _r, bulk = timed(lambda: db.get_many(random.sample([f'key{i}' for i in range(args.keys)], args.keys // 2)))
+            print(f'{args.page} keys: get() loop {loop:8.1f} ms   get_many cold {cold:7.1f} ms   warm {warm:6.2f} ms')
+            print(f'{args.keys // 2} of {args.keys} keys with all(): {bulk:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Measure the memory of open DB handles and the cost of their capability checks.
+
+Handles are built from the parameters the stub server answers when a
+database is opened, decoded afresh for every handle like a real open, so no
+server is needed. Run from the repository root:
+    python -m benchmarks.bench_handles --handles 10000
+"""
+import argparse
+import timeit
+import tracemalloc
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubDB
+
+TYPES = ['keyvalue', 'docstore', 'feed', 'eventlog', 'counter']
+CHECKS = ['db.putable', 'db.iterable', "db._require('put')"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--handles', type=int, default=10000)
+    parser.add_argument('--checks', type=int, default=1000000, help='Timed calls per capability check')
+    args = parser.parse_args()
+
+    client = OrbitDbAPI(base_url='http://127.0.0.1:1', reuse_dbs=False)
+    infos = [client.codec.dumps(StubDB(f'db{i}', TYPES[i % len(TYPES)]).info()) for i in range(args.handles)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    handles = [client._make_db(client.codec.loads(info)) for info in infos]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print(f'{len(handles)} handles  {allocated / len(handles):8.0f} bytes per handle, parameters included')
+
+    db = next(handle for handle in handles if handle.dbtype == 'keyvalue')
+    for check in CHECKS:
+        seconds = min(timeit.repeat(check, number=args.checks, repeat=3, globals={'db': db}))
+        print(f'{check:<20} {seconds / args.checks * 1e9:8.1f} ns per check')
+
+
+if __name__ == '__main__':
+    main()
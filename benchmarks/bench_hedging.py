@@ -0,0 +1,40 @@
+"""
+Compare the tail latency of DB.get with and without hedged reads while some requests stall.
+
+Run from the repository root:
+    python -m benchmarks.bench_hedging --requests 1000 --stall-every 50 --stall 0.2
+"""
+import argparse
+import time
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.001, help='Stub server delay per request in seconds')
+    parser.add_argument('--stall-every', type=int, default=50, help='Stall one request out of this many')
+    parser.add_argument('--stall', type=float, default=0.2, help='Seconds a stalled request takes')
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        for hedge in (False, True):
+            with OrbitDbAPI(base_url=server.base_url, hedge_reads=hedge, coalesce_requests=False) as client:
+                db = client.db('bench_hedging', json={'create': True, 'type': 'keyvalue'})
+                db.put({'key': 'key', 'value': 'x' * 100})
+                latencies = []
+                for i in range(args.requests):
+                    if i % args.stall_every == args.stall_every - 1: server.stall(1, args.stall)
+                    start = time.perf_counter()
+                    db.get('key', cache=False)
+                    latencies.append(time.perf_counter() - start)
+                latencies.sort()
+                p = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+                stats = client.hedge_tracker.stats if hedge else {}
+                print(f'hedge_reads={hedge!s:<5}  p50={p(0.5):7.2f}  p99={p(0.99):7.2f}  max={latencies[-1] * 1000:7.2f} ms  {stats}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare DocView index queries against a linear scan over DB.all() on the local stub server.
+
+Run from the repository root:
+    python -m benchmarks.bench_query --docs 20000
+"""
+import argparse
+import random
+import timeit
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    with StubServer() as server:
+        with OrbitDbAPI(base_url=server.base_url) as client:
+            db = client.db('bench_query', json={'create': True, 'type': 'docstore'})
+            docs = ({'_id': f'doc{i}', 'author': f'author{i % 500}', 'created': i, 'body': 'x' * 64} for i in range(args.docs))
+            list(db.put_many(docs, concurrency=32, cache=False))
+            view = db.view(hash_indexes=['author'], sorted_indexes=['created'], follow=False)
+            everything = db.all()
+
+            author = f'author{random.randrange(500)}'
+            low = random.randrange(args.docs - 100)
+            cases = [
+                ('equality', lambda: view.find(author=author),
+                             lambda: [d for d in everything if d.get('author') == author]),
+                ('range 100', lambda: view.range('created', low, low + 100),
+                              lambda: sorted((d for d in everything if low <= d.get('created', -1) < low + 100), key=lambda d: d['created'])),
+            ]
+            print(f'{args.docs} documents')
+            for name, indexed, scan in cases:
+                assert len(indexed()) == len(scan())
+                indexed_s = min(timeit.repeat(indexed, number=args.number, repeat=3)) / args.number
+                scan_s = min(timeit.repeat(scan, number=args.number, repeat=3)) / args.number
+                print(f'{name:<10} index {indexed_s * 1e6:10.2f} us   scan {scan_s * 1e6:10.2f} us   x{scan_s / indexed_s:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare the cost of polling a feed for new entries: re-pulling it with iterator_raw(limit=-1)
+against syncing a local Replica, which fetches only the entries after its head.
+
+Run from the repository root:
+    python -m benchmarks.bench_replica --sizes 1000 10000 --new 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--new', type=int, default=10, help='Entries added between polls')
+    parser.add_argument('--polls', type=int, default=10)
+    args = parser.parse_args()
+
+    with StubServer() as server, tempfile.TemporaryDirectory() as directory:
+        with OrbitDbAPI(base_url=server.base_url) as client:
+            for size in args.sizes:
+                feed = client.db(f'bench_replica_{size}', json={'create': True, 'type': 'feed'})
+                server.dbs[feed.dbname].log = [
+                    {'hash': f'zdpuSeed{size}x{i:012d}', 'payload': {'op': 'ADD', 'key': None, 'value': {'n': i, 'text': 'x' * 100}}}
+                    for i in range(size)]
+                with feed.replica(os.path.join(directory, f'{size}.log')) as replica:
+                    start = time.perf_counter()
+                    replica.sync()
+                    initial = time.perf_counter() - start
+                    full = synced = 0.0
+                    for _p in range(args.polls):
+                        for i in range(args.new): feed.add({'n': i})
+                        start = time.perf_counter()
+                        feed.iterator_raw(limit=-1)
+                        full += time.perf_counter() - start
+                        start = time.perf_counter()
+                        replica.sync()
+                        synced += time.perf_counter() - start
+                    start = time.perf_counter()
+                    local = sum(1 for _e in replica)
+                    scan = time.perf_counter() - start
+                    print(f'{size:>7} entries: initial sync {initial * 1000:8.1f} ms, per poll: iterator_raw {full / args.polls * 1000:8.2f} ms'
+                          f'  replica.sync {synced / args.polls * 1000:6.2f} ms, local scan of {local} {scan * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
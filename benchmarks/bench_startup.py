@@ -0,0 +1,105 @@
+"""
+Measure the cold start of the client: import time and time to the first response.
+
+Every run is a fresh interpreter that imports the package, creates an
+OrbitDbAPI and makes one request to the stub server. The first run is not
+timed, it compiles the package to bytecode as an installed release would
+ship it. Run from the repository root:
+    python -m benchmarks.bench_startup --output baseline.json
+    python -m benchmarks.bench_startup --output current.json --compare baseline.json --tolerance 0.25
+
+With --compare the exit status is 1 when the median of a phase grew by more
+than the tolerance and by more than --slack milliseconds.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.stub_server import StubServer
+
+PHASES = ['import', 'import_client', 'construct', 'first_request', 'time_to_first_request']
+
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+import orbitdbapi
+imported = time.perf_counter()
+from orbitdbapi import OrbitDbAPI
+client_imported = time.perf_counter()
+client = OrbitDbAPI(base_url=sys.argv[1])
+constructed = time.perf_counter()
+client.list_dbs()
+answered = time.perf_counter()
+client.close()
+print(json.dumps({
+    'import': imported - start, 'import_client': client_imported - imported, 'construct': constructed - client_imported,
+    'first_request': answered - constructed, 'time_to_first_request': answered - start,
+}))
+'''
+
+
+def run_child(base_url, env):
+    out = subprocess.run([sys.executable, '-c', CHILD, base_url], env=env, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout)
+
+
+def compare(results, baseline, tolerance, slack):
+    """
+    Returns a description of every phase that regressed against the baseline results.
+    """
+    before = {result['phase']: result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        base = before.get(result['phase'])
+        if base is None: continue
+        if result['median_ms'] > base['median_ms'] * (1 + tolerance) and result['median_ms'] - base['median_ms'] > slack:
+            regressions.append(f'{result["phase"]}: median {base["median_ms"]:.2f} -> {result["median_ms"]:.2f} ms')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=15, help='Timed interpreter starts')
+    parser.add_argument('--output', help='Write the results as JSON to this file (default: stdout)')
+    parser.add_argument('--compare', help='JSON results of an earlier run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative growth before a phase counts as a regression')
+    parser.add_argument('--slack', type=float, default=2.0, help='Milliseconds a phase may grow regardless of the tolerance')
+    args = parser.parse_args()
+
+    env = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+    with StubServer() as server:
+        run_child(server.base_url, env)
+        runs = [run_child(server.base_url, env) for _run in range(args.runs)]
+
+    results = []
+    for phase in PHASES:
+        ms = sorted(run[phase] * 1000 for run in runs)
+        results.append({'phase': phase, 'median_ms': round(statistics.median(ms), 3), 'min_ms': round(ms[0], 3), 'max_ms': round(ms[-1], 3)})
+        print(f'{phase:<22} median={statistics.median(ms):8.2f}  min={ms[0]:8.2f}  max={ms[-1]:8.2f} ms', file=sys.stderr)
+
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'runs': args.runs, 'timestamp': time.time()},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.slack)
+        for regression in regressions:
+            print('REGRESSION ' + regression, file=sys.stderr)
+        if regressions: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
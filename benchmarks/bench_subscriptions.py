@@ -0,0 +1,60 @@
+"""
+Follow the write events of many databases from one event loop with EventSubscriptions.
+
+Run from the repository root:
+    python -m benchmarks.bench_subscriptions --dbs 200 --events 5000
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from orbitdbapi import AsyncOrbitDbAPI, EventSubscriptions, OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+
+def write(base_url, names, events):
+    with OrbitDbAPI(base_url=base_url) as client:
+        dbs = [client.db(name) for name in names]
+        for i in range(events):
+            dbs[i % len(dbs)].add({'n': i})
+
+
+async def follow(server, args):
+    names = [f'bench_subscriptions_{i}' for i in range(args.dbs)]
+    async with AsyncOrbitDbAPI(base_url=server.base_url, max_connections=args.dbs + 10) as client:
+        async with EventSubscriptions(max_batch=args.max_batch, max_delay=args.max_delay, backoff=0.05) as subscriptions:
+            for name in names:
+                subscriptions.subscribe(await client.db(name, json={'create': True, 'type': 'eventlog'}), ('write',))
+            while subscriptions.stats['connected'] < args.dbs:
+                await asyncio.sleep(0.01)
+            writer = threading.Thread(target=write, args=(server.base_url, names, args.events))
+            start = time.perf_counter()
+            writer.start()
+            writes = 0
+            while writes < args.events:
+                batch = await subscriptions.get_batch(timeout=10)
+                if not batch: break
+                writes += sum(1 for event in batch if event.event == 'write')
+                if args.disconnect and writes >= args.events // 2 and not server.generation: server.disconnect()
+            seconds = time.perf_counter() - start
+            writer.join()
+            stats = subscriptions.stats
+            print(f'{args.dbs} dbs: {writes} of {args.events} writes in {seconds:.2f} s, {writes / seconds:.0f} events/s, '
+                  f'{stats["batches"]} batches, max lag {stats["max_lag"] * 1000:.1f} ms, {stats["reconnects"]} reconnects')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dbs', type=int, default=200)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--max-batch', type=int, default=500)
+    parser.add_argument('--max-delay', type=float, default=0.05)
+    parser.add_argument('--disconnect', action='store_true', help='Drop every event stream halfway through')
+    args = parser.parse_args()
+    with StubServer() as server:
+        asyncio.run(follow(server, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""
+An in-process stand-in for orbit-db-http-api, used by the benchmarks.
+
+It keeps every database in memory and answers the subset of the
+`db/<id>/*` endpoints the client uses. `latency` adds a fixed delay to
+every request to emulate a network round trip, fail() and stall()
+inject errors and slow requests, and disconnect() drops the open event
+streams. `workers` limits the requests a server handles at once, and
+servers created with the same `dbs` dict act as replicas of one another.
+"""
+import contextlib
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+CAPABILITIES = {
+    'keyvalue': ['get', 'put', 'remove'],
+    'docstore': ['get', 'put', 'query', 'remove'],
+    'feed': ['add', 'get', 'iterator', 'remove'],
+    'eventlog': ['add', 'get', 'iterator'],
+    'counter': ['inc', 'value'],
+}
+
+
+class StubDB ():
+    def __init__(self, name, dbtype, options=None):
+        self.lock = threading.Lock()
+        self.name = name
+        self.type = dbtype
+        self.id = f'/orbitdb/zdpuStub/{name}'
+        self.options = options or {}
+        if dbtype == 'docstore': self.options.setdefault('indexBy', '_id')
+        self.docs = {}
+        self.log = []
+        self.counter = 0
+        self.seq = 0
+        self.subscribers = []
+
+    def emit(self, eventname, *args):
+        for subscriber in list(self.subscribers):
+            subscriber.put((eventname, list(args)))
+
+    def write(self, entry):
+        self.log.append(entry)
+        self.emit('write', self.id, entry, [entry])
+
+    def info(self):
+        return {
+            'address': self.id, 'id': self.id, 'dbname': self.name, 'type': self.type,
+            'options': self.options, 'capabilities': CAPABILITIES[self.type],
+            'canAppend': True, 'write': ['*'],
+        }
+
+    def next_hash(self):
+        self.seq += 1
+        return f'zdpuHash{self.seq:012d}'
+
+    def put(self, doc):
+        key = doc.get(self.options.get('indexBy', '_id')) if self.type == 'docstore' else doc.get('key')
+        value = doc if self.type == 'docstore' else doc.get('value')
+        with self.lock:
+            self.docs[str(key)] = value
+            entry_hash = self.next_hash()
+            self.write({'hash': entry_hash, 'payload': {'op': 'PUT', 'key': key, 'value': value}})
+        return entry_hash
+
+    def remove(self, key):
+        with self.lock:
+            self.docs.pop(key, None)
+            entry_hash = self.next_hash()
+            self.write({'hash': entry_hash, 'payload': {'op': 'DEL', 'key': key, 'value': None}})
+        return entry_hash
+
+    def add(self, value):
+        with self.lock:
+            entry_hash = self.next_hash()
+            self.write({'hash': entry_hash, 'payload': {'op': 'ADD', 'key': None, 'value': value}})
+        return entry_hash
+
+    def inc(self, val):
+        with self.lock:
+            self.counter += val
+            entry_hash = self.next_hash()
+            self.write({'hash': entry_hash, 'payload': {'op': 'COUNTER', 'key': None, 'value': self.counter}})
+        return entry_hash
+
+    def get(self, key):
+        if self.type in ('feed', 'eventlog'):
+            return [e['payload']['value'] for e in self.log if e['hash'] == key]
+        value = self.docs.get(key)
+        if self.type == 'docstore':
+            return [value] if value is not None else []
+        return value
+
+    def iterator(self, opts):
+        """
+        Mirror orbit-db's EventStore iterator: gt/gte page forward from a hash,
+        lt/lte (or nothing) page backward from the head, results in log order.
+        """
+        limit = opts.get('limit')
+        amount = (limit if limit > -1 else len(self.log)) if limit else 1
+        with self.lock:
+            log = list(self.log)
+        if opts.get('gt') or opts.get('gte'):
+            result = self.read(log, opts.get('gt') or opts.get('gte'), amount, bool(opts.get('gte')))
+        else:
+            log.reverse()
+            result = self.read(log, opts.get('lt') or opts.get('lte'), amount, bool(opts.get('lte')) or not opts.get('lt'))
+            result.reverse()
+        if opts.get('reverse'): result.reverse()
+        return result
+
+    @staticmethod
+    def read(log, entry_hash, amount, inclusive):
+        hashes = [e['hash'] for e in log]
+        index = hashes.index(entry_hash) if entry_hash in hashes else -1
+        start = max(index, 0) + (0 if inclusive else 1)
+        return log[start:start + amount]
+
+    def index(self):
+        if self.type in ('feed', 'eventlog'): return {e['hash']: e for e in self.log}
+        return dict(self.docs)
+
+    def all(self):
+        if self.type == 'docstore': return list(self.docs.values())
+        if self.type in ('feed', 'eventlog'): return {e['hash']: e for e in self.log}
+        return dict(self.docs)
+
+
+class StubHandler (BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length: return {}
+        return json.loads(self.rfile.read(length))
+
+    def _send(self, result, status=200):
+        body = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _events(self, db, eventnames):
+        subscriber = queue.Queue()
+        db.subscribers.append(subscriber)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        generation = self.server.generation
+        try:
+            while not self.server.stopping.is_set() and self.server.generation == generation:
+                try:
+                    eventname, args = subscriber.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if eventname in eventnames:
+                    self.wfile.write(f'event: {eventname}\ndata: {json.dumps(args)}\n\n'.encode())
+                    self.wfile.flush()
+        finally:
+            db.subscribers.remove(subscriber)
+
+    def _dispatch(self, method):
+        with self.server.workers:
+            events = self._handle(method)
+        if events is not None: self._events(*events)
+
+    def _handle(self, method):
+        """
+        Answer the request, or return the db and event names of an event stream.
+        """
+        server = self.server
+        if server.latency: time.sleep(server.latency)
+        fault = server.next_fault()
+        if fault is not None:
+            kind, value = fault
+            if kind == 'stall': time.sleep(value)
+            if kind == 'status':
+                self._body()
+                return self._send({'statusCode': value, 'message': 'Injected fault'}, value)
+        parts = [unquote(p) for p in self.path.strip('/').split('/')]
+        body = self._body()
+        if method == 'GET' and len(parts) == 4 and parts[2] == 'events' and parts[1].rsplit('/', 1)[-1] in server.dbs:
+            return server.dbs[parts[1].rsplit('/', 1)[-1]], parts[3].split(',')
+        try:
+            result = server.route(method, parts, body)
+        except KeyError as ex:
+            return self._send({'statusCode': 404, 'message': str(ex)}, 404)
+        self._send(result)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+
+class StubServer (ThreadingHTTPServer):
+    """
+    Run with `with StubServer(latency=0.005) as server:` and point the client at `server.base_url`.
+    """
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0, workers=None, dbs=None):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.workers = threading.BoundedSemaphore(workers) if workers else contextlib.nullcontext()
+        self.dbs = {} if dbs is None else dbs
+        self.stopping = threading.Event()
+        self.generation = 0
+        self.__thread = None
+        self.__faults_lock = threading.Lock()
+        self.__faults = []
+
+    def handle_error(self, request, client_address):
+        # Clients closing a stream early are expected
+        if isinstance(sys.exc_info()[1], ConnectionError): return
+        super().handle_error(request, client_address)
+
+    def fail(self, count=1, status=503):
+        """
+        Answer the next count requests with an error status.
+        """
+        with self.__faults_lock:
+            self.__faults.extend([('status', status)] * count)
+
+    def stall(self, count=1, seconds=1.0):
+        """
+        Delay the next count requests by seconds on top of the latency.
+        """
+        with self.__faults_lock:
+            self.__faults.extend([('stall', seconds)] * count)
+
+    def disconnect(self):
+        """
+        Close every open event stream.
+        """
+        self.generation += 1
+
+    def next_fault(self):
+        with self.__faults_lock:
+            return self.__faults.pop(0) if self.__faults else None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopping.set()
+        self.shutdown()
+        self.server_close()
+
+    def route(self, method, parts, body):
+        if parts == ['dbs']:
+            return [db.info() for db in self.dbs.values()]
+        if parts == ['identity']:
+            return {'id': f'zdpuIdentity{self.server_address[1]}', 'type': 'orbitdb'}
+        if parts[0] != 'db' or len(parts) < 2:
+            raise KeyError('/'.join(parts))
+        name = parts[1]
+        if len(parts) == 2 and method == 'POST':
+            dbname = name.rsplit('/', 1)[-1]
+            if dbname not in self.dbs:
+                self.dbs[dbname] = StubDB(dbname, body.get('type', 'keyvalue'), body.get('options'))
+            return self.dbs[dbname].info()
+        db = self.dbs[name.rsplit('/', 1)[-1]]
+        action = parts[2:]
+        if not action:
+            if method == 'DELETE': return ''
+            return db.info()
+        if method == 'POST' and action == ['put']: return {'hash': db.put(body)}
+        if method == 'POST' and action == ['add']: return {'hash': db.add(body)}
+        if method == 'POST' and action == ['inc']: return {'hash': db.inc(body.get('val', 1))}
+        if action == ['value']: return db.counter
+        if action == ['all']: return db.all()
+        if action == ['index']: return db.index()
+        if action == ['rawiterator']: return db.iterator(body)
+        if action == ['iterator']: return [e['payload']['value'] for e in db.iterator(body)]
+        if method == 'GET' and len(action) == 1: return db.get(action[0])
+        if method == 'DELETE' and len(action) == 1: return db.remove(action[0])
+        raise KeyError('/'.join(parts))
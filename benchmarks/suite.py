@@ -0,0 +1,206 @@
+"""
+Measure latency percentiles and throughput of DB operations against the local stub server.
+
+Every combination of operation, payload size, concurrency level and cache
+setting is one scenario. The results are written as JSON so runs of
+different releases can be compared.
+
+Run from the repository root:
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --output current.json --compare baseline.json --tolerance 0.25
+
+With --compare the exit status is 1 when a scenario lost more throughput
+or gained more median latency than the tolerance allows.
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import orbitdbapi
+from orbitdbapi import OrbitDbAPI
+from benchmarks.stub_server import StubServer
+
+OPERATIONS = ['get', 'put', 'add', 'iterator', 'all', 'events']
+PREFILL = 100
+
+
+def payload(size):
+    return 'x' * size
+
+
+class EventTimes ():
+    """
+    Follow the write events of a database in a background thread and record when each entry arrived.
+    """
+    def __init__(self, db):
+        self.arrived = {}
+        self.condition = threading.Condition()
+        self.ready = threading.Event()
+        threading.Thread(target=self.follow, args=(db,), daemon=True).start()
+
+    def follow(self, db):
+        events = db.events('write')
+        self.ready.set()
+        try:
+            for event in events:
+                entry_hash = json.loads(event.data)[1]['hash']
+                with self.condition:
+                    self.arrived[entry_hash] = time.perf_counter()
+                    self.condition.notify_all()
+        except httpx.HTTPError:
+            pass  # The client of the scenario was closed
+
+    def wait(self, entry_hash, timeout=10):
+        with self.condition:
+            self.condition.wait_for(lambda: entry_hash in self.arrived, timeout)
+            return self.arrived.pop(entry_hash)
+
+
+def prepare(client, op, size, name):
+    """
+    Open and fill the database of a scenario and return the timed operation, called with the request number.
+    """
+    value = payload(size)
+    if op in ('get', 'put', 'all'):
+        db = client.db(name, json={'create': True, 'type': 'keyvalue'})
+        for i in range(PREFILL):
+            db.put({'key': f'k{i}', 'value': value}, cache=False)
+        if op == 'get':
+            for i in range(PREFILL):
+                db.get(f'k{i}')
+            return lambda i: db.get(f'k{i % PREFILL}')
+        if op == 'put': return lambda i: db.put({'key': f'k{i}', 'value': value})
+        return lambda i: db.all()
+    db = client.db(name, json={'create': True, 'type': 'feed'})
+    if op == 'add':
+        return lambda i: db.add({'value': value})
+    if op == 'iterator':
+        for i in range(PREFILL):
+            db.add({'value': value}, cache=False)
+        return lambda i: db.iterator_raw(limit=10)
+    times = EventTimes(db)
+    times.ready.wait()
+    time.sleep(0.2)
+    def publish(i):
+        start = time.perf_counter()
+        return times.wait(db.add({'value': value}, cache=False)) - start
+    return publish
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))]
+
+
+def run_scenario(server, op, size, concurrency, cache, requests):
+    """
+    Run one scenario and return its result record.
+    """
+    name = f'bench_{op}_{size}_{concurrency}_{"cache" if cache else "nocache"}'
+    with OrbitDbAPI(base_url=server.base_url, use_db_cache=cache, max_connections=max(concurrency, 10)) as client:
+        call = prepare(client, op, size, name)
+        call(0)
+        latencies = []
+        errors = 0
+
+        def timed(i):
+            start = time.perf_counter()
+            result = call(i)
+            return result if op == 'events' else time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            for future in [pool.submit(timed, i) for i in range(requests)]:
+                try:
+                    latencies.append(future.result())
+                except Exception:
+                    errors += 1
+        seconds = time.perf_counter() - start
+    latencies.sort()
+    ms = [latency * 1000 for latency in latencies] or [float('nan')]
+    return {
+        'op': op, 'payload_bytes': size, 'concurrency': concurrency, 'cache': cache,
+        'requests': requests, 'errors': errors, 'seconds': round(seconds, 6),
+        'throughput': round(len(latencies) / seconds, 3),
+        'latency_ms': {
+            'mean': round(sum(ms) / len(ms), 4), 'p50': round(percentile(ms, 50), 4),
+            'p90': round(percentile(ms, 90), 4), 'p99': round(percentile(ms, 99), 4), 'max': round(ms[-1], 4),
+        },
+    }
+
+
+def scenario_key(result):
+    return (result['op'], result['payload_bytes'], result['concurrency'], result['cache'])
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a description of every scenario that regressed against the baseline results.
+    """
+    before = {scenario_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        base = before.get(scenario_key(result))
+        if base is None: continue
+        label = '{} payload={} concurrency={} cache={}'.format(*scenario_key(result))
+        if result['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append(f'{label}: throughput {base["throughput"]:.1f} -> {result["throughput"]:.1f} ops/s')
+        if result['latency_ms']['p50'] > base['latency_ms']['p50'] * (1 + tolerance):
+            regressions.append(f'{label}: p50 {base["latency_ms"]["p50"]:.3f} -> {result["latency_ms"]["p50"]:.3f} ms')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ops', nargs='+', choices=OPERATIONS, default=OPERATIONS)
+    parser.add_argument('--payload-sizes', type=int, nargs='+', default=[64, 1024, 16384])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--cache', choices=['on', 'off'], nargs='+', default=['on', 'off'])
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per scenario')
+    parser.add_argument('--latency', type=float, default=0.0, help='Stub server delay per request in seconds')
+    parser.add_argument('--output', help='Write the results as JSON to this file (default: stdout)')
+    parser.add_argument('--compare', help='JSON results of an earlier run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative loss before a scenario counts as a regression')
+    args = parser.parse_args()
+
+    results = []
+    with StubServer(latency=args.latency) as server:
+        for op, size, concurrency, cache in itertools.product(args.ops, args.payload_sizes, args.concurrency, args.cache):
+            result = run_scenario(server, op, size, concurrency, cache == 'on', args.requests)
+            results.append(result)
+            latency = result['latency_ms']
+            print(f'{op:<9} {size:>6}B  c={concurrency:<3} cache={cache:<3} {result["throughput"]:10.1f} ops/s  '
+                  f'p50={latency["p50"]:8.3f}  p90={latency["p90"]:8.3f}  p99={latency["p99"]:8.3f} ms  errors={result["errors"]}',
+                  file=sys.stderr)
+
+    report = {
+        'meta': {
+            'orbitdbapi': orbitdbapi.__version__, 'httpx': httpx.__version__,
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'latency': args.latency, 'requests': args.requests, 'timestamp': time.time(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression, file=sys.stderr)
+        if regressions: sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,41 @@
+from importlib import import_module
+
 from .version import version, version_info
-from .client import OrbitDbAPI
-from .db import DB
 __version__ = version
+
+# The public names and their modules. They are imported on first access, so that importing
+# the package stays cheap for short-lived processes that only need part of it.
+_exports = {
+    'OrbitDbAPI': 'client',
+    'DB': 'db',
+    'AsyncOrbitDbAPI': 'asyncclient',
+    'AsyncDB': 'asyncdb',
+    'Cache': 'cache', 'LRUCache': 'cache',
+    'JSONCodec': 'codec', 'MsgspecCodec': 'codec', 'OrjsonCodec': 'codec',
+    'Entry': 'entry',
+    'AggregatingCounter': 'counter', 'AsyncAggregatingCounter': 'counter',
+    'DocView': 'query',
+    'AsyncReplica': 'replica', 'Replica': 'replica',
+    'CircuitBreaker': 'resilience', 'CircuitOpenError': 'resilience', 'RetryPolicy': 'resilience',
+    'Snapshot': 'snapshot',
+    'DBEvent': 'subscriptions', 'EventSubscriptions': 'subscriptions',
+    'AsyncWriteBehind': 'writebehind', 'BufferFullError': 'writebehind', 'DroppedError': 'writebehind',
+    'WriteBehind': 'writebehind',
+    'Metrics': 'metrics', 'OpenTelemetryHook': 'metrics', 'PrometheusCollector': 'metrics',
+    'RequestRecord': 'metrics',
+}
+
+__all__ = ['version', 'version_info', '__version__', *_exports]
+
+
+def __getattr__(name):
+    module = _exports.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
@@ -0,0 +1,268 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from copy import deepcopy
+from urllib.parse import quote as urlquote
+
+import httpx
+
+from .asyncdb import AsyncDB
+from .client import OrbitDbAPI
+
+
+class AsyncOrbitDbAPI (OrbitDbAPI):
+    """
+    An asyncio client for interacting with the OrbitDB HTTP API.
+    Every API call is a coroutine and all requests share one httpx.AsyncClient.
+    """
+    _db_class = AsyncDB
+    _asynchronous = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.__evictions = set()
+
+    def _new_session(self):
+        """
+        Create the asynchronous HTTP session used by the client.
+        """
+        return httpx.AsyncClient(transport=self.transport, timeout=self.timeout)
+
+    async def aclose(self):
+        """
+        Close the underlying HTTP session.
+        """
+        session, transport = self._detach_session()
+        if session is not None: await session.aclose()
+        elif transport is not None: await transport.aclose()
+
+    def close(self):
+        raise TypeError('Use "await client.aclose()" to close an AsyncOrbitDbAPI')
+
+    def __enter__(self):
+        raise TypeError('Use "async with" with an AsyncOrbitDbAPI')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def _do_request(self, *args, **kwargs):
+        """
+        Perform a raw request to the OrbitDB API, retrying idempotent calls according to the retry policy.
+        Args:
+            *args: Positional arguments to pass to the session's request() method.
+            **kwargs: Keyword arguments to pass to the session's request() method.
+                - 'stream': Return the response with its body unread (bool, default=False). The caller must close it.
+        """
+        if self.logger.isEnabledFor(15): self.logger.log(15, json.dumps([args, kwargs], default=str))
+        kwargs['timeout'] = kwargs.get('timeout', self.timeout)
+        if 'json' in kwargs: self._encode_json(kwargs)
+        stream = kwargs.pop('stream', False)
+        retry = self._retryable(*args[:2])
+        breaker = self.circuit_breaker
+        attempt = 1
+        while True:
+            if breaker is not None: breaker.allow()
+            try:
+                res = await self._send(args, kwargs, stream, attempt)
+            except httpx.TransportError:
+                self._record_outcome(None)
+                delay = self._retry_delay(retry, attempt)
+                if delay is None: raise
+            except BaseException:
+                if breaker is not None: breaker.release()
+                raise
+            else:
+                self._record_outcome(res)
+                delay = self._retry_delay(retry, attempt, res)
+                if delay is None: return res
+                await res.aclose()
+            self.logger.warning('Retrying %s %s in %.3f seconds after attempt %d failed', *args[:2], delay, attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, args, kwargs, stream, attempt):
+        if self.hedge_tracker is not None and args[0] == 'GET' and not stream:
+            return await self._send_hedged(args, kwargs, attempt)
+        return await self._send_once(args, kwargs, stream, attempt)
+
+    async def _send_once(self, args, kwargs, stream=False, attempt=1):
+        start = time.perf_counter() if self.hooks or self.hedge_tracker is not None else None
+        try:
+            session = self.session
+            if stream:
+                res = await session.send(session.build_request(*args, **kwargs), stream=True)
+            else:
+                res = await session.request(*args, **kwargs)
+        except BaseException as ex:
+            if not isinstance(ex, asyncio.CancelledError): self.logger.exception('Exception during api call')
+            if self.hooks: self._notify_hooks(args, start, error=ex, attempt=attempt)
+            raise
+        if start is not None: self._request_done(args, start, res, stream, attempt)
+        return res
+
+    async def _send_hedged(self, args, kwargs, attempt):
+        """
+        Send a GET request, and a second one if the first is slower than the hedge delay.
+        Returns the first successful response and cancels the other request.
+        """
+        delay = self.hedge_tracker.threshold()
+        if delay is None: return await self._send_once(args, kwargs, False, attempt)
+        first = asyncio.ensure_future(self._send_once(args, kwargs, False, attempt))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done: return first.result()
+            second = asyncio.ensure_future(self._send_once(args, kwargs, False, attempt))
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                won = [task for task in (first, second) if task in done and task.exception() is None]
+                if won:
+                    self.hedge_tracker.hedged(won=won[0] is second)
+                    for loser in won[1:]: await loser.result().aclose()
+                    return won[0].result()
+            return first.result()
+        finally:
+            for task in pending: task.cancel()
+
+    async def _call_raw(self, method, endpoint, **kwargs):
+        """
+        Perform a raw API call and return the raw response.
+        Args:
+            method (str): HTTP method to use.
+            endpoint (str): Endpoint to call.
+            **kwargs: Additional keyword arguments to pass to the request.
+        """
+        url = '/'.join([self.base_url, endpoint])
+        if method == 'GET': return await self._do_request(method, url, **kwargs)
+        try:
+            return await self._do_request(method, url, **kwargs)
+        finally:
+            self._wrote(endpoint)
+
+    async def _call(self, method, endpoint, **kwargs):
+        """
+        Perform an API call and return the parsed JSON response.
+        Args:
+            method (str): HTTP method to use.
+            endpoint (str): Endpoint to call.
+            **kwargs: Additional keyword arguments to pass to the request.
+        """
+        if self._coalescable(method, kwargs):
+            result, leader = await self.single_flight.do(self._flight_key(method, endpoint), lambda: self._call_once(method, endpoint))
+            return result if leader else deepcopy(result)
+        return await self._call_once(method, endpoint, **kwargs)
+
+    async def _call_once(self, method, endpoint, **kwargs):
+        res = await self._call_raw(method, endpoint, **kwargs)
+        return self._parse_response(res)
+
+    @asynccontextmanager
+    async def _stream(self, method, endpoint, **kwargs):
+        """
+        Perform a streaming API call, yielding the response with its body unread.
+        The response is closed when the context exits, also when its body was not fully read.
+        Args:
+            method (str): HTTP method to use.
+            endpoint (str): Endpoint to call.
+            **kwargs: Additional keyword arguments to pass to the request.
+        """
+        res = await self._call_raw(method, endpoint, stream=True, **kwargs)
+        try:
+            await self._araise_for_stream(res)
+            yield res
+        finally:
+            await res.aclose()
+
+    async def _araise_for_stream(self, res):
+        """
+        Raise for an error status of a streamed response, reading and logging its body first.
+        Args:
+            res (httpx.Response): The streamed response.
+        """
+        if res.is_error:
+            await res.aread()
+            self._parse_response(res)
+
+    async def list_dbs(self):
+        """
+        Retrieve a list of all databases on the OrbitDB API.
+        """
+        return await self._call('GET', 'dbs')
+
+    async def db(self, dbname, local_options=None, **kwargs):
+        """
+        Open a database by name and return an AsyncDB object, warmed up from its snapshot with the
+        'snapshot' option, see OrbitDbAPI.db().
+        Args:
+            dbname (str): The name of the database to open.
+            local_options (dict): A dictionary of options to pass to the AsyncDB object.
+            **kwargs: Additional keyword arguments to pass to the open_db() method.
+        Example:
+            async with AsyncOrbitDbAPI(base_url='http://localhost:3000') as client:
+                mydb = await client.db("mydbname")
+                assert await client.db("mydbname") is mydb
+        """
+        self._evict_idle_dbs_later()
+        if not self.reuse_dbs:
+            return await self._open_handle(dbname, local_options, kwargs)
+        key = self.db_handles.key(dbname, local_options, kwargs)
+        db = self.db_handles.get(key)
+        if db is None:
+            db, _leader = await self.db_flight.do(key, lambda: self._open_handle(dbname, local_options, kwargs, key))
+        return db
+
+    async def _open_handle(self, dbname, local_options, kwargs, key=None):
+        db = self._make_db(await self.open_db(dbname, **kwargs), local_options)
+        if db.snapshot is not None: await db.warm_start()
+        if key is not None: self._register_db(db, key, local_options, kwargs)
+        return db
+
+    async def evict_idle_dbs(self, timeout=None):
+        """
+        Unload and forget the AsyncDB objects that were not used for longer than 'db_idle_timeout' seconds.
+        See OrbitDbAPI.evict_idle_dbs().
+        Args:
+            timeout (float): Overrides the 'db_idle_timeout' option.
+        """
+        evicted = self.db_handles.idle(timeout)
+        await self._unload_dbs(evicted)
+        return evicted
+
+    def _evict_idle_dbs_later(self):
+        """
+        Forget the idle AsyncDB objects and unload them in a task, keeping the round trips off db().
+        """
+        evicted = self.db_handles.idle()
+        if evicted:
+            task = asyncio.ensure_future(self._unload_dbs(evicted))
+            self.__evictions.add(task)
+            task.add_done_callback(self.__evictions.discard)
+
+    async def _unload_dbs(self, dbs):
+        for db in dbs:
+            try:
+                await db.unload()
+            except Exception:
+                self.logger.warning('Failed to unload idle db %s', db.id, exc_info=True)
+
+    async def open_db(self, dbname, **kwargs):
+        """
+        Open a database by name and return the raw JSON response.
+        Args:
+            dbname (str): The name of the database to open.
+            **kwargs: Additional keyword arguments to pass to the request.
+        """
+        endpoint = '/'.join(['db', urlquote(dbname, safe='')])
+        return await self._call('POST', endpoint, **kwargs)
+
+    async def searches(self):
+        """
+        Retrieve a list of all searches on the OrbitDB API.
+        """
+        endpoint = '/'.join(['peers', 'searches'])
+        return await self._call('GET', endpoint)
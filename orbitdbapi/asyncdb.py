@@ -0,0 +1,345 @@
+import asyncio
+from collections import deque
+from collections.abc import Mapping
+from contextlib import asynccontextmanager
+from urllib.parse import quote as urlquote
+
+from .db import DB
+from .entry import Entry
+from .transport import stream_timeout
+
+
+class AsyncDB (DB):
+    """
+    The asyncio twin of DB, returned by AsyncOrbitDbAPI.db().
+    Capability properties and the cache are shared with DB; every API call is a coroutine.
+    """
+    __slots__ = ()
+    _invalidator_class = ('invalidation', 'AsyncCacheInvalidator')
+    _write_behind_class = ('writebehind', 'AsyncWriteBehind')
+    _aggregator_class = ('counter', 'AsyncAggregatingCounter')
+    _replica_class = ('replica', 'AsyncReplica')
+
+    async def unwatch_cache(self):
+        """
+        Stop following the events of the database.
+        """
+        watcher = self._detach_watcher()
+        if watcher is not None: await watcher.stop()
+
+    async def info(self):
+        endpoint = self._endpoint()
+        return await self.client._call('GET', endpoint)
+
+    async def get(self, item, cache=None, unpack=False, mutable=False):
+        if cache is None: cache = self.cached
+        item = str(item)
+        hit, result = self._cache_lookup(item, cache)
+        if not hit:
+            endpoint = self._endpoint(item)
+            result = await self.client._call('GET', endpoint)
+            result = self._cache_store(item, result, cache)
+        return self._read_result(result, unpack, mutable)
+
+    async def get_many(self, items, concurrency=16, cache=None, mutable=False, bulk=None, bulk_ratio=0.25):
+        """
+        Get many keys at once, fetching the ones missing from the cache concurrently, see DB.get_many().
+        Example:
+            values = await mydb.get_many(['a', 'b', 'c'], concurrency=32)
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        if cache is None: cache = self.cached
+        keys, results, misses = self._get_many_lookup(items, cache)
+        fetched = None
+        if misses and self._get_many_bulk(len(misses), bulk, bulk_ratio):
+            fetched = self._bulk_fetched(await self.client._call('GET', self._endpoint('all')), misses, cache)
+        if misses and fetched is None:
+            slots = asyncio.Semaphore(concurrency)
+            async def fetch(key):
+                async with slots:
+                    return await self.client._call('GET', self._endpoint(key))
+            fetched = self._cache_fetched(zip(misses, await asyncio.gather(*[fetch(key) for key in misses])), cache)
+        if fetched: results.update(fetched)
+        return {key: self._read_result(results[key], False, mutable) for key in keys}
+
+    async def get_raw(self, item):
+        endpoint = self._endpoint('raw', str(item))
+        return await self.client._call('GET', endpoint)
+
+    async def put(self, item, cache=None):
+        self._check_put(item)
+        if cache is None: cache = self.cached
+        endpoint = self._endpoint('put')
+        entry_hash = (await self.client._call('POST', endpoint, json=item)).get('hash')
+        self._cache_put(item, entry_hash, cache)
+        return entry_hash
+
+    async def add(self, item, cache=None):
+        self._require('add')
+        if cache is None: cache = self.cached
+        endpoint = self._endpoint('add')
+        entry_hash = (await self.client._call('POST', endpoint, json=item)).get('hash')
+        self._cache_add(item, entry_hash, cache)
+        return entry_hash
+
+    def put_many(self, items, concurrency=8, cache=None):
+        """
+        Put many documents, keeping up to `concurrency` requests in flight.
+        Returns an async generator of (item, result) pairs in input order, see DB.put_many().
+        Example:
+            async for doc, result in mydb.put_many(docs, concurrency=32):
+                ...
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self._require('put')
+        if cache is None: cache = self.cached
+        return self._write_many(self._endpoint('put'), items, concurrency, self._check_put, self._put_cache_key if cache else None)
+
+    def add_many(self, items, concurrency=8, cache=None):
+        """
+        Add many entries, keeping up to `concurrency` requests in flight.
+        Returns an async generator of (item, result) pairs in input order, see DB.add_many().
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self._require('add')
+        if cache is None: cache = self.cached
+        return self._write_many(self._endpoint('add'), items, concurrency, None, self._add_cache_key if cache else None)
+
+    async def _write_many(self, endpoint, items, concurrency, check, cache_key):
+        async def write(item):
+            return (await self.client._call('POST', endpoint, json=item)).get('hash')
+        written = []
+        pending = deque()
+        try:
+            for item in items:
+                try:
+                    if check: check(item)
+                except Exception as ex:
+                    pending.append((item, None, ex))
+                else:
+                    pending.append((item, asyncio.ensure_future(write(item)), None))
+                while len(pending) >= concurrency:
+                    yield await self._acollect_write(pending.popleft(), written)
+            while pending:
+                yield await self._acollect_write(pending.popleft(), written)
+        finally:
+            for _item, task, _error in pending:
+                if task: task.cancel()
+            if cache_key: self._cache_written(cache_key, written)
+
+    @staticmethod
+    async def _acollect_write(pending_item, written):
+        item, task, error = pending_item
+        if task is not None:
+            await asyncio.wait([task])
+        return DB._collect_write(pending_item, written)
+
+    async def inc(self, val):
+        val = int(val)
+        endpoint = self._endpoint('inc')
+        return await self.client._call('POST', endpoint, json={'val':val})
+
+    async def value(self):
+        endpoint = self._endpoint('value')
+        return await self.client._call('GET', endpoint)
+
+    async def iterator_raw(self, **kwargs):
+        self._require('iterator')
+        endpoint = self._endpoint('rawiterator')
+        return self._entries(await self.client._call('GET', endpoint, json=kwargs))
+
+    async def iterator(self, **kwargs):
+        self._require('iterator')
+        endpoint = self._endpoint('iterator')
+        return await self.client._call('GET', endpoint, json=kwargs)
+
+    async def index(self):
+        endpoint = self._endpoint('index')
+        return await self.client._call('GET', endpoint)
+
+    async def all(self, cache=None):
+        if cache is None: cache = self.cached
+        endpoint = self._endpoint('all')
+        result = await self.client._call('GET', endpoint)
+        if cache: self._cache_all(result)
+        return result
+
+    def iterator_raw_stream(self, **kwargs):
+        """
+        Like iterator_raw(), but parse the response incrementally and yield one entry at a time.
+        Returns an async generator; closing it early closes the connection.
+        Example:
+            async for entry in mydb.iterator_raw_stream(limit=-1):
+                process(entry)
+        """
+        self._require('iterator')
+        return self._stream_items(self._endpoint('rawiterator'), typed=self.typed_entries, json=kwargs)
+
+    def iterator_stream(self, **kwargs):
+        """
+        Like iterator(), but parse the response incrementally, see iterator_raw_stream().
+        """
+        self._require('iterator')
+        return self._stream_items(self._endpoint('iterator'), json=kwargs)
+
+    def scan(self, page_size=100, reverse=True, start=None, prefetch=True):
+        """
+        Lazily iterate the raw entries of a feed or eventlog page by page, see DB.scan().
+        Returns an async generator; the next page is fetched in a task while the current one is consumed.
+        Example:
+            async for entry in mydb.scan(page_size=500):
+                process(entry)
+        """
+        self._require('iterator')
+        self._check_scan(page_size, reverse, start)
+        return self._scan(page_size, reverse, start, prefetch)
+
+    async def _scan(self, page_size, reverse, cursor, prefetch):
+        fetch = lambda cursor: self.iterator_raw(**self._scan_options(page_size, reverse, cursor))
+        upcoming = None
+        try:
+            page = await fetch(cursor)
+            while page:
+                cursor = self._scan_cursor(page, reverse)
+                last = len(page) < page_size
+                upcoming = asyncio.ensure_future(fetch(cursor)) if prefetch and not last else None
+                for entry in (reversed(page) if reverse else page):
+                    yield entry
+                if last: break
+                page = await (upcoming if upcoming else fetch(cursor))
+                upcoming = None
+        finally:
+            if upcoming: upcoming.cancel()
+
+    def index_stream(self):
+        """
+        Like index(), but parse the response incrementally, see DB.index_stream().
+        """
+        return self._stream_items(self._endpoint('index'))
+
+    def all_stream(self):
+        """
+        Like all(), but parse the response incrementally, see DB.all_stream().
+        """
+        return self._stream_items(self._endpoint('all'))
+
+    async def _stream_items(self, endpoint, typed=False, **kwargs):
+        from .jsonstream import aiter_json_items
+        async with self.client._stream('GET', endpoint, **kwargs) as res:
+            async for item in aiter_json_items(res.aiter_bytes()):
+                yield Entry.from_dict(item) if typed else item
+
+    async def view(self, hash_indexes=(), sorted_indexes=(), follow=True):
+        """
+        Load a docstore into a local DocView with secondary indexes, see DB.view().
+        The view follows the database events in a task; stop it with "await view.unfollow()".
+        """
+        from .query import AsyncDocViewFollower, DocView
+        self._require('query')
+        view = DocView(self.index_by or '_id', hash_indexes, sorted_indexes)
+        if follow:
+            view._begin_load()
+            view._follow(AsyncDocViewFollower(self, view).start())
+        try:
+            if follow: await view.follower.wait_connected()
+            view.load(await self.all(cache=False))
+        except BaseException:
+            if follow: await view.unfollow()
+            raise
+        return view
+
+    async def warm_start(self, snapshot=None, max_age=None):
+        """
+        Fill the cache from a snapshot and fetch only what changed since it was saved, see DB.warm_start().
+        Snapshot reads and writes run in the default executor.
+        """
+        snapshot = self._snapshot_for(snapshot)
+        if not self.cached: return {'loaded': 0, 'fetched': 0}
+        run = asyncio.get_running_loop().run_in_executor
+        meta = await run(None, snapshot.meta, self.id)
+        head = await self._head() if self.iterable and meta is not None else None
+        if not self._snapshot_usable(meta, max_age, head):
+            if self.iterable:
+                entries = await self.iterator_raw(limit=-1)
+                items = self._entry_items(entries)
+                self._cache_load(items)
+                await run(None, snapshot.save, self.id, items, entries[-1]['hash'] if entries else None)
+                return {'loaded': 0, 'fetched': len(items)}
+            result = await self.all()
+            items = result if isinstance(result, Mapping) else {}
+            await run(None, snapshot.save, self.id, items)
+            return {'loaded': 0, 'fetched': len(items)}
+        loaded = await run(None, snapshot.load, self.id)
+        self._cache_load(loaded)
+        fetched = 0
+        if self.iterable and head != meta['head']:
+            entries = await (self.iterator_raw(gt=meta['head'], limit=-1) if meta['head'] else self.iterator_raw(limit=-1))
+            items = self._entry_items(entries)
+            self._cache_load(items)
+            if entries:
+                await run(None, lambda: snapshot.save(self.id, items, entries[-1]['hash'], replace=False))
+            fetched = len(items)
+        return {'loaded': len(loaded), 'fetched': fetched}
+
+    async def _head(self):
+        latest = await self.iterator_raw(limit=1)
+        return latest[-1]['hash'] if latest else None
+
+    async def save_snapshot(self, snapshot=None):
+        """
+        Save the cache to a snapshot, see DB.save_snapshot().
+        """
+        snapshot = self._snapshot_for(snapshot)
+        head = await self._head() if self.iterable else None
+        await asyncio.get_running_loop().run_in_executor(None, snapshot.save, self.id, self.cache_backend.to_dict(), head)
+
+    async def remove(self, item):
+        self._require('remove')
+        item = str(item)
+        endpoint = self._endpoint(item)
+        return await self.client._call('DELETE', endpoint)
+
+    async def unload(self):
+        await self.unwatch_cache()
+        write_buffer = self._detach_write_buffer()
+        if write_buffer is not None: await write_buffer.close()
+        aggregator = self._detach_aggregator()
+        if aggregator is not None: await aggregator.close()
+        self.client._forget_db(self)
+        endpoint = self._endpoint()
+        return await self.client._call('DELETE', endpoint)
+
+    async def events(self, eventname):
+        """
+        Asynchronously iterate the server-sent events of the database.
+        Args:
+            eventname (str): The event to subscribe to, e.g. 'write' or 'replicated'.
+        Example:
+            async for event in mydb.events('write'):
+                print(event.data)
+        """
+        async with self._open_events(eventname) as events:
+            async for event in events:
+                yield event
+
+    @asynccontextmanager
+    async def _open_events(self, eventname):
+        """
+        Open the event stream of the database, yielding an async iterator of its events.
+        The stream has no read timeout and is closed when the context exits.
+        """
+        from .sse import aiter_events
+        endpoint = self._endpoint('events', urlquote(eventname, safe=''))
+        async with self.client._stream('GET', endpoint, timeout=stream_timeout(self.client.timeout)) as res:
+            yield aiter_events(res.aiter_lines())
+
+    async def findPeers(self, **kwargs):
+        endpoint = '/'.join(['peers', 'searches', 'db', urlquote(self.id, safe='')])
+        return await self.client._call('POST', endpoint, json=kwargs)
+
+    async def getPeers(self):
+        endpoint = self._endpoint('peers')
+        return await self.client._call('GET', endpoint)
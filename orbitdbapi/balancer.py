@@ -0,0 +1,311 @@
+import logging
+import random
+import threading
+import time
+import zlib
+from urllib.parse import unquote
+
+import httpx
+
+BALANCING = ('least_outstanding', 'latency')
+WRITE_POLICIES = ('primary', 'sticky')
+READ_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+NODE_FAILURE_STATUSES = frozenset([502, 503, 504])
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+logger = logging.getLogger(__name__)
+
+
+class Node ():
+    """
+    The state of one API node. Not thread-safe, NodeBalancer holds its lock.
+    """
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.in_flight = 0
+        self.latency = None
+        self.failures = 0
+        self.down_since = None
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def up(self):
+        return self.down_since is None
+
+    def stats(self):
+        return {
+            'up': self.up, 'in_flight': self.in_flight, 'requests': self.requests, 'errors': self.errors,
+            'latency': self.latency, 'consecutive_failures': self.failures,
+        }
+
+
+class NodeBalancer ():
+    """
+    Spreads the requests of a client over several orbit-db-http-api nodes replicating the same databases.
+    Reads (GET requests) go to the node with the fewest requests in flight, or with 'latency' balancing
+    to the node with the lowest moving average latency weighted by its requests in flight. Writes go to
+    the primary node, the first one, or with the 'sticky' write policy always to the same node per database.
+    A node is taken out of rotation after consecutive connection errors or 502/503/504 responses, and put
+    back once a background health check of health_path answers again. Thread-safe.
+    """
+    def __init__(self, nodes, balancing='least_outstanding', write_policy='primary', failures=3,
+                 health_interval=5.0, health_path='identity', decay=0.3):
+        """
+        Args:
+            nodes (list): The base URLs of the API nodes, the primary one first.
+            balancing (str): 'least_outstanding' or 'latency' (default='least_outstanding').
+            write_policy (str): 'primary' or 'sticky' (default='primary').
+            failures (int): Consecutive failures that take a node out of rotation (default=3).
+            health_interval (float): Seconds between health checks of nodes out of rotation (default=5).
+            health_path (str): The endpoint requested by health checks (default='identity').
+            decay (float): Weight of the newest sample in the moving average latency (default=0.3).
+        """
+        if not nodes: raise ValueError('nodes must list at least one base URL')
+        if balancing not in BALANCING: raise ValueError(f'balancing must be one of {", ".join(BALANCING)}')
+        if write_policy not in WRITE_POLICIES: raise ValueError(f'write_policy must be one of {", ".join(WRITE_POLICIES)}')
+        self.__nodes = [Node(url) for url in nodes]
+        self.__balancing = balancing
+        self.__write_policy = write_policy
+        self.__failures = failures
+        self.__health_interval = health_interval
+        self.__health_path = health_path
+        self.__decay = decay
+        self.__lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__checker = None
+
+    @property
+    def nodes(self):
+        """
+        Returns the base URLs of the nodes, the primary one first.
+        """
+        return [node.url for node in self.__nodes]
+
+    @property
+    def stats(self):
+        """
+        Returns the counters of every node by base URL: whether it is up, requests in flight and sent,
+        errors, moving average latency in seconds and consecutive failures.
+        """
+        with self.__lock:
+            return {node.url: node.stats() for node in self.__nodes}
+
+    def pick(self, method, path, exclude=()):
+        """
+        Choose the node for a request and count it in flight. Returns None when every node was excluded.
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path below the base URL, e.g. 'db/<address>/get'.
+            exclude (list): Nodes that already failed this request.
+        """
+        with self.__lock:
+            candidates = [node for node in self.__nodes if node not in exclude]
+            if not candidates: return None
+            if method in READ_METHODS:
+                node = self.__pick_read([node for node in candidates if node.up] or candidates)
+            elif self.__write_policy == 'sticky':
+                node = self.__pick_sticky([node for node in candidates if node.up] or candidates, path)
+            else:
+                node = self.__nodes[0]
+            node.in_flight += 1
+            node.requests += 1
+            return node
+
+    def __pick_read(self, candidates):
+        if self.__balancing == 'latency':
+            return min(candidates, key=lambda n: ((n.latency or 0) * (n.in_flight + 1), n.in_flight, random.random()))
+        return min(candidates, key=lambda n: (n.in_flight, random.random()))
+
+    @staticmethod
+    def __pick_sticky(candidates, path):
+        """
+        Rendezvous hashing on the database name: a database keeps its node while that node is up.
+        """
+        parts = path.split('?', 1)[0].split('/')
+        key = unquote(parts[1]).rsplit('/', 1)[-1] if parts[0] == 'db' and len(parts) > 1 else path
+        return max(candidates, key=lambda n: zlib.crc32(f'{n.url} {key}'.encode()))
+
+    def done(self, node, seconds=None, failed=False):
+        """
+        Report a finished request.
+        Args:
+            node (Node): The node returned by pick().
+            seconds (float): Seconds until the response headers arrived.
+            failed (bool): Whether the node failed: a connection error, a timeout or a 502/503/504 response.
+        """
+        with self.__lock:
+            node.in_flight -= 1
+            if not failed:
+                node.failures = 0
+                if seconds is not None:
+                    node.latency = seconds if node.latency is None else node.latency + self.__decay * (seconds - node.latency)
+                return
+            node.failures += 1
+            node.errors += 1
+            if node.up and node.failures >= self.__failures: self.__mark_down(node)
+
+    def __mark_down(self, node):
+        """
+        Take a node out of rotation and start the health checks. The caller holds the lock.
+        """
+        node.down_since = time.monotonic()
+        logger.warning('OrbitDB API node %s is down after %d consecutive failures', node.url, node.failures)
+        if self.__checker is None and not self.__closed.is_set():
+            self.__checker = threading.Thread(target=self.__check_down, name='orbitdb-health', daemon=True)
+            self.__checker.start()
+
+    def check(self, timeout=5.0):
+        """
+        Check the health of every node now, and put answering nodes back in rotation. Returns stats.
+        """
+        with httpx.Client(timeout=timeout) as session:
+            for node in list(self.__nodes):
+                self.__probe(session, node)
+        return self.stats
+
+    def close(self):
+        """
+        Stop the background health checks.
+        """
+        self.__closed.set()
+
+    def __probe(self, session, node):
+        try:
+            up = session.get(f'{node.url}/{self.__health_path}').status_code not in NODE_FAILURE_STATUSES
+        except httpx.HTTPError:
+            up = False
+        with self.__lock:
+            if up and not node.up: logger.info('OrbitDB API node %s is up again', node.url)
+            if up:
+                node.failures = 0
+                node.down_since = None
+            elif node.up:
+                self.__mark_down(node)
+        return up
+
+    def __check_down(self):
+        with httpx.Client(timeout=self.__health_interval) as session:
+            while not self.__closed.wait(self.__health_interval):
+                with self.__lock:
+                    down = [node for node in self.__nodes if not node.up]
+                for node in down:
+                    self.__probe(session, node)
+                with self.__lock:
+                    if all(node.up for node in self.__nodes):
+                        self.__checker = None
+                        return
+
+
+def node_balancer(config):
+    """
+    Build the node balancer from client configuration options, or None for a single node client.
+    Args:
+        config (dict): Client configuration options.
+            - 'nodes': The base URLs of several API nodes replicating the same databases, the primary one first (list).
+            - 'load_balancing': How reads are spread, 'least_outstanding' or 'latency' (str, default='least_outstanding').
+            - 'write_policy': Where writes go, 'primary' or 'sticky' per database (str, default='primary').
+            - 'node_failures': Consecutive failures that take a node out of rotation (int, default=3).
+            - 'health_interval': Seconds between health checks of nodes out of rotation (float, default=5).
+    """
+    nodes = config.get('nodes')
+    if not nodes: return None
+    return NodeBalancer(
+        nodes, config.get('load_balancing', 'least_outstanding'), config.get('write_policy', 'primary'),
+        config.get('node_failures', 3), config.get('health_interval', 5.0))
+
+
+class _Balanced ():
+    """
+    The request routing shared by BalancedTransport and AsyncBalancedTransport.
+    """
+    def __init__(self, transport, balancer, base_url):
+        self._transport = transport
+        self.balancer = balancer
+        self._base_url = base_url.rstrip('/')
+
+    @property
+    def stats(self):
+        """
+        Returns the pool utilization counters of the wrapped transport, and the node stats under 'nodes'.
+        """
+        return {**self._transport.stats, 'nodes': self.balancer.stats}
+
+    def _path(self, request):
+        """
+        Returns the part of the request URL after the base URL, or None for requests to other URLs.
+        """
+        url = str(request.url)
+        if not url.startswith(self._base_url + '/'): return None
+        return url[len(self._base_url) + 1:]
+
+    @staticmethod
+    def _route(request, node, path):
+        request.url = httpx.URL(f'{node.url}/{path}')
+        request.headers['Host'] = request.url.netloc.decode('ascii')
+
+
+class BalancedTransport (_Balanced, httpx.BaseTransport):
+    """
+    Wraps the transport of a client to send each request to the node chosen by a NodeBalancer.
+    Reads failing to connect are sent to the next node. Other errors, e.g. a read timeout, are raised
+    since the node may have received the request.
+    """
+    def handle_request(self, request):
+        path = self._path(request)
+        if path is None: return self._transport.handle_request(request)
+        tried = []
+        while True:
+            node = self.balancer.pick(request.method, path, tried)
+            if node is None: raise last_error
+            self._route(request, node, path)
+            start = time.perf_counter()
+            try:
+                res = self._transport.handle_request(request)
+            except httpx.TransportError as ex:
+                self.balancer.done(node, failed=True)
+                if request.method not in READ_METHODS or not isinstance(ex, CONNECT_ERRORS): raise
+                tried.append(node)
+                last_error = ex
+                continue
+            except BaseException:
+                self.balancer.done(node)
+                raise
+            self.balancer.done(node, time.perf_counter() - start, res.status_code in NODE_FAILURE_STATUSES)
+            return res
+
+    def close(self):
+        self.balancer.close()
+        self._transport.close()
+
+
+class AsyncBalancedTransport (_Balanced, httpx.AsyncBaseTransport):
+    """
+    The asyncio counterpart of BalancedTransport. Health checks still run in a background thread.
+    """
+    async def handle_async_request(self, request):
+        path = self._path(request)
+        if path is None: return await self._transport.handle_async_request(request)
+        tried = []
+        while True:
+            node = self.balancer.pick(request.method, path, tried)
+            if node is None: raise last_error
+            self._route(request, node, path)
+            start = time.perf_counter()
+            try:
+                res = await self._transport.handle_async_request(request)
+            except httpx.TransportError as ex:
+                self.balancer.done(node, failed=True)
+                if request.method not in READ_METHODS or not isinstance(ex, CONNECT_ERRORS): raise
+                tried.append(node)
+                last_error = ex
+                continue
+            except BaseException:
+                self.balancer.done(node)
+                raise
+            self.balancer.done(node, time.perf_counter() - start, res.status_code in NODE_FAILURE_STATUSES)
+            return res
+
+    async def aclose(self):
+        self.balancer.close()
+        await self._transport.aclose()
@@ -0,0 +1,248 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class Cache ():
+    """
+    An unbounded, thread-safe cache of database entries. This is the default DB cache backend.
+    Subclass it to plug in another backend, see LRUCache.
+    """
+    __slots__ = ('_lock', '_data', '_hits', '_misses', '_evictions', '_expirations')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._data = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.lookup(key, count=False)[0]
+
+    def lookup(self, key, count=True):
+        """
+        Look up a key. Returns a (hit, value) tuple.
+        Args:
+            key (str): The key to look up.
+            count (bool): Whether to count the lookup in the hit/miss stats.
+        """
+        with self._lock:
+            hit = key in self._data
+            if count:
+                if hit: self._hits += 1
+                else: self._misses += 1
+            return hit, self._data.get(key)
+
+    def get(self, key, default=None):
+        """
+        Return the value of a key, or default if it is not cached.
+        """
+        hit, value = self.lookup(key)
+        return value if hit else default
+
+    def set(self, key, value, ttl=None):
+        """
+        Cache a value.
+        Args:
+            key (str): The key to store the value under.
+            value: The value to cache.
+            ttl (float): Ignored by the unbounded cache, see LRUCache.
+        """
+        with self._lock:
+            self._data[key] = value
+
+    def update(self, items, ttl=None):
+        """
+        Cache many values while holding the lock once.
+        Args:
+            items: A mapping or iterable of (key, value) pairs.
+            ttl (float): Passed on to set().
+        """
+        if hasattr(items, 'items'): items = items.items()
+        with self._lock:
+            for key, value in items:
+                self.set(key, value, ttl)
+
+    def remove(self, key):
+        """
+        Remove a key if it is cached.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Remove every cached value. The stats are kept.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def to_dict(self):
+        """
+        Returns a shallow dict copy of the cached values.
+        """
+        with self._lock:
+            return dict(self._data)
+
+    @property
+    def stats(self):
+        """
+        Returns the cache counters as a dict.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._data),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else None,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+            }
+
+
+def json_sizeof(key, value):
+    """
+    Estimate the size of a cache entry in bytes from its JSON encoding.
+    """
+    return len(key) + len(json.dumps(value, default=str))
+
+
+class LRUCache (Cache):
+    """
+    A bounded cache evicting the least recently used entries.
+    Args:
+        max_entries (int): The maximum number of entries, unbounded if None.
+        max_bytes (int): The maximum estimated size of all entries, unbounded if None.
+        ttl (float): The default time to live of an entry in seconds, no expiry if None.
+        sizeof (callable): Estimates the size of a (key, value) pair, defaults to json_sizeof.
+    Example:
+        client.db('mydb', local_options={'cache_backend': LRUCache(max_entries=10000, ttl=300)})
+    """
+    __slots__ = ('__sizes', '__expires', '__bytes', '__max_entries', '__max_bytes', '__ttl', '__sizeof')
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None, sizeof=json_sizeof):
+        super().__init__()
+        self._data = OrderedDict()
+        self.__sizes = {}
+        self.__expires = {}
+        self.__bytes = 0
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        self.__sizeof = sizeof
+
+    @property
+    def max_entries(self):
+        return self.__max_entries
+
+    @property
+    def max_bytes(self):
+        return self.__max_bytes
+
+    @property
+    def ttl(self):
+        return self.__ttl
+
+    def lookup(self, key, count=True):
+        with self._lock:
+            hit = key in self._data
+            if hit and self.__expired(key):
+                self.__drop(key)
+                self._expirations += 1
+                hit = False
+            if count:
+                if hit: self._hits += 1
+                else: self._misses += 1
+            if not hit: return False, None
+            self._data.move_to_end(key)
+            return True, self._data[key]
+
+    def set(self, key, value, ttl=None):
+        if ttl is None: ttl = self.__ttl
+        size = self.__sizeof(key, value) if self.__max_bytes is not None else 0
+        with self._lock:
+            if key in self._data: self.__drop(key)
+            if self.__max_bytes is not None and size > self.__max_bytes:
+                return
+            self._data[key] = value
+            self.__sizes[key] = size
+            self.__bytes += size
+            if ttl is not None: self.__expires[key] = time.monotonic() + ttl
+            self.__evict()
+
+    def remove(self, key):
+        with self._lock:
+            if key in self._data: self.__drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.__sizes.clear()
+            self.__expires.clear()
+            self.__bytes = 0
+
+    def to_dict(self):
+        with self._lock:
+            self.expire()
+            return dict(self._data)
+
+    def expire(self):
+        """
+        Drop every expired entry.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for key in [k for k, t in self.__expires.items() if t <= now]:
+                self.__drop(key)
+                self._expirations += 1
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {**super().stats, 'bytes': self.__bytes}
+
+    def __expired(self, key):
+        expires = self.__expires.get(key)
+        return expires is not None and expires <= time.monotonic()
+
+    def __drop(self, key):
+        del self._data[key]
+        self.__bytes -= self.__sizes.pop(key)
+        self.__expires.pop(key, None)
+
+    def __evict(self):
+        while self._data and (
+                (self.__max_entries is not None and len(self._data) > self.__max_entries) or
+                (self.__max_bytes is not None and self.__bytes > self.__max_bytes)):
+            self.__drop(next(iter(self._data)))
+            self._evictions += 1
+
+
+def make_cache(**kwargs):
+    """
+    Build the cache backend for a DB from its options.
+    Args:
+        **kwargs: DB options.
+            - 'cache_backend': A Cache instance, or a callable returning one. An instance serves a single DB.
+            - 'cache_max_entries', 'cache_max_bytes', 'cache_ttl': Build an LRUCache with these limits.
+    """
+    backend = kwargs.get('cache_backend')
+    if isinstance(backend, Cache):
+        return backend
+    if backend is not None:
+        return backend()
+    limits = {
+        'max_entries': kwargs.get('cache_max_entries'),
+        'max_bytes': kwargs.get('cache_max_bytes'),
+        'ttl': kwargs.get('cache_ttl'),
+    }
+    if any(v is not None for v in limits.values()):
+        return LRUCache(**limits)
+    return Cache()
@@ -1,11 +1,29 @@
 import json
 import logging
-from pprint import pformat
+import threading
+import time
+from contextlib import contextmanager
+from copy import deepcopy
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from urllib.parse import quote as urlquote
 
 import httpx
 
+from .cache import Cache
+from .codec import make_codec
 from .db import DB
+from .handles import DBHandles
+from .metrics import RequestRecord, endpoint_template
+from .resilience import circuit_breaker, latency_tracker, retry_policy
+from .singleflight import AsyncSingleFlight, SingleFlight
+from .transport import make_transport, timeouts
+
+
+def _db_path(endpoint):
+    """
+    Returns the part of an endpoint naming the database, e.g. 'db/<id>' of 'db/<id>/put'.
+    """
+    return '/'.join(endpoint.split('/', 2)[:2])
 
 
 class OrbitDbAPI ():
@@ -20,23 +38,103 @@ class OrbitDbAPI ():
             kwargs (dict): A dictionary of configuration options.
                 - 'base_url': The base URL of the OrbitDB API (str).
                 - 'use_db_cache': Whether to use a cache for database objects (bool, default=True).
+                - 'cache_backend': A callable returning the cache of each DB, e.g. LRUCache. A Cache instance
+                  can only be given in the local_options of a single db(), every DB needs its own.
                 - 'timeout': Timeout for API requests (int, default=30).
+                - 'connect_timeout', 'read_timeout', 'write_timeout', 'pool_timeout': Override a single timeout (float).
+                - 'max_connections', 'max_keepalive_connections', 'keepalive_expiry': Connection pool limits.
+                - 'http2': Use HTTP/2 when the server supports it (bool, default=False). Requires the h2 package.
+                - 'shared_transport': Share one connection pool between every client with the same pool options (bool, default=False).
+                - 'coalesce_requests': Let concurrent identical GET requests share one in-flight call (bool, default=True).
+                  A GET only joins a call started after the writes to the same database completed.
+                - 'reuse_dbs': Return the already opened DB object when db() is called again with the same name
+                  and options, see db() (bool, default=True).
+                - 'db_idle_timeout': Seconds after which an unused DB object is evicted and unloaded (float, default=None, never).
+                - 'hooks': Callables receiving a RequestRecord after every request, see add_hook().
+                - 'json_codec': The JSON library encoding request and decoding response bodies: 'json', 'orjson',
+                  'msgspec', 'auto' (the fastest one installed) or a JSONCodec instance (default='json').
+                - 'retries', 'retry_backoff', 'retry_max_backoff', 'retry_statuses': Retry idempotent calls with
+                  jittered exponential back off, see resilience.retry_policy() (default=0 retries).
+                - 'circuit_breaker', 'breaker_failures', 'breaker_reset_timeout': Fail fast while the API node keeps
+                  failing, see resilience.circuit_breaker() (default=False).
+                - 'hedge_reads', 'hedge_percentile': Send a second GET request when the first one is slower than
+                  the given percentile of recent GETs, see resilience.latency_tracker() (default=False).
+                - 'nodes': Base URLs of several API nodes replicating the same databases, the primary one first.
+                  Reads are spread over the nodes and writes go to the primary, see balancer.node_balancer().
+                  base_url defaults to the primary node.
+                - 'load_balancing', 'write_policy', 'node_failures', 'health_interval': Tune the node balancer.
         Example:
             client = OrbitDbAPI(base_url='http://localhost:3000', use_db_cache=True, timeout=30)
         """
         self.logger = logging.getLogger(__name__)
         self.__config = kwargs
+        if isinstance(self.__config.get('cache_backend'), Cache):
+            raise ValueError('cache_backend must be a callable returning a cache, pass an instance in the local_options of db()')
+        if self.__config.get('nodes'): self.__config.setdefault('base_url', self.__config['nodes'][0])
         self.__base_url = self.__config.get('base_url')
         self.__use_db_cache = self.__config.get('use_db_cache', True)
-        self.__timeout = self.__config.get('timeout', 30)
-        self.__session = httpx.Client()
+        self.__timeout = timeouts(self.__config)
+        self.__coalesce = self.__config.get('coalesce_requests', True)
+        self.__single_flight = (AsyncSingleFlight if self._asynchronous else SingleFlight)()
+        self.__writes = {}
+        self.__writes_lock = threading.Lock()
+        self.__reuse_dbs = self.__config.get('reuse_dbs', True)
+        self.__db_handles = DBHandles(self.__config.get('db_idle_timeout'))
+        self.__db_flight = (AsyncSingleFlight if self._asynchronous else SingleFlight)()
+        self.__hooks = tuple(self.__config.get('hooks', ()))
+        self.__codec = make_codec(self.__config.get('json_codec', 'json'))
+        self.__retry = retry_policy(self.__config)
+        self.__breaker = circuit_breaker(self.__config)
+        self.__hedge = latency_tracker(self.__config)
+        self.__hedge_pool = None
+        self.__transport = None
+        self.__session = None
+        self.__session_lock = threading.RLock()
+        self.__closed = False
         self.logger.debug('Base url: ' + self.__base_url)
 
+    _db_class = DB
+    _asynchronous = False
+
+    def _new_session(self):
+        """
+        Create the HTTP session used by the client.
+        """
+        return httpx.Client(transport=self.transport, timeout=self.__timeout)
+
+    def _detach_session(self):
+        """
+        Mark the client closed and return its session and transport, None for those never created.
+        """
+        with self.__session_lock:
+            self.__closed = True
+            return self.__session, self.__transport
+
+    def close(self):
+        """
+        Close the underlying HTTP session.
+        """
+        session, transport = self._detach_session()
+        if self.__hedge_pool is not None: self.__hedge_pool.shutdown(wait=True, cancel_futures=True)
+        if session is not None: session.close()
+        elif transport is not None: transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @property
     def session(self):
         """
-        Returns the underlying HTTP session used by the client.
+        Returns the underlying HTTP session used by the client, created on first use.
         """
+        if self.__session is None:
+            with self.__session_lock:
+                if self.__session is None:
+                    if self.__closed: raise RuntimeError('The client has been closed')
+                    self.__session = self._new_session()
         return self.__session
 
     @property
@@ -46,6 +144,109 @@ class OrbitDbAPI ():
         """
         return self.__base_url
 
+    @property
+    def timeout(self):
+        """
+        Returns the default timeouts for API requests (httpx.Timeout).
+        """
+        return self.__timeout
+
+    @property
+    def transport(self):
+        """
+        Returns the transport holding the connection pool of the client, created on first use.
+        """
+        if self.__transport is None:
+            with self.__session_lock:
+                if self.__transport is None:
+                    if self.__closed: raise RuntimeError('The client has been closed')
+                    self.__transport = make_transport(self.__config, asynchronous=self._asynchronous)
+        return self.__transport
+
+    @property
+    def coalesce_requests(self):
+        """
+        Returns whether concurrent identical GET requests share one in-flight call.
+        """
+        return self.__coalesce
+
+    @property
+    def single_flight(self):
+        """
+        Returns the SingleFlight deduplicating concurrent identical GET requests.
+        """
+        return self.__single_flight
+
+    @property
+    def coalesce_stats(self):
+        """
+        Returns how many GET requests were made and how many of them were coalesced into another request.
+        """
+        return self.__single_flight.stats
+
+    @property
+    def reuse_dbs(self):
+        """
+        Returns whether db() returns the already opened DB object for the same name and options.
+        """
+        return self.__reuse_dbs
+
+    @property
+    def db_handles(self):
+        """
+        Returns the DBHandles registry of the DB objects opened by db().
+        """
+        return self.__db_handles
+
+    @property
+    def db_flight(self):
+        """
+        Returns the SingleFlight deduplicating concurrent db() calls for the same database and options.
+        """
+        return self.__db_flight
+
+    @property
+    def pool_stats(self):
+        """
+        Returns the connection pool utilization counters, see PooledTransport.stats.
+        """
+        return self.transport.stats
+
+    @property
+    def balancer(self):
+        """
+        Returns the NodeBalancer spreading requests over the 'nodes', or None for a single node client.
+        """
+        return getattr(self.transport, 'balancer', None)
+
+    @property
+    def codec(self):
+        """
+        Returns the JSONCodec encoding request and decoding response bodies.
+        """
+        return self.__codec
+
+    @property
+    def retry_policy(self):
+        """
+        Returns the RetryPolicy of idempotent calls.
+        """
+        return self.__retry
+
+    @property
+    def circuit_breaker(self):
+        """
+        Returns the CircuitBreaker of the base url, or None when it is disabled.
+        """
+        return self.__breaker
+
+    @property
+    def hedge_tracker(self):
+        """
+        Returns the LatencyTracker deciding when to hedge GET requests, or None when hedging is disabled.
+        """
+        return self.__hedge
+
     @property
     def use_db_cache(self):
         """
@@ -55,18 +256,176 @@ class OrbitDbAPI ():
 
     def _do_request(self, *args, **kwargs):
         """
-        Perform a raw request to the OrbitDB API.
+        Perform a raw request to the OrbitDB API, retrying idempotent calls according to the retry policy.
         Args:
             *args: Positional arguments to pass to the session's request() method.
             **kwargs: Keyword arguments to pass to the session's request() method.
+                - 'stream': Return the response with its body unread (bool, default=False). The caller must close it.
         """
-        self.logger.log(15, json.dumps([args, kwargs]))
+        if self.logger.isEnabledFor(15): self.logger.log(15, json.dumps([args, kwargs], default=str))
         kwargs['timeout'] = kwargs.get('timeout', self.__timeout)
+        if 'json' in kwargs: self._encode_json(kwargs)
+        stream = kwargs.pop('stream', False)
+        retry = self._retryable(*args[:2])
+        attempt = 1
+        while True:
+            if self.__breaker is not None: self.__breaker.allow()
+            try:
+                res = self._send(args, kwargs, stream, attempt)
+            except httpx.TransportError:
+                self._record_outcome(None)
+                delay = self._retry_delay(retry, attempt)
+                if delay is None: raise
+            except BaseException:
+                if self.__breaker is not None: self.__breaker.release()
+                raise
+            else:
+                self._record_outcome(res)
+                delay = self._retry_delay(retry, attempt, res)
+                if delay is None: return res
+                res.close()
+            self.logger.warning('Retrying %s %s in %.3f seconds after attempt %d failed', *args[:2], delay, attempt)
+            time.sleep(delay)
+            attempt += 1
+
+    def _send(self, args, kwargs, stream, attempt):
+        if self.__hedge is not None and args[0] == 'GET' and not stream:
+            return self._send_hedged(args, kwargs, attempt)
+        return self._send_once(args, kwargs, stream, attempt)
+
+    def _send_once(self, args, kwargs, stream=False, attempt=1):
+        """
+        Send one request, and report it to the request hooks and the hedging latency tracker.
+        """
+        start = time.perf_counter() if self.__hooks or self.__hedge is not None else None
         try:
-            return self.__session.request(*args, **kwargs)
-        except:
+            session = self.session
+            if stream:
+                res = session.send(session.build_request(*args, **kwargs), stream=True)
+            else:
+                res = session.request(*args, **kwargs)
+        except BaseException as ex:
             self.logger.exception('Exception during api call')
+            if self.__hooks: self._notify_hooks(args, start, error=ex, attempt=attempt)
             raise
+        if start is not None: self._request_done(args, start, res, stream, attempt)
+        return res
+
+    def _send_hedged(self, args, kwargs, attempt):
+        """
+        Send a GET request, and a second one if the first is slower than the hedge delay. Returns the first successful response.
+        The other request can't be interrupted in a thread: it is dropped if it did not start yet, or its response is closed once it arrives.
+        """
+        delay = self.__hedge.threshold()
+        if delay is None: return self._send_once(args, kwargs, False, attempt)
+        if self.__hedge_pool is None:
+            with self.__session_lock:
+                if self.__hedge_pool is None:
+                    if self.__closed: raise RuntimeError('The client has been closed')
+                    self.__hedge_pool = ThreadPoolExecutor(max_workers=self.__config.get('max_connections', 100), thread_name_prefix='orbitdb-hedge')
+        first = self.__hedge_pool.submit(self._send_once, args, kwargs, False, attempt)
+        done, _pending = wait([first], delay)
+        if done: return first.result()
+        second = self.__hedge_pool.submit(self._send_once, args, kwargs, False, attempt)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            won = [future for future in (first, second) if future in done and future.exception() is None]
+            if won:
+                self.__hedge.hedged(won=won[0] is second)
+                for loser in won[1:]: loser.result().close()
+                for loser in pending:
+                    if not loser.cancel(): loser.add_done_callback(self._close_response)
+                return won[0].result()
+        return first.result()
+
+    @staticmethod
+    def _close_response(future):
+        if not future.cancelled() and future.exception() is None: future.result().close()
+
+    def _request_done(self, args, start, res, stream, attempt):
+        if self.__hedge is not None and args[0] == 'GET' and not stream:
+            self.__hedge.record(time.perf_counter() - start)
+        if self.__hooks: self._notify_hooks(args, start, res, stream, attempt=attempt)
+
+    def _retryable(self, method, url):
+        """
+        Returns whether a failed request may be retried.
+        """
+        return self.__retry.retries > 0 and self.__retry.applies(method, endpoint_template(url[len(self.__base_url) + 1:]))
+
+    def _retry_delay(self, retry, attempt, res=None):
+        """
+        Returns the seconds to wait before retrying a failed attempt, or None when the request succeeded or is not retried.
+        Args:
+            retry (bool): Whether the request may be retried.
+            attempt (int): The attempt that finished, starting at 1.
+            res (httpx.Response): Its response, None when it raised an exception.
+        """
+        if not retry or attempt > self.__retry.retries: return None
+        if res is not None and res.status_code not in self.__retry.statuses: return None
+        return self.__retry.delay(attempt, res)
+
+    def _record_outcome(self, res):
+        """
+        Report a finished request to the circuit breaker: 5xx statuses and errors count as failures.
+        """
+        if self.__breaker is None: return
+        if res is not None and res.status_code < 500: self.__breaker.success()
+        else: self.__breaker.failure()
+
+    def _encode_json(self, kwargs):
+        """
+        Replace the 'json' request argument with a body encoded by the client's codec.
+        """
+        kwargs['content'] = self.__codec.dumps(kwargs.pop('json'))
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), 'Content-Type': 'application/json'}
+
+    def add_hook(self, hook):
+        """
+        Register a request hook. After every request it is called with a RequestRecord holding the method,
+        endpoint template, status, latency and body sizes. Without hooks, requests are not timed at all.
+        Args:
+            hook (callable): The hook, e.g. a Metrics instance.
+        """
+        self.__hooks = self.__hooks + (hook,)
+
+    def remove_hook(self, hook):
+        """
+        Unregister a request hook.
+        """
+        self.__hooks = tuple(h for h in self.__hooks if h is not hook)
+
+    @property
+    def hooks(self):
+        """
+        Returns the registered request hooks.
+        """
+        return self.__hooks
+
+    def _notify_hooks(self, args, start, res=None, stream=False, error=None, attempt=1):
+        """
+        Call the request hooks with the RequestRecord of a finished request.
+        Args:
+            args (tuple): The method and url of the request.
+            start (float): time.perf_counter() when the request started.
+            res (httpx.Response): The response, None when the request failed.
+            stream (bool): Whether the response body is still unread.
+            error (Exception): The exception raised by the request.
+            attempt (int): 1 for the first try of a call, 2 and up for retries.
+        """
+        seconds = time.perf_counter() - start
+        method, url = args[:2]
+        record = RequestRecord(
+            method, endpoint_template(url[len(self.__base_url) + 1:]),
+            None if res is None else res.status_code, seconds,
+            None if res is None else int(res.request.headers.get('Content-Length', 0)),
+            None if res is None or stream else res.num_bytes_downloaded, error, attempt)
+        for hook in self.__hooks:
+            try:
+                hook(record)
+            except Exception:
+                self.logger.warning('Request hook failed', exc_info=True)
 
     def _call_raw(self, method, endpoint, **kwargs):
         """
@@ -77,7 +436,11 @@ class OrbitDbAPI ():
             **kwargs: Additional keyword arguments to pass to the request.
         """
         url = '/'.join([self.__base_url, endpoint])
-        return self._do_request(method, url, **kwargs)
+        if method == 'GET': return self._do_request(method, url, **kwargs)
+        try:
+            return self._do_request(method, url, **kwargs)
+        finally:
+            self._wrote(endpoint)
 
     def _call(self, method, endpoint,  **kwargs):
         """
@@ -87,9 +450,71 @@ class OrbitDbAPI ():
             endpoint (str): Endpoint to call.
             **kwargs: Additional keyword arguments to pass to the request.
         """
+        if self._coalescable(method, kwargs):
+            result, leader = self.__single_flight.do(self._flight_key(method, endpoint), lambda: self._call_once(method, endpoint))
+            return result if leader else deepcopy(result)
+        return self._call_once(method, endpoint, **kwargs)
+
+    def _call_once(self, method, endpoint, **kwargs):
         res = self._call_raw(method, endpoint, **kwargs)
+        return self._parse_response(res)
+
+    def _coalescable(self, method, kwargs):
+        """
+        Returns whether a call may share the result of an identical call in flight: a GET without a body or options.
+        """
+        return self.__coalesce and method == 'GET' and not kwargs
+
+    def _flight_key(self, method, endpoint):
+        """
+        Returns the key of a coalescable call. It includes the number of completed writes to the database,
+        so that a GET made after a write only joins a call started after that write completed.
+        """
+        return (method, endpoint, self.__writes.get(_db_path(endpoint), 0))
+
+    def _wrote(self, endpoint):
+        """
+        Count a completed request that may have changed a database, see _flight_key().
+        """
+        db_path = _db_path(endpoint)
+        with self.__writes_lock:
+            self.__writes[db_path] = self.__writes.get(db_path, 0) + 1
+
+    @contextmanager
+    def _stream(self, method, endpoint, **kwargs):
+        """
+        Perform a streaming API call, yielding the response with its body unread.
+        The response is closed when the context exits, also when its body was not fully read.
+        Args:
+            method (str): HTTP method to use.
+            endpoint (str): Endpoint to call.
+            **kwargs: Additional keyword arguments to pass to the request.
+        """
+        res = self._call_raw(method, endpoint, stream=True, **kwargs)
+        try:
+            self._raise_for_stream(res)
+            yield res
+        finally:
+            res.close()
+
+    def _raise_for_stream(self, res):
+        """
+        Raise for an error status of a streamed response, reading and logging its body first.
+        Args:
+            res (httpx.Response): The streamed response.
+        """
+        if res.is_error:
+            res.read()
+            self._parse_response(res)
+
+    def _parse_response(self, res):
+        """
+        Parse the JSON body of a response and raise for error statuses.
+        Args:
+            res (httpx.Response): The response to parse.
+        """
         try:
-            result = res.json()
+            result = self.__codec.loads(res.content)
         except:
             self.logger.warning('Json decode error', exc_info=True)
             self.logger.log(15, res.text)
@@ -97,6 +522,7 @@ class OrbitDbAPI ():
         try:
             res.raise_for_status()
         except:
+            from pprint import pformat
             self.logger.exception('Server Error')
             self.logger.error(pformat(result))
             raise
@@ -111,6 +537,10 @@ class OrbitDbAPI ():
     def db(self, dbname, local_options=None, **kwargs):
         """
         Open a database by name and return a DB object.
+        Repeated calls with the same name or address and options return the same DB object,
+        and concurrent calls open the database once, unless 'reuse_dbs' is off.
+        With the 'snapshot' option, the new DB object is warmed up from its snapshot before db() returns,
+        see DB.warm_start(). Pass local_options={'snapshot': None} to open a database without it.
         Args:
             dbname (str): The name of the database to open.
             local_options (dict): A dictionary of options to pass to the DB object.
@@ -118,9 +548,73 @@ class OrbitDbAPI ():
         Example:
             client = OrbitDbAPI()
             mydb = client.db("mydbname")
+            assert client.db("mydbname") is mydb
+        """
+        self._evict_idle_dbs_later()
+        if not self.__reuse_dbs:
+            return self._open_handle(dbname, local_options, kwargs)
+        key = self.__db_handles.key(dbname, local_options, kwargs)
+        db = self.__db_handles.get(key)
+        if db is None:
+            db, _leader = self.__db_flight.do(key, lambda: self._open_handle(dbname, local_options, kwargs, key))
+        return db
+
+    def _open_handle(self, dbname, local_options, kwargs, key=None):
+        """
+        Open a database and return a new DB object, warmed up from its snapshot if it has one.
+        """
+        db = self._make_db(self.open_db(dbname, **kwargs), local_options)
+        if db.snapshot is not None: db.warm_start()
+        if key is not None: self._register_db(db, key, local_options, kwargs)
+        return db
+
+    def _register_db(self, db, key, local_options, kwargs):
+        """
+        Register a newly opened DB object under the requested key and under its address.
+        """
+        self.__db_handles.add(db, key, self.__db_handles.key(db.id, local_options, kwargs))
+
+    def _forget_db(self, db):
+        """
+        Remove an unloaded DB object from the registry, so the next db() call opens the database again.
+        """
+        self.__db_handles.remove(db)
+
+    def evict_idle_dbs(self, timeout=None):
+        """
+        Unload and forget the DB objects that were not used for longer than 'db_idle_timeout' seconds.
+        Returns the evicted DB objects. db() also forgets the idle DB objects before opening a database,
+        and unloads them in a background thread.
+        Args:
+            timeout (float): Overrides the 'db_idle_timeout' option.
+        """
+        evicted = self.__db_handles.idle(timeout)
+        self._unload_dbs(evicted)
+        return evicted
+
+    def _evict_idle_dbs_later(self):
+        """
+        Forget the idle DB objects and unload them in the background, keeping the round trips off db().
+        """
+        evicted = self.__db_handles.idle()
+        if evicted: threading.Thread(target=self._unload_dbs, args=(evicted,), name='evict idle dbs', daemon=True).start()
+
+    def _unload_dbs(self, dbs):
+        for db in dbs:
+            try:
+                db.unload()
+            except Exception:
+                self.logger.warning('Failed to unload idle db %s', db.id, exc_info=True)
+
+    def _make_db(self, params, local_options=None):
+        """
+        Construct a DB object from the parameters returned by open_db().
+        Args:
+            params (dict): The raw JSON response of open_db().
+            local_options (dict): A dictionary of options to pass to the DB object.
         """
         if local_options is None: local_options = {}
-        return DB(self, self.open_db(dbname, **kwargs), **{**self.__config, **local_options})
+        return self._db_class(self, params, **{**self.__config, **local_options})
 
     def open_db(self, dbname, **kwargs):
         """
@@ -0,0 +1,91 @@
+import json
+
+
+class JSONCodec ():
+    """
+    Encodes request bodies and decodes response bodies with the standard library json module.
+    Subclass it to plug in another JSON library, see OrjsonCodec and MsgspecCodec.
+    """
+    name = 'json'
+
+    def dumps(self, obj):
+        """
+        Serialize obj to UTF-8 encoded JSON bytes.
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        """
+        Deserialize JSON from bytes or str.
+        Raises ValueError if data is not valid JSON.
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec (JSONCodec):
+    """
+    A JSONCodec using orjson, which decodes straight from the response bytes. Requires the orjson package.
+    Unlike JSONCodec it encodes NaN and infinities as null, and rejects integers beyond 64 bits.
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self.__orjson = orjson
+        self.__options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj):
+        return self.__orjson.dumps(obj, option=self.__options)
+
+    def loads(self, data):
+        return self.__orjson.loads(data)
+
+
+class MsgspecCodec (JSONCodec):
+    """
+    A JSONCodec using msgspec, which decodes straight from the response bytes. Requires the msgspec package.
+    Unlike JSONCodec it encodes NaN and infinities as null.
+    """
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        self.__encoder = msgspec.json.Encoder()
+        self.__decoder = msgspec.json.Decoder()
+        self.__error = msgspec.DecodeError
+
+    def dumps(self, obj):
+        return self.__encoder.encode(obj)
+
+    def loads(self, data):
+        try:
+            return self.__decoder.decode(data)
+        except self.__error as ex:
+            raise ValueError(str(ex)) from ex
+
+
+CODECS = {'orjson': OrjsonCodec, 'msgspec': MsgspecCodec, 'json': JSONCodec}
+
+
+def make_codec(codec='json'):
+    """
+    Returns the JSONCodec for the 'json_codec' client option.
+    Args:
+        codec (str or JSONCodec): 'json', 'orjson' and 'msgspec' pick a backend, 'auto' picks the first of
+            orjson, msgspec and json that is installed, a JSONCodec instance is used as is.
+            The backends differ on values plain JSON can't hold, see OrjsonCodec and MsgspecCodec.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == 'auto':
+        for name in CODECS:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+    if codec not in CODECS:
+        raise ValueError(f'Unknown JSON codec {codec!r}, expected one of auto, {", ".join(CODECS)}')
+    try:
+        return CODECS[codec]()
+    except ImportError:
+        raise ImportError(f'The {codec} JSON codec requires the {codec} package, run "pip install orbitdbapi[{codec}]"') from None
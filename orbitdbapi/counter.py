@@ -0,0 +1,318 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+_open_counters = weakref.WeakSet()
+
+
+def _close_counters():
+    """
+    Send the pending deltas of the AggregatingCounters still open at interpreter exit.
+    """
+    for counter in list(_open_counters):
+        try:
+            counter.close()
+        except Exception:
+            logger.error(f'Could not send the pending delta of {counter._db.dbname}', exc_info=True)
+
+
+atexit.register(_close_counters)
+
+
+def _wake(changed):
+    with changed:
+        changed.notify_all()
+
+
+class _CounterAggregation ():
+    """
+    The aggregation state shared by AggregatingCounter and AsyncAggregatingCounter. Not thread-safe, callers hold their lock.
+    """
+    def __init__(self, db, max_batch=1000, max_delay=1.0):
+        if max_batch < 1: raise ValueError('max_batch must be at least 1')
+        db._require('inc')
+        self.logger = logging.getLogger(__name__)
+        self._db = db
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._pending = 0
+        self._pending_calls = 0
+        self._first_at = None
+        self._retry_at = None
+        self._in_flight = 0
+        self._base = None
+        self._sent = 0
+        self._closed = False
+        self._stats = {'incs': 0, 'requests': 0, 'sent': 0, 'failed': 0}
+
+    @property
+    def stats(self):
+        """
+        Returns the counters of the aggregator: inc() calls, requests made, increments sent, failed requests,
+        and the delta and inc() calls pending.
+        """
+        return {**self._stats, 'pending': self._pending, 'pending_calls': self._pending_calls}
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _check_open(self):
+        if self._closed: raise RuntimeError('The aggregating counter is closed')
+
+    def _add(self, val):
+        """
+        Add an increment to the pending delta. Returns whether the first pending increment or a full batch is due for a wake-up.
+        """
+        self._db._touch()
+        if self._first_at is None: self._first_at = time.monotonic()
+        self._pending += val
+        self._pending_calls += 1
+        self._stats['incs'] += 1
+        return self._pending_calls == 1 or self._pending_calls == self._max_batch
+
+    def _wait_time(self):
+        """
+        Returns 0 when the pending delta is due, the seconds until it is due, or None when nothing is pending.
+        A failed request holds back the next one for max_delay seconds.
+        """
+        if not self._pending_calls: return None
+        now = time.monotonic()
+        due = now if self._pending_calls >= self._max_batch else self._first_at + self._max_delay
+        if self._retry_at is not None: due = max(due, self._retry_at)
+        return max(0, due - now)
+
+    def _take(self):
+        """
+        Move the pending delta in flight. Returns the delta and the number of inc() calls it sums.
+        """
+        delta, calls = self._pending, self._pending_calls
+        self._in_flight = delta
+        self._pending = 0
+        self._pending_calls = 0
+        self._first_at = None
+        return delta, calls
+
+    def _sent_ok(self, delta):
+        self._in_flight = 0
+        self._sent += delta
+        self._retry_at = None
+        if delta:
+            self._stats['requests'] += 1
+            self._stats['sent'] += delta
+
+    def _send_failed(self, delta, calls):
+        """
+        Put the delta of a failed request back, to be sent with the next one.
+        """
+        self._in_flight = 0
+        self._pending += delta
+        self._pending_calls += calls
+        self._first_at = time.monotonic()
+        self._retry_at = self._first_at + self._max_delay
+        self._stats['failed'] += 1
+
+    def _refreshed(self, value):
+        self._base = value
+        self._sent = 0
+
+    def _value(self):
+        return self._base + self._sent + self._in_flight + self._pending
+
+
+class AggregatingCounter (_CounterAggregation):
+    """
+    Coalesces the increments of a counter database into few requests: inc() adds to a local delta and
+    returns at once, while a background thread sends the delta as a single DB.inc() once max_batch
+    inc() calls are pending or the oldest one waited max_delay seconds. value() stays consistent with
+    the local increments. The pending delta is sent by flush(), close(), DB.unload() and at interpreter exit.
+    A failed request keeps its delta pending for the next one: if the server applied a request whose
+    response was lost, its delta is counted twice.
+    Create it with DB.aggregating_counter().
+    Example:
+        counter = client.db('requests', json={'create': True, 'type': 'counter'}).aggregating_counter()
+        for request in requests:
+            counter.inc()
+        print(counter.value())
+    """
+    def __init__(self, db, **kwargs):
+        """
+        Args:
+            db (DB): The counter to increment.
+            max_batch (int): Send the delta without waiting once this many inc() calls are pending (default=1000).
+            max_delay (float): Seconds an increment may wait for its request (default=1).
+        """
+        super().__init__(db, **kwargs)
+        self.__changed = threading.Condition()
+        self.__sending = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, args=(weakref.ref(self), self.__changed),
+                                         name=f'counter {db.dbname}', daemon=True)
+        self.__thread.start()
+        weakref.finalize(self, _wake, self.__changed)
+        _open_counters.add(self)
+
+    def inc(self, val=1):
+        """
+        Add val to the counter.
+        """
+        val = int(val)
+        with self.__changed:
+            self._check_open()
+            if self._add(val): self.__changed.notify_all()
+
+    def value(self, refresh=False):
+        """
+        Returns the value read from the server plus the increments made since, sent or pending.
+        The server value is read on first use, and again with refresh=True to see the increments of other writers.
+        """
+        if refresh or self._base is None:
+            with self.__sending:
+                value = self._db.value()
+                with self.__changed:
+                    self._refreshed(value)
+        with self.__changed:
+            return self._value()
+
+    def flush(self):
+        """
+        Send the pending delta now and wait for the request. Raises the error of a failed request,
+        whose delta stays pending.
+        """
+        self.__send()
+
+    def close(self):
+        """
+        Stop accepting increments, stop the background thread and send the pending delta.
+        """
+        with self.__changed:
+            self._closed = True
+            self.__changed.notify_all()
+        _open_counters.discard(self)
+        self.__thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def __run(ref, changed):
+        """
+        Send the pending delta when it is due. The counter is only held while a delta is pending,
+        so that a counter nobody uses any more can be garbage collected, which wakes the thread to end.
+        """
+        while True:
+            with changed:
+                counter = ref()
+                if counter is None or counter._closed: return
+                delay = counter._wait_time()
+                if delay != 0:
+                    if delay is None: counter = None
+                    changed.wait(delay)
+                    continue
+            try:
+                counter.__send()
+            except Exception:
+                counter.logger.warning(f'Incrementing {counter._db.dbname} failed, retrying in {counter._max_delay} seconds', exc_info=True)
+
+    def __send(self):
+        with self.__sending:
+            with self.__changed:
+                delta, calls = self._take()
+            try:
+                if delta: self._db.inc(delta)
+            except BaseException:
+                with self.__changed:
+                    self._send_failed(delta, calls)
+                    self.__changed.notify_all()
+                raise
+            with self.__changed:
+                self._sent_ok(delta)
+
+
+class AsyncAggregatingCounter (_CounterAggregation):
+    """
+    The asyncio counterpart of AggregatingCounter: the delta is sent by a task. There is no flush at
+    interpreter exit, close the counter or unload its AsyncDB before the event loop ends.
+    Create it with AsyncDB.aggregating_counter() from a running event loop.
+    """
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.__changed = asyncio.Condition()
+        self.__sending = asyncio.Lock()
+        self.__task = asyncio.get_running_loop().create_task(self.__run())
+
+    async def inc(self, val=1):
+        """
+        Add val to the counter, see AggregatingCounter.inc().
+        """
+        val = int(val)
+        async with self.__changed:
+            self._check_open()
+            if self._add(val): self.__changed.notify_all()
+
+    async def value(self, refresh=False):
+        """
+        Returns the value read from the server plus the increments made since, see AggregatingCounter.value().
+        """
+        if refresh or self._base is None:
+            async with self.__sending:
+                self._refreshed(await self._db.value())
+        return self._value()
+
+    async def flush(self):
+        """
+        Send the pending delta now and wait for the request, see AggregatingCounter.flush().
+        """
+        await self.__send()
+
+    async def close(self):
+        """
+        Stop accepting increments, stop the task and send the pending delta.
+        """
+        async with self.__changed:
+            self._closed = True
+            self.__changed.notify_all()
+        await asyncio.wait([self.__task])
+        await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def __run(self):
+        while True:
+            async with self.__changed:
+                delay = self._wait_time()
+                while delay != 0:
+                    if self._closed: return
+                    try:
+                        await asyncio.wait_for(self.__changed.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    delay = self._wait_time()
+                if self._closed: return
+            try:
+                await self.__send()
+            except Exception:
+                self.logger.warning(f'Incrementing {self._db.dbname} failed, retrying in {self._max_delay} seconds', exc_info=True)
+
+    async def __send(self):
+        async with self.__sending:
+            delta, calls = self._take()
+            try:
+                if delta: await self._db.inc(delta)
+            except BaseException:
+                async with self.__changed:
+                    self._send_failed(delta, calls)
+                    self.__changed.notify_all()
+                raise
+            self._sent_ok(delta)
@@ -1,16 +1,75 @@
 import json
 import logging
-from collections.abc import Hashable, Iterable
+import sys
+import time
+from collections import deque
+from collections.abc import Hashable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+from importlib import import_module
+from types import MappingProxyType
 from urllib.parse import quote as urlquote
 
-from sseclient import SSEClient
+from .cache import make_cache
+from .entry import Entry
+from .frozen import freeze, thaw
+
+SHARED_PARAMS = ('type', 'options', 'capabilities', 'write')
+MAX_SHARED_PARAMS = 1024
+
+_capability_sets = {}
+_shared_params = {}
+
+
+def capability_set(capabilities):
+    """
+    Returns the capabilities of a database as a frozenset, the same object for every handle with
+    the same capabilities list.
+    Args:
+        capabilities (list): The 'capabilities' parameter of an opened database.
+    """
+    key = tuple(capabilities)
+    caps = _capability_sets.get(key)
+    if caps is None:
+        caps = _capability_sets.setdefault(key, frozenset(sys.intern(c) for c in key))
+    return caps
+
+
+def compact_params(params, immutable=False):
+    """
+    Returns the params a DB handle keeps: frozen with 'immutable_reads', and with the SHARED_PARAMS values
+    replaced by the equal value of an earlier handle, so that handles of the same type share them.
+    Handles copy these values before handing them out, which makes sharing them safe. At most
+    MAX_SHARED_PARAMS distinct values are shared.
+    Args:
+        params (dict): The raw JSON response of open_db().
+        immutable (bool): Whether the handle uses 'immutable_reads'.
+    """
+    compact = dict(freeze(params) if immutable else params)
+    for name in SHARED_PARAMS:
+        if name not in compact: continue
+        key = (name, immutable, repr(compact[name]))
+        value = _shared_params.get(key)
+        if value is None and len(_shared_params) < MAX_SHARED_PARAMS:
+            value = _shared_params.setdefault(key, compact[name])
+        if value is not None: compact[name] = value
+    return MappingProxyType(compact) if immutable else compact
 
 
 class DB ():
     """ 
     A class for interacting with a specific OrbitDB database.
+    Handles keep their state in slots and share their capability set with the handles of the same
+    type, so that many open handles stay small.
     """
+    __slots__ = (
+        '__immutable', '__cache', '__client', '__params', '__capabilities', '__dbname', '__id', '__id_safe',
+        '__type', '__use_cache', '__enforce_caps', '__enforce_indexby', '__index_by', '__indexed', '__watcher',
+        '__write_buffer', '__aggregator', '__snapshot', '__snapshot_max_age', '__last_used', '__typed_entries', '__known_size',
+        '__weakref__',
+    )
+    logger = logging.getLogger(__name__)
+
     def __init__(self, client, params, **kwargs):
         """
         Initialize a DB object.
@@ -21,28 +80,165 @@ class DB ():
             - 'use_db_cache': Whether to use a cache for database objects (bool, default=True).
             - 'enforce_caps': Whether to enforce the presence of capabilities in the database (bool, default=True).
             - 'enforce_indexby': Whether to enforce the presence of an indexBy option in the database (bool, default=True).
+            - 'cache_backend': A Cache instance, or a callable returning one, to hold cached entries (default: unbounded Cache).
+              The instance must not be shared with another DB.
+            - 'cache_max_entries', 'cache_max_bytes', 'cache_ttl': Use an LRUCache bounded by these limits.
+            - 'immutable_reads': Keep cached entries and params frozen (read-only mappings and tuples) and
+              return them without copying (bool, default=False). Pass mutable=True to get() for a mutable copy.
+            - 'watch_cache': Follow the write and replicated events of the database and invalidate
+              cached entries as they change (bool, default=False). See watch_cache().
+            - 'snapshot': A Snapshot, or the path of its sqlite file, to warm the cache up from when the
+              client opens the database. db() returns after the warm up, see warm_start().
+            - 'snapshot_max_age': Seconds a snapshot without a head hash is trusted, see warm_start().
+              Without it, those snapshots are rebuilt with all() on every warm up.
+            - 'typed_entries': Return the entries of iterator_raw(), iterator_raw_stream() and scan()
+              as Entry objects instead of nested dicts (bool, default=False).
         """
-        self.__cache = {}
+        self.__immutable = kwargs.get('immutable_reads', False)
+        self.__cache = make_cache(**kwargs)
         self.__client = client
-        self.__params = params
-        self.__db_options = params.get('options', {})
+        self.__params = compact_params(params, self.__immutable)
+        self.__capabilities = capability_set(params.get('capabilities', ()))
         self.__dbname = params['dbname']
         self.__id = params['id']
         self.__id_safe = urlquote(self.__id, safe='')
-        self.__type = params['type']
+        self.__type = self.__params['type']
         self.__use_cache = kwargs.get('use_db_cache', client.use_db_cache)
         self.__enforce_caps = kwargs.get('enforce_caps', True)
         self.__enforce_indexby = kwargs.get('enforce_indexby', True)
 
-        self.logger = logging.getLogger(__name__)
-        self.__index_by = self.__db_options.get('indexBy')
+        options = params.get('options', {})
+        self.__index_by = options.get('indexBy')
+        self.__indexed = 'indexBy' in options
+        self.__watcher = None
+        self.__write_buffer = None
+        self.__aggregator = None
+        self.__snapshot = kwargs.get('snapshot')
+        self.__snapshot_max_age = kwargs.get('snapshot_max_age')
+        self.__last_used = time.monotonic()
+        self.__typed_entries = kwargs.get('typed_entries', False)
+        self.__known_size = None
+        if kwargs.get('watch_cache', False): self.watch_cache()
+
+    # The feature classes as (module, name). They are imported on first use, like Snapshot in
+    # _snapshot_config, so that opening a database does not import the features it never uses.
+    _invalidator_class = ('invalidation', 'CacheInvalidator')
+    _write_behind_class = ('writebehind', 'WriteBehind')
+    _aggregator_class = ('counter', 'AggregatingCounter')
+    _replica_class = ('replica', 'Replica')
+
+    @staticmethod
+    def _feature_class(feature):
+        module, name = feature
+        return getattr(import_module(f'.{module}', __package__), name)
+
+    def watch_cache(self, events=('write', 'replicated'), refresh=False, reconnect_delay=1.0):
+        """
+        Start following the events of the database in the background to keep the cache in sync
+        with writes from other clients and replication. Returns the running CacheInvalidator.
+        Args:
+            events (tuple): The events to follow. 'write' and 'replicate.progress' invalidate single
+                keys, any other event clears the cache.
+            refresh (bool): Fetch the new value of an invalidated key right away.
+            reconnect_delay (float): Seconds to wait before reopening a dropped event stream.
+        """
+        if self.__watcher is not None and self.__watcher.running:
+            return self.__watcher
+        self.__watcher = self._feature_class(self._invalidator_class)(self, events, refresh, reconnect_delay).start()
+        return self.__watcher
+
+    def unwatch_cache(self):
+        """
+        Stop following the events of the database.
+        """
+        watcher = self._detach_watcher()
+        if watcher is not None: watcher.stop()
+
+    def _detach_watcher(self):
+        watcher, self.__watcher = self.__watcher, None
+        return watcher
+
+    @property
+    def cache_watcher(self):
+        """
+        Returns the CacheInvalidator following the events of the database, or None.
+        """
+        return self.__watcher
+
+    def write_behind(self, **kwargs):
+        """
+        Returns the write-behind buffer of the database, creating it on first use. Its add() queues an entry
+        and returns a Future of the entry hash at once, while a background thread sends the queued entries
+        in batches. unload() closes it after sending what is queued.
+        Args:
+            **kwargs: Options of a new buffer, see WriteBehind: max_batch, max_delay, max_pending, policy, concurrency, cache.
+        Example:
+            buffer = mydb.write_behind(max_batch=200, max_delay=0.1, policy='drop_oldest')
+            futures = [buffer.add({'value': reading}) for reading in readings]
+            buffer.flush()
+        """
+        if self.__write_buffer is None or self.__write_buffer.closed:
+            self.__write_buffer = self._feature_class(self._write_behind_class)(self, **kwargs)
+        return self.__write_buffer
+
+    def _detach_write_buffer(self):
+        write_buffer, self.__write_buffer = self.__write_buffer, None
+        return write_buffer
+
+    @property
+    def write_buffer(self):
+        """
+        Returns the write-behind buffer of the database, or None.
+        """
+        return self.__write_buffer
+
+    def aggregating_counter(self, **kwargs):
+        """
+        Returns the aggregating counter of the counter database, creating it on first use. Its inc() adds
+        to a local delta and returns at once, while a background thread sends the delta as one inc()
+        request per interval or batch of calls. unload() closes it after sending the pending delta.
+        Args:
+            **kwargs: Options of a new counter, see AggregatingCounter: max_batch, max_delay.
+        Example:
+            counter = mydb.aggregating_counter(max_batch=10000, max_delay=5)
+            counter.inc()
+            print(counter.value())
+        """
+        if self.__aggregator is None or self.__aggregator.closed:
+            self.__aggregator = self._feature_class(self._aggregator_class)(self, **kwargs)
+        return self.__aggregator
+
+    def _detach_aggregator(self):
+        aggregator, self.__aggregator = self.__aggregator, None
+        return aggregator
+
+    @property
+    def aggregator(self):
+        """
+        Returns the aggregating counter of the database, or None.
+        """
+        return self.__aggregator
+
+    def replica(self, path, fsync=False):
+        """
+        Open an incremental local replica of the feed or eventlog in an append-only file, see Replica.
+        Its sync() fetches only the entries newer than the local head.
+        Args:
+            path (str): The log file, created if missing.
+            fsync (bool): Force every sync to disk before returning.
+        Example:
+            replica = mydb.replica('/var/lib/app/events.log')
+            replica.sync()
+            entry = replica.get(entry_hash)
+        """
+        return self._feature_class(self._replica_class)(self, path, fsync)
 
 
     def clear_cache(self):
         """
         Clear the cache of the database.
         """
-        self.__cache = {}
+        self.__cache.clear()
 
     def cache_get(self, item):
         """
@@ -51,7 +247,8 @@ class DB ():
         item: The item to retrieve from the cache.
         """
         item = str(item)
-        return deepcopy(self.__cache.get(item))
+        self._touch()
+        return self._copy(self.__cache.lookup(item, count=False)[1])
 
     def cache_remove(self, item):
         """
@@ -60,8 +257,14 @@ class DB ():
         item: The item to remove from the cache.
         """
         item = str(item)
-        if item in self.__cache:
-            del self.__cache[item]
+        self.__cache.remove(item)
+
+    @property
+    def client(self):
+        """
+        Returns the client used to interact with the API.
+        """
+        return self.__client
 
     @property
     def cached(self):
@@ -70,6 +273,27 @@ class DB ():
         """
         return self.__use_cache
 
+    @property
+    def typed_entries(self):
+        """
+        Returns whether raw iterator entries are returned as Entry objects.
+        """
+        return self.__typed_entries
+
+    def _entries(self, entries):
+        """
+        Convert decoded raw entries to Entry objects if 'typed_entries' is set.
+        """
+        return [Entry.from_dict(entry) for entry in entries] if self.__typed_entries else entries
+
+    @property
+    def last_used(self):
+        """
+        Returns the time.monotonic() timestamp of the last use of this database object: an API call, a cache read,
+        or an increment or entry queued to its aggregating counter or write-behind buffer.
+        """
+        return self.__last_used
+
     @property
     def index_by(self):
         """
@@ -82,14 +306,29 @@ class DB ():
         """
         Returns the cache of the database.
         """
-        return deepcopy(self.__cache)
+        if self.__immutable: return MappingProxyType(self.__cache.to_dict())
+        return deepcopy(self.__cache.to_dict())
+
+    @property
+    def cache_backend(self):
+        """
+        Returns the cache backend of the database.
+        """
+        return self.__cache
+
+    @property
+    def cache_stats(self):
+        """
+        Returns the hit, miss and eviction counters of the cache.
+        """
+        return self.__cache.stats
 
     @property
     def params(self):
         """
         Returns the parameters of the database.
         """
-        return deepcopy(self.__params)
+        return self._copy(self.__params)
 
     @property
     def dbname(self):
@@ -117,57 +356,57 @@ class DB ():
         """
         Returns the capabilities of the database.
         """
-        return deepcopy(self.__params.get('capabilities', []))
+        return self._copy(self.__params.get('capabilities', []))
 
     @property
     def queryable(self):
         """
         Returns whether the database is queryable.
         """
-        return 'query' in self.__params.get('capabilities', [])
+        return 'query' in self.__capabilities
 
     @property
     def putable(self):
         """
         Returns whether the database is putable.
         """
-        return 'put' in self.__params.get('capabilities', [])
+        return 'put' in self.__capabilities
 
     @property
     def removeable(self):
         """
         Returns whether the database is removeable.
         """
-        return 'remove' in self.__params.get('capabilities', [])
+        return 'remove' in self.__capabilities
 
     @property
     def iterable(self):
         """
         Returns whether the database is iterable.
         """
-        return 'iterator' in self.__params.get('capabilities', [])
+        return 'iterator' in self.__capabilities
 
     @property
     def addable(self):
         """
         Returns whether the database is addable.
         """
-        return 'add' in self.__params.get('capabilities', [])
+        return 'add' in self.__capabilities
 
     @property
     def valuable(self):
         """
         Returns whether the database is valuable.
         """
-        return 'value' in self.__params.get('capabilities', [])
+        return 'value' in self.__capabilities
 
     @property
     def incrementable(self):
-        return 'inc' in self.__params.get('capabilities', [])
+        return 'inc' in self.__capabilities
 
     @property
     def indexed(self):
-        return 'indexBy' in self.__db_options
+        return self.__indexed
 
     @property
     def can_append(self):
@@ -175,21 +414,238 @@ class DB ():
 
     @property
     def write_access(self):
-        return deepcopy(self.__params.get('write'))
+        return self._copy(self.__params.get('write'))
 
-    def info(self):
-        endpoint = '/'.join(['db', self.__id_safe])
-        return self.__client._call('GET', endpoint)
+    @property
+    def immutable_reads(self):
+        """
+        Returns whether cached entries are frozen and returned without copying.
+        """
+        return self.__immutable
 
-    def get(self, item, cache=None, unpack=False):
-        if cache is None: cache = self.__use_cache
-        item = str(item)
-        if cache and item in self.__cache:
-            result = self.__cache[item]
+    def _endpoint(self, *parts):
+        """
+        Build an endpoint path below this database.
+        Args:
+            *parts: Path segments to append after the database id.
+        """
+        self._touch()
+        return '/'.join(['db', self.__id_safe, *parts])
+
+    def _remote_write(self):
+        """
+        Note a write of another client seen in the database events, so that later GET requests
+        don't share a call started before it.
+        """
+        self.__client._wrote('/'.join(['db', self.__id_safe]))
+
+    def _touch(self):
+        """
+        Mark the database object as used now, see last_used.
+        """
+        self.__last_used = time.monotonic()
+
+    def _require(self, capability):
+        """
+        Raise a CapabilityError if the database lacks a capability and caps are enforced.
+        Args:
+            capability (str): The capability name, e.g. 'put'.
+        """
+        if self.__enforce_caps and capability not in self.__capabilities:
+            raise CapabilityError(f'Db {self.__dbname} does not have {capability} capability')
+
+    def _check_put(self, item):
+        """
+        Validate a document before it is put.
+        Args:
+            item (dict): The document to validate.
+        """
+        self._require('put')
+        if self.__indexed and (not self.__index_by in item) and self.__enforce_indexby:
+            raise MissingIndexError(f"The provided document {item} doesn't contain field '{self.__index_by}'")
+
+    def _cache_lookup(self, item, cache):
+        """
+        Look up a key in the cache. Returns a (hit, result) tuple.
+        """
+        self._touch()
+        if cache:
+            return self.__cache.lookup(item)
+        return False, None
+
+    def _cache_store(self, item, result, cache):
+        """
+        Store a fetched result in the cache. Returns the stored value.
+        """
+        if not cache: return result
+        result = self._frozen(result)
+        self.__cache.set(item, result)
+        return result
+
+    def _put_cache_key(self, item, entry_hash):
+        """
+        Returns the key a put document is cached under: its index value, or the entry hash if it has none.
+        """
+        if self.__indexed and hasattr(item, self.__index_by):
+                index_val = getattr(item, self.__index_by)
         else:
-            endpoint = '/'.join(['db', self.__id_safe, item])
-            result = self.__client._call('GET', endpoint)
-            if cache: self.__cache[item] = result
+            index_val = item.get('key')
+        return index_val or entry_hash
+
+    @staticmethod
+    def _add_cache_key(item, entry_hash):
+        """
+        Returns the key an added entry is cached under: its entry hash.
+        """
+        return entry_hash
+
+    def _cache_put(self, item, entry_hash, cache):
+        """
+        Cache a document that has been put.
+        """
+        key = self._put_cache_key(item, entry_hash)
+        if cache and key: self.__cache.set(key, self._frozen(item))
+
+    def _cache_add(self, item, entry_hash, cache):
+        """
+        Cache an entry that has been added, under its entry hash.
+        """
+        if cache and entry_hash: self.__cache.set(entry_hash, self._frozen(item))
+
+    def _cache_all(self, result):
+        """
+        Replace the cache with the result of all() if it maps keys to values.
+        Returns the cached values, or None if nothing was cached.
+        """
+        if isinstance(result, Mapping): self.__known_size = len(result)
+        if self.__use_cache and isinstance(result, Mapping):
+            frozen = {k: self._frozen(v) for k, v in result.items()}
+            self.__cache.clear()
+            self.__cache.update(frozen)
+            return frozen
+
+    def _cache_load(self, items):
+        """
+        Fill the cache with (key, value) pairs, e.g. from a snapshot.
+        """
+        self.__cache.update((key, self._frozen(value)) for key, value in items)
+
+    @staticmethod
+    def _entry_items(entries):
+        """
+        Returns the (hash, value) pairs of raw feed or eventlog entries, as add() caches them.
+        """
+        return [(e['hash'], e.get('payload', {}).get('value')) for e in entries if 'hash' in e]
+
+    @property
+    def snapshot(self):
+        """
+        Returns the Snapshot the cache is warmed up from, or None.
+        """
+        if isinstance(self.__snapshot, str):
+            from .snapshot import Snapshot
+            self.__snapshot = Snapshot(self.__snapshot)
+        return self.__snapshot
+
+    def _snapshot_for(self, snapshot):
+        if snapshot is None: snapshot = self.snapshot
+        if isinstance(snapshot, str):
+            from .snapshot import Snapshot
+            snapshot = Snapshot(snapshot)
+        if snapshot is None:
+            raise ValueError(f'No snapshot configured for db {self.__dbname}')
+        return snapshot
+
+    def _snapshot_usable(self, meta, max_age, head=None):
+        """
+        Returns whether a saved snapshot can be loaded. Feeds and eventlogs are brought up to date from
+        their current head, and are reloaded when they have none. Other stores have no head to validate
+        against: they are trusted until they are older than max_age, and never without a max_age.
+        """
+        if meta is None: return False
+        if self.iterable: return head is not None
+        if max_age is None: max_age = self.__snapshot_max_age
+        return max_age is not None and time.time() - meta['saved_at'] <= max_age
+
+    def _head(self):
+        """
+        Returns the hash of the latest entry of a feed or eventlog, or None when it is empty.
+        """
+        latest = self.iterator_raw(limit=1)
+        return latest[-1]['hash'] if latest else None
+
+    def warm_start(self, snapshot=None, max_age=None):
+        """
+        Fill the cache from a snapshot and fetch only what changed since it was saved, then save it again.
+        Feeds and eventlogs compare the saved head hash with their current head, and fetch the entries
+        newer than the saved one with iterator_raw(gt=head). Other stores have no head hash to validate
+        against: their snapshot is trusted until it is older than max_age, otherwise the cache is rebuilt
+        with all(). Combine with watch_cache() to stay current.
+        Args:
+            snapshot (Snapshot or str): The snapshot or its path, defaults to the 'snapshot' option.
+            max_age (float): Seconds a snapshot without a head hash is trusted, defaults to 'snapshot_max_age'.
+                Without either, the cache of those stores is rebuilt with all().
+        Returns:
+            A dict with the number of entries 'loaded' from disk and 'fetched' from the server.
+        """
+        snapshot = self._snapshot_for(snapshot)
+        if not self.__use_cache: return {'loaded': 0, 'fetched': 0}
+        meta = snapshot.meta(self.__id)
+        head = self._head() if self.iterable and meta is not None else None
+        if not self._snapshot_usable(meta, max_age, head):
+            if self.iterable:
+                entries = self.iterator_raw(limit=-1)
+                items = self._entry_items(entries)
+                self._cache_load(items)
+                snapshot.save(self.__id, items, entries[-1]['hash'] if entries else None)
+                return {'loaded': 0, 'fetched': len(items)}
+            result = self.all()
+            items = result if isinstance(result, Mapping) else {}
+            snapshot.save(self.__id, items)
+            return {'loaded': 0, 'fetched': len(items)}
+        loaded = snapshot.load(self.__id)
+        self._cache_load(loaded)
+        fetched = 0
+        if self.iterable and head != meta['head']:
+            entries = self.iterator_raw(gt=meta['head'], limit=-1) if meta['head'] else self.iterator_raw(limit=-1)
+            items = self._entry_items(entries)
+            self._cache_load(items)
+            if entries:
+                snapshot.save(self.__id, items, entries[-1]['hash'], replace=False)
+            fetched = len(items)
+        return {'loaded': len(loaded), 'fetched': fetched}
+
+    def save_snapshot(self, snapshot=None):
+        """
+        Save the cache to a snapshot, with the current head hash for feeds and eventlogs.
+        Args:
+            snapshot (Snapshot or str): The snapshot or its path, defaults to the 'snapshot' option.
+        """
+        snapshot = self._snapshot_for(snapshot)
+        head = self._head() if self.iterable else None
+        snapshot.save(self.__id, self.__cache.to_dict(), head)
+
+    def _copy(self, value):
+        """
+        Copy a value before handing it out, unless it is frozen.
+        """
+        return value if self.__immutable else deepcopy(value)
+
+    def _frozen(self, value):
+        """
+        Freeze a value before it is cached, if immutable reads are enabled.
+        """
+        return freeze(value) if self.__immutable else value
+
+    def _read_result(self, result, unpack, mutable):
+        """
+        Prepare the result of get() for the caller.
+        """
+        if not self.__immutable: return self._unpack_result(result, unpack)
+        return thaw(result) if mutable else result
+
+    @staticmethod
+    def _unpack_result(result, unpack):
         if isinstance(result, Hashable): return deepcopy(result)
         if isinstance(result, Iterable): return deepcopy(result)
         if unpack:
@@ -197,94 +653,389 @@ class DB ():
             if isinstance(result, list): return deepcopy(next(iter(result), {}))
         return result
 
+    def info(self):
+        endpoint = self._endpoint()
+        return self.__client._call('GET', endpoint)
+
+    def get(self, item, cache=None, unpack=False, mutable=False):
+        if cache is None: cache = self.__use_cache
+        item = str(item)
+        hit, result = self._cache_lookup(item, cache)
+        if not hit:
+            endpoint = self._endpoint(item)
+            result = self.__client._call('GET', endpoint)
+            result = self._cache_store(item, result, cache)
+        return self._read_result(result, unpack, mutable)
+
+    def get_many(self, items, concurrency=16, cache=None, mutable=False, bulk=None, bulk_ratio=0.25):
+        """
+        Get many keys at once. Cached keys are served locally, the missing ones are fetched with up to
+        `concurrency` requests in flight over the client's connection pool, and the cache is filled in one pass.
+        A keyvalue store fetches the missing keys with a single all() request instead when that is cheaper:
+        when they make up at least bulk_ratio of the keys the last all() returned.
+        Args:
+            items (iterable): The keys to get.
+            concurrency (int): The maximum number of requests in flight.
+            cache (bool): Whether to use and fill the cache, defaults to the db setting.
+            mutable (bool): With 'immutable_reads', return mutable copies instead of the frozen values.
+            bulk (bool): Force (True) or rule out (False) fetching with all(), decided by bulk_ratio when None.
+            bulk_ratio (float): The share of the store's keys missing from the cache above which all() is used.
+        Returns:
+            A dict of the results by key, in the order of items.
+        Example:
+            values = mydb.get_many(['a', 'b', 'c'], concurrency=32)
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        if cache is None: cache = self.__use_cache
+        keys, results, misses = self._get_many_lookup(items, cache)
+        fetched = None
+        if misses and self._get_many_bulk(len(misses), bulk, bulk_ratio):
+            fetched = self._bulk_fetched(self.__client._call('GET', self._endpoint('all')), misses, cache)
+        if misses and fetched is None:
+            fetch = lambda key: self.__client._call('GET', self._endpoint(key))
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(misses))) as pool:
+                fetched = self._cache_fetched(zip(misses, pool.map(fetch, misses)), cache)
+        if fetched: results.update(fetched)
+        return {key: self._read_result(results[key], False, mutable) for key in keys}
+
+    def _get_many_lookup(self, items, cache):
+        """
+        Returns the distinct keys of items in order, the cached results by key, and the keys missing from the cache.
+        """
+        keys = list(dict.fromkeys(str(item) for item in items))
+        results = {}
+        misses = []
+        for key in keys:
+            hit, result = self._cache_lookup(key, cache)
+            if hit: results[key] = result
+            else: misses.append(key)
+        return keys, results, misses
+
+    def _get_many_bulk(self, misses, bulk, bulk_ratio):
+        """
+        Returns whether get_many() fetches the missing keys with all(): keyvalue stores only, since
+        docstore get() also matches keys partially.
+        """
+        if bulk is not None: return bulk and self.__type == 'keyvalue'
+        return self.__type == 'keyvalue' and self.__known_size is not None and misses >= bulk_ratio * self.__known_size
+
+    def _bulk_fetched(self, result, misses, cache):
+        """
+        Returns the results of the missing keys taken from the result of all(), or None if it is not a mapping.
+        The cache is replaced with the whole result.
+        """
+        if not isinstance(result, Mapping): return None
+        self.__known_size = len(result)
+        frozen = self._cache_all(result) if cache else None
+        if frozen is None: return {key: self._frozen(result.get(key)) for key in misses}
+        return {key: frozen.get(key) for key in misses}
+
+    def _cache_fetched(self, pairs, cache):
+        """
+        Freeze fetched (key, result) pairs if immutable reads are enabled and cache them while holding the lock once.
+        Returns them as a dict.
+        """
+        fetched = {key: self._frozen(result) for key, result in pairs}
+        if cache: self.__cache.update(fetched)
+        return fetched
+
     def get_raw(self, item):
-        endpoint = '/'.join(['db', self.__id_safe, 'raw', str(item)])
+        endpoint = self._endpoint('raw', str(item))
         return (self.__client._call('GET', endpoint))
 
     def put(self,  item, cache=None):
-        if self.__enforce_caps and not self.putable:
-            raise CapabilityError(f'Db {self.__dbname} does not have put capability')
-        if self.indexed and (not self.__index_by in item) and self.__enforce_indexby:
-            raise MissingIndexError(f"The provided document {item} doesn't contain field '{self.__index_by}'")
-
+        self._check_put(item)
         if cache is None: cache = self.__use_cache
-        if cache:
-            if self.indexed and hasattr(item, self.__index_by):
-                    index_val = getattr(item, self.__index_by)
-            else:
-                index_val = item.get('key')
-            if index_val:
-                self.__cache[index_val] = item
-        endpoint = '/'.join(['db', self.__id_safe, 'put'])
+        endpoint = self._endpoint('put')
         entry_hash = self.__client._call('POST', endpoint, json=item).get('hash')
-        if cache and entry_hash: self.__cache[entry_hash] = item
+        self._cache_put(item, entry_hash, cache)
         return entry_hash
 
     def add(self, item, cache=None):
-        if self.__enforce_caps and not self.addable:
-            raise CapabilityError(f'Db {self.__dbname} does not have add capability')
+        self._require('add')
         if cache is None: cache = self.__use_cache
-        endpoint = '/'.join(['db', self.__id_safe, 'add'])
+        endpoint = self._endpoint('add')
         entry_hash = self.__client._call('POST', endpoint, json=item).get('hash')
-        if cache and entry_hash: self.__cache[entry_hash] = item
+        self._cache_add(item, entry_hash, cache)
         return entry_hash
 
+    def put_many(self, items, concurrency=8, cache=None):
+        """
+        Put many documents, keeping up to `concurrency` requests in flight over the client's connection pool.
+        Args:
+            items (iterable): The documents to put. Consumed lazily.
+            concurrency (int): The maximum number of requests in flight.
+            cache (bool): Whether to cache the written documents, defaults to the db setting.
+        Returns:
+            A generator of (item, result) pairs in input order, where result is the entry hash
+            or the exception raised for that item. The cache is filled once the generator finishes.
+        Example:
+            for doc, result in mydb.put_many(docs, concurrency=32):
+                if isinstance(result, Exception): print(doc, result)
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self._require('put')
+        if cache is None: cache = self.__use_cache
+        return self._write_many(self._endpoint('put'), items, concurrency, self._check_put, self._put_cache_key if cache else None)
+
+    def add_many(self, items, concurrency=8, cache=None):
+        """
+        Add many entries, keeping up to `concurrency` requests in flight over the client's connection pool.
+        Args:
+            items (iterable): The entries to add. Consumed lazily.
+            concurrency (int): The maximum number of requests in flight.
+            cache (bool): Whether to cache the written entries, defaults to the db setting.
+        Returns:
+            A generator of (item, result) pairs in input order, where result is the entry hash
+            or the exception raised for that item. The cache is filled once the generator finishes.
+        """
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+        self._require('add')
+        if cache is None: cache = self.__use_cache
+        return self._write_many(self._endpoint('add'), items, concurrency, None, self._add_cache_key if cache else None)
+
+    def _write_many(self, endpoint, items, concurrency, check, cache_key):
+        def write(item):
+            return self.__client._call('POST', endpoint, json=item).get('hash')
+        written = []
+        pending = deque()
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            for item in items:
+                try:
+                    if check: check(item)
+                except Exception as ex:
+                    pending.append((item, None, ex))
+                else:
+                    pending.append((item, pool.submit(write, item), None))
+                while len(pending) >= concurrency:
+                    yield self._collect_write(pending.popleft(), written)
+            while pending:
+                yield self._collect_write(pending.popleft(), written)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if cache_key: self._cache_written(cache_key, written)
+
+    @staticmethod
+    def _collect_write(pending_item, written):
+        item, future, error = pending_item
+        if error is None:
+            try:
+                entry_hash = future.result()
+            except Exception as ex:
+                error = ex
+        if error is not None:
+            return item, error
+        written.append((item, entry_hash))
+        return item, entry_hash
+
+    def _cache_written(self, cache_key, written):
+        """
+        Fill the cache with a batch of written (item, entry_hash) pairs.
+        """
+        keyed = ((cache_key(item, entry_hash), item) for item, entry_hash in written)
+        self.__cache.update((key, self._frozen(item)) for key, item in keyed if key)
+
     def inc(self, val):
         val = int(val)
-        endpoint = '/'.join(['db', self.__id_safe, 'inc'])
+        endpoint = self._endpoint('inc')
         return self.__client._call('POST', endpoint, json={'val':val})
 
     def value(self):
-        endpoint = '/'.join(['db', self.__id_safe, 'value'])
+        endpoint = self._endpoint('value')
         return self.__client._call('GET', endpoint)
 
     def iterator_raw(self, **kwargs):
-        if self.__enforce_caps and not self.iterable:
-            raise CapabilityError(f'Db {self.__dbname} does not have iterator capability')
-        endpoint =  '/'.join(['db', self.__id_safe, 'rawiterator'])
-        return self.__client._call('GET', endpoint, json=kwargs)
+        self._require('iterator')
+        endpoint = self._endpoint('rawiterator')
+        return self._entries(self.__client._call('GET', endpoint, json=kwargs))
 
     def iterator(self, **kwargs):
-        if self.__enforce_caps and not self.iterable:
-            raise CapabilityError(f'Db {self.__dbname} does not have iterator capability')
-        endpoint =  '/'.join(['db', self.__id_safe, 'iterator'])
+        self._require('iterator')
+        endpoint = self._endpoint('iterator')
         return self.__client._call('GET', endpoint, json=kwargs)
 
     def index(self):
-        endpoint = '/'.join(['db', self.__id_safe, 'index'])
+        endpoint = self._endpoint('index')
         result = self.__client._call('GET', endpoint)
         return result
 
-    def all(self):
-        endpoint = '/'.join(['db', self.__id_safe, 'all'])
+    def all(self, cache=None):
+        if cache is None: cache = self.cached
+        endpoint = self._endpoint('all')
         result = self.__client._call('GET', endpoint)
-        if isinstance(result, Hashable):
-            self.__cache = result
+        if cache: self._cache_all(result)
         return result
 
+    def iterator_raw_stream(self, **kwargs):
+        """
+        Like iterator_raw(), but parse the response incrementally and yield one entry at a time.
+        Closing the generator early closes the connection.
+        Args:
+            **kwargs: Iterator options, e.g. limit, gt, lt.
+        Example:
+            for entry in mydb.iterator_raw_stream(limit=-1):
+                process(entry)
+        """
+        self._require('iterator')
+        return self._stream_items(self._endpoint('rawiterator'), typed=self.__typed_entries, json=kwargs)
+
+    def iterator_stream(self, **kwargs):
+        """
+        Like iterator(), but parse the response incrementally and yield one entry at a time.
+        Closing the generator early closes the connection.
+        Args:
+            **kwargs: Iterator options, e.g. limit, gt, lt.
+        """
+        self._require('iterator')
+        return self._stream_items(self._endpoint('iterator'), json=kwargs)
+
+    def scan(self, page_size=100, reverse=True, start=None, prefetch=True):
+        """
+        Lazily iterate the raw entries of a feed or eventlog, one page of iterator_raw() at a time.
+        Each page is requested with the hash of the last entry seen as its lt/gt cursor, and the
+        next page is fetched in the background while the current one is consumed.
+        Args:
+            page_size (int): The number of entries per request.
+            reverse (bool): Walk from the newest entry to the oldest (default). Otherwise walk
+                forward from the oldest entry newer than start.
+            start (str): The hash to start after (exclusive). Required when reverse is False.
+            prefetch (bool): Whether to fetch the next page while the current one is consumed.
+        Example:
+            for entry in mydb.scan(page_size=500):
+                process(entry)
+        """
+        self._require('iterator')
+        self._check_scan(page_size, reverse, start)
+        return self._scan(page_size, reverse, start, prefetch)
+
+    def _scan(self, page_size, reverse, cursor, prefetch):
+        fetch = lambda cursor: self.iterator_raw(**self._scan_options(page_size, reverse, cursor))
+        pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page = fetch(cursor)
+            while page:
+                cursor = self._scan_cursor(page, reverse)
+                last = len(page) < page_size
+                upcoming = pool.submit(fetch, cursor) if pool and not last else None
+                yield from (reversed(page) if reverse else page)
+                if last: break
+                page = upcoming.result() if upcoming else fetch(cursor)
+        finally:
+            if pool: pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _check_scan(page_size, reverse, start):
+        if page_size < 1:
+            raise ValueError('page_size must be at least 1')
+        if not reverse and not start:
+            raise ValueError('A start hash is required to scan forward')
+
+    @staticmethod
+    def _scan_options(page_size, reverse, cursor):
+        """
+        Returns the iterator options requesting the page after cursor.
+        """
+        options = {'limit': page_size}
+        if cursor: options['lt' if reverse else 'gt'] = cursor
+        return options
+
+    @staticmethod
+    def _scan_cursor(page, reverse):
+        """
+        Returns the cursor of the page following page. Pages are in log order, oldest entry first.
+        """
+        return (page[0] if reverse else page[-1])['hash']
+
+    def index_stream(self):
+        """
+        Like index(), but parse the response incrementally.
+        Yields (key, value) pairs when the index is an object, or its items when it is a list.
+        """
+        return self._stream_items(self._endpoint('index'))
+
+    def all_stream(self):
+        """
+        Like all(), but parse the response incrementally. The cache is not filled.
+        Yields (key, value) pairs when the database returns an object, or its items when it returns a list.
+        """
+        return self._stream_items(self._endpoint('all'))
+
+    def _stream_items(self, endpoint, typed=False, **kwargs):
+        from .jsonstream import iter_json_items
+        with self.__client._stream('GET', endpoint, **kwargs) as res:
+            items = iter_json_items(res.iter_bytes())
+            yield from (map(Entry.from_dict, items) if typed else items)
+
+    def view(self, hash_indexes=(), sorted_indexes=(), follow=True):
+        """
+        Load a docstore into a local DocView with secondary indexes, answering equality and range
+        queries on document fields without a round trip.
+        Args:
+            hash_indexes (iterable): Fields to index for equality queries.
+            sorted_indexes (iterable): Fields to index for range queries.
+            follow (bool): Keep the view current from the database events. Stop with view.unfollow().
+                The event streams are opened before the documents are loaded, so no write is missed.
+        Example:
+            posts = mydb.view(hash_indexes=['author'], sorted_indexes=['created'])
+            posts.find(author='bob')
+            posts.range('created', low=1546300800)
+        """
+        from .query import DocView, DocViewFollower
+        self._require('query')
+        view = DocView(self.__index_by or '_id', hash_indexes, sorted_indexes)
+        if follow:
+            view._begin_load()
+            view._follow(DocViewFollower(self, view).start(wait=True))
+        try:
+            view.load(self.all(cache=False))
+        except BaseException:
+            view.unfollow()
+            raise
+        return view
+
     def remove(self, item):
-        if self.__enforce_caps and not self.removeable:
-            raise CapabilityError(f'Db {self.__dbname} does not have remove capability')
+        self._require('remove')
         item = str(item)
-        endpoint = '/'.join(['db', self.__id_safe, item])
+        endpoint = self._endpoint(item)
         return self.__client._call('DELETE', endpoint)
 
     def unload(self):
-        endpoint = '/'.join(['db', self.__id_safe])
+        self.unwatch_cache()
+        write_buffer = self._detach_write_buffer()
+        if write_buffer is not None: write_buffer.close()
+        aggregator = self._detach_aggregator()
+        if aggregator is not None: aggregator.close()
+        self.__client._forget_db(self)
+        endpoint = self._endpoint()
         return self.__client._call('DELETE', endpoint)
 
     def events(self, eventname):
-        endpoint = '/'.join(['db', self.__id_safe, 'events', urlquote(eventname, safe='')])
-        res = self.__client._call_raw('GET', endpoint, stream=True)
-        res.raise_for_status()
-        return SSEClient(res.stream()).events()
+        from .sse import iter_events
+        return iter_events(self._open_events(eventname).iter_lines())
+
+    def _open_events(self, eventname, **kwargs):
+        """
+        Open the event stream of the database and return the streamed response. The caller must close it.
+        """
+        endpoint = self._endpoint('events', urlquote(eventname, safe=''))
+        res = self.__client._call_raw('GET', endpoint, stream=True, **kwargs)
+        try:
+            res.raise_for_status()
+        except BaseException:
+            res.close()
+            raise
+        return res
 
     def findPeers(self, **kwargs):
         endpoint = '/'.join(['peers','searches','db', self.__id_safe])
         return self.__client._call('POST', endpoint, json=kwargs)
 
     def getPeers(self):
-        endpoint = '/'.join(['db', self.__id_safe, 'peers'])
+        endpoint = self._endpoint('peers')
         return self.__client._call('GET', endpoint)
 
 
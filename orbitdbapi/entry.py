@@ -0,0 +1,106 @@
+class _Struct ():
+    """
+    Base of the typed entry structs: attribute storage in __slots__, plus read access by key
+    so code written for the nested dicts (entry['payload']['value']) keeps working.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__: raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def __eq__(self, other):
+        if type(other) is not type(self): return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Payload (_Struct):
+    """
+    The operation stored in a log entry.
+    """
+    __slots__ = ('op', 'key', 'value')
+
+    def __init__(self, op=None, key=None, value=None):
+        self.op = op
+        self.key = key
+        self.value = value
+
+    def to_dict(self):
+        return {'op': self.op, 'key': self.key, 'value': self.value}
+
+
+class Clock (_Struct):
+    """
+    The Lamport clock of a log entry.
+    """
+    __slots__ = ('id', 'time')
+
+    def __init__(self, id=None, time=None):
+        self.id = id
+        self.time = time
+
+    def to_dict(self):
+        return {'id': self.id, 'time': self.time}
+
+
+class Entry (_Struct):
+    """
+    A raw OrbitDB log entry, as returned by DB.iterator_raw() with the 'typed_entries' option.
+    Uses a fraction of the memory of the nested dicts and supports entry['hash'] style access.
+    Example:
+        mydb = client.db('feed', local_options={'typed_entries': True})
+        for entry in mydb.iterator_raw(limit=-1):
+            print(entry.hash, entry.payload.value)
+    """
+    __slots__ = ('hash', 'id', 'payload', 'next', 'refs', 'v', 'clock', 'key', 'identity', 'sig')
+
+    def __init__(self, hash=None, id=None, payload=None, next=(), refs=(), v=None, clock=None, key=None, identity=None, sig=None):
+        self.hash = hash
+        self.id = id
+        self.payload = payload
+        self.next = next
+        self.refs = refs
+        self.v = v
+        self.clock = clock
+        self.key = key
+        self.identity = identity
+        self.sig = sig
+
+    @classmethod
+    def from_dict(cls, entry):
+        """
+        Build an Entry from the decoded JSON of a log entry. Fields not part of an OrbitDB entry are dropped.
+        """
+        payload = entry.get('payload')
+        clock = entry.get('clock')
+        return cls(
+            entry.get('hash'), entry.get('id'),
+            Payload(payload.get('op'), payload.get('key'), payload.get('value')) if isinstance(payload, dict) else payload,
+            tuple(entry.get('next') or ()), tuple(entry.get('refs') or ()), entry.get('v'),
+            Clock(clock.get('id'), clock.get('time')) if isinstance(clock, dict) else clock,
+            entry.get('key'), entry.get('identity'), entry.get('sig'))
+
+    def to_dict(self):
+        """
+        Returns the entry as nested dicts and lists, like iterator_raw() without 'typed_entries'.
+        """
+        return {
+            'hash': self.hash, 'id': self.id,
+            'payload': self.payload.to_dict() if isinstance(self.payload, Payload) else self.payload,
+            'next': list(self.next), 'refs': list(self.refs), 'v': self.v,
+            'clock': self.clock.to_dict() if isinstance(self.clock, Clock) else self.clock,
+            'key': self.key, 'identity': self.identity, 'sig': self.sig,
+        }
@@ -0,0 +1,29 @@
+from collections.abc import Mapping
+from types import MappingProxyType
+
+
+def freeze(value):
+    """
+    Return a read-only deep copy of a decoded JSON value.
+    Dicts become read-only mappings, lists become tuples and scalars are returned as they are.
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """
+    Return a mutable deep copy of a value, turning read-only mappings into dicts and tuples into lists.
+    """
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {thaw(v) for v in value}
+    return value
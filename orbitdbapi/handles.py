@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+
+
+class DBHandles ():
+    """
+    A registry of the DB objects a client has opened, keyed by database name or address plus the open options,
+    so repeated OrbitDbAPI.db() calls return the same handle instead of re-opening the database.
+    Thread-safe.
+    """
+    def __init__(self, idle_timeout=None):
+        """
+        Args:
+            idle_timeout (float): Seconds a handle may go unused before idle() returns it (default=None, never).
+        """
+        self.__idle_timeout = idle_timeout
+        self.__lock = threading.Lock()
+        self.__handles = {}
+
+    @staticmethod
+    def key(dbname, local_options=None, open_options=None):
+        """
+        Returns the registry key of a database opened with the given options.
+        Options that are not JSON serializable (e.g. a cache_backend instance) are keyed by identity.
+        Args:
+            dbname (str): The name or address of the database.
+            local_options (dict): The options passed to the DB object.
+            open_options (dict): The keyword arguments passed to open_db().
+        """
+        options = json.dumps([local_options or {}, open_options or {}], sort_keys=True, default=repr)
+        return (dbname, options)
+
+    @property
+    def idle_timeout(self):
+        """
+        Returns the seconds a handle may go unused before it is evicted, or None.
+        """
+        return self.__idle_timeout
+
+    def get(self, key):
+        """
+        Returns the handle registered under a key, or None.
+        """
+        with self.__lock:
+            return self.__handles.get(key)
+
+    def add(self, db, *keys):
+        """
+        Register a handle under one or more keys, e.g. the requested name and the database address.
+        """
+        with self.__lock:
+            for key in keys:
+                self.__handles[key] = db
+
+    def remove(self, db):
+        """
+        Forget every key of a handle. Returns whether the handle was registered.
+        """
+        with self.__lock:
+            keys = [key for key, handle in self.__handles.items() if handle is db]
+            for key in keys:
+                del self.__handles[key]
+        return bool(keys)
+
+    def idle(self, timeout=None):
+        """
+        Remove and return the handles that were not used for longer than the timeout.
+        Args:
+            timeout (float): Overrides the idle_timeout of the registry.
+        """
+        if timeout is None: timeout = self.__idle_timeout
+        if timeout is None: return []
+        deadline = time.monotonic() - timeout
+        with self.__lock:
+            idle = {id(db): db for db in self.__handles.values() if db.last_used < deadline}
+            for key in [key for key, db in self.__handles.items() if id(db) in idle]:
+                del self.__handles[key]
+        return list(idle.values())
+
+    def handles(self):
+        """
+        Returns the registered handles.
+        """
+        with self.__lock:
+            return list({id(db): db for db in self.__handles.values()}.values())
+
+    def __len__(self):
+        return len(self.handles())
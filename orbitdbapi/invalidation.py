@@ -0,0 +1,283 @@
+import asyncio
+import json
+import logging
+import socket
+import threading
+
+from .sse import iter_events
+from .transport import stream_timeout
+
+
+def event_entry(data):
+    """
+    Returns the oplog entry carried by the data of a write or replicate.progress event, or None.
+    The API sends the arguments of the orbit-db event as a JSON list, e.g. [address, entry, heads].
+    """
+    try:
+        args = json.loads(data)
+    except (TypeError, ValueError):
+        return None
+    return args_entry(args)
+
+
+def args_entry(args):
+    """
+    Returns the oplog entry among the decoded arguments of an event, or None.
+    """
+    if isinstance(args, dict): args = [args]
+    if not isinstance(args, list): return None
+    for arg in args:
+        if isinstance(arg, dict) and isinstance(arg.get('payload'), dict):
+            return arg
+    return None
+
+
+class _Invalidation ():
+    """
+    Applies database events to the cache of a DB.
+    """
+    def __init__(self, db, events=('write', 'replicated'), refresh=False, reconnect_delay=1.0):
+        self.logger = logging.getLogger(__name__)
+        self._db = db
+        self._events = tuple(events)
+        self._refresh = refresh
+        self._reconnect_delay = reconnect_delay
+        self._lock = threading.Lock()
+        self._received = 0
+        self._invalidated = 0
+        self._cleared = 0
+        self._reconnects = 0
+
+    @property
+    def events(self):
+        return self._events
+
+    @property
+    def stats(self):
+        """
+        Returns the counters of received events, invalidated keys, cache clears and reconnects.
+        """
+        with self._lock:
+            return {
+                'received': self._received,
+                'invalidated': self._invalidated,
+                'cleared': self._cleared,
+                'reconnects': self._reconnects,
+            }
+
+    def _apply(self, event):
+        """
+        Invalidate the cache for an event. Returns the key to refresh, if any.
+        """
+        with self._lock:
+            self._received += 1
+        entry = event_entry(event.data) if event.event in ('write', 'replicate.progress') else None
+        if entry is None:
+            if event.event != 'write':
+                self._clear()
+            return None
+        key = entry['payload'].get('key')
+        if key is None:
+            return None
+        self._db.cache_remove(key)
+        with self._lock:
+            self._invalidated += 1
+        if self._refresh and entry['payload'].get('op') == 'PUT':
+            return str(key)
+        return None
+
+    def _clear(self):
+        """
+        Clear the whole cache, e.g. after a replication or when events may have been missed.
+        """
+        self._db.clear_cache()
+        with self._lock:
+            self._cleared += 1
+
+    def _reconnected(self):
+        with self._lock:
+            self._reconnects += 1
+        self._clear()
+
+
+def _interrupt(res):
+    """
+    Unblock a thread reading a streamed response by shutting down its socket.
+    Closing the response from another thread would wait for the read to finish.
+    """
+    stream = res.extensions.get('network_stream')
+    sock = stream.get_extra_info('socket') if stream is not None else None
+    if sock is None: return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class CacheInvalidator (_Invalidation):
+    """
+    Keeps the cache of a DB in sync with remote writes by following its event streams on background threads.
+    'write' and 'replicate.progress' events invalidate the key of the written entry, other events
+    ('replicated') clear the whole cache. The cache is also cleared after a reconnect, since events may have been missed.
+    Args:
+        db (DB): The database whose cache to keep in sync.
+        events (tuple): The event names to follow.
+        refresh (bool): Fetch the new value of an invalidated key instead of waiting for the next get().
+        reconnect_delay (float): Seconds to wait before reopening a dropped event stream.
+    Example:
+        mydb.watch_cache()
+        ...
+        mydb.unwatch_cache()
+    """
+    def __init__(self, db, events=('write', 'replicated'), refresh=False, reconnect_delay=1.0):
+        super().__init__(db, events, refresh, reconnect_delay)
+        self.__stopping = threading.Event()
+        self.__responses = {}
+        self.__threads = []
+        self.__ready = []
+        self.__error = None
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self.__threads)
+
+    def start(self, wait=False):
+        """
+        Start one daemon thread per followed event.
+        Args:
+            wait (bool): Return only once every event stream is open, see wait_connected().
+        """
+        self.__stopping.clear()
+        self.__error = None
+        self.__ready = [threading.Event() for _e in self._events]
+        self.__threads = [threading.Thread(target=self.__follow, args=(eventname, ready), daemon=True,
+                                           name=f'orbitdb-cache-{self._db.dbname}-{eventname}')
+                          for eventname, ready in zip(self._events, self.__ready)]
+        for thread in self.__threads: thread.start()
+        if wait: self.wait_connected()
+        return self
+
+    def wait_connected(self):
+        """
+        Wait until every event stream is open, so that no event after the return is missed.
+        If a stream fails to open, the invalidator is stopped and the error is raised.
+        """
+        for ready in self.__ready: ready.wait()
+        if self.__error is not None:
+            self.stop()
+            raise self.__error
+
+    def stop(self, timeout=None):
+        """
+        Close the event streams and wait for the threads to exit.
+        """
+        self.__stopping.set()
+        for res in list(self.__responses.values()):
+            _interrupt(res)
+        for thread in self.__threads:
+            thread.join(timeout)
+
+    def __refresh(self, key):
+        try:
+            self._db.get(key)
+        except Exception:
+            self.logger.warning(f'Refreshing {key} of {self._db.dbname} failed', exc_info=True)
+
+    def __follow(self, eventname, ready):
+        connected = False
+        try:
+            while not self.__stopping.is_set():
+                try:
+                    res = self._db._open_events(eventname, timeout=stream_timeout(self._db.client.timeout))
+                    self.__responses[eventname] = res
+                    if self.__stopping.is_set(): break
+                    if connected: self._reconnected()
+                    connected = True
+                    ready.set()
+                    for event in iter_events(res.iter_lines()):
+                        self._db._remote_write()
+                        key = self._apply(event)
+                        if key is not None: self.__refresh(key)
+                except Exception as ex:
+                    if not ready.is_set():
+                        self.__error = ex
+                        ready.set()
+                    if self.__stopping.is_set(): break
+                    self.logger.warning(f'Event stream {eventname} of {self._db.dbname} failed, reconnecting', exc_info=True)
+                finally:
+                    res = self.__responses.pop(eventname, None)
+                    if res is not None: res.close()
+                self.__stopping.wait(self._reconnect_delay)
+        finally:
+            ready.set()
+
+
+class AsyncCacheInvalidator (_Invalidation):
+    """
+    The asyncio counterpart of CacheInvalidator, following the event streams of an AsyncDB in tasks.
+    """
+    def __init__(self, db, events=('write', 'replicated'), refresh=False, reconnect_delay=1.0):
+        super().__init__(db, events, refresh, reconnect_delay)
+        self.__tasks = []
+        self.__ready = []
+        self.__error = None
+
+    @property
+    def running(self):
+        return any(not t.done() for t in self.__tasks)
+
+    def start(self):
+        """
+        Start one task per followed event on the running loop. Await wait_connected() to know the streams are open.
+        """
+        self.__error = None
+        self.__ready = [asyncio.Event() for _e in self._events]
+        self.__tasks = [asyncio.ensure_future(self.__follow(eventname, ready))
+                        for eventname, ready in zip(self._events, self.__ready)]
+        return self
+
+    async def wait_connected(self):
+        """
+        Wait until every event stream is open, see CacheInvalidator.wait_connected().
+        """
+        for ready in self.__ready: await ready.wait()
+        if self.__error is not None:
+            await self.stop()
+            raise self.__error
+
+    async def stop(self):
+        """
+        Cancel the tasks and wait for them to exit.
+        """
+        for task in self.__tasks: task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+
+    async def __refresh(self, key):
+        try:
+            await self._db.get(key)
+        except Exception:
+            self.logger.warning(f'Refreshing {key} of {self._db.dbname} failed', exc_info=True)
+
+    async def __follow(self, eventname, ready):
+        connected = False
+        try:
+            while True:
+                try:
+                    async with self._db._open_events(eventname) as events:
+                        if connected: self._reconnected()
+                        connected = True
+                        ready.set()
+                        async for event in events:
+                            self._db._remote_write()
+                            key = self._apply(event)
+                            if key is not None: await self.__refresh(key)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:
+                    if not ready.is_set():
+                        self.__error = ex
+                        ready.set()
+                    self.logger.warning(f'Event stream {eventname} of {self._db.dbname} failed, reconnecting', exc_info=True)
+                await asyncio.sleep(self._reconnect_delay)
+        finally:
+            ready.set()
@@ -0,0 +1,168 @@
+import codecs
+import json
+
+_WHITESPACE = ' \t\n\r'
+_MIN_RETRY_GROWTH = 64 * 1024
+_NUMBER_TAIL = '0123456789.eE+-'
+
+
+class JSONItemParser ():
+    """
+    Incrementally parse the top level of a JSON document fed in chunks.
+    The items of a top-level array are produced as values, the members of a
+    top-level object as (key, value) pairs, and any other document as a single value.
+    Only the item being parsed is kept in memory.
+    """
+    def __init__(self):
+        self.__decoder = json.JSONDecoder()
+        self.__utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.__buf = ''
+        self.__pos = 0
+        self.__mode = None
+        self.__done = False
+        self.__retry_at = 0
+        self.__count = 0
+
+    def feed(self, chunk):
+        """
+        Feed the next chunk of the document and return the list of items it completed.
+        Args:
+            chunk (bytes or str): The next chunk.
+        """
+        if isinstance(chunk, bytes):
+            chunk = self.__utf8.decode(chunk)
+        self.__buf += chunk
+        return self.__parse(final=False)
+
+    def close(self):
+        """
+        Signal the end of the document and return the remaining items.
+        Raises json.JSONDecodeError if the document is incomplete or malformed.
+        """
+        self.__buf += self.__utf8.decode(b'', final=True)
+        items = self.__parse(final=True)
+        if self.__mode == 'scalar':
+            items.append(self.__decoder.decode(self.__buf[self.__pos:]))
+        elif not self.__done and (self.__mode or self.__buf.strip()):
+            raise json.JSONDecodeError('Unterminated document', self.__buf, len(self.__buf))
+        elif self.__buf[self.__pos:].strip():
+            raise json.JSONDecodeError('Extra data', self.__buf, self.__pos)
+        return items
+
+    def __skip_ws(self):
+        buf, pos = self.__buf, self.__pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self.__pos = pos
+        return pos < len(buf)
+
+    def __decode(self, pos, final):
+        """
+        Try to decode one value at pos. Returns (value, end), or None if more data is needed.
+        """
+        buf = self.__buf
+        if not final and len(buf) < self.__retry_at:
+            return None
+        try:
+            value, end = self.__decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if final: raise
+            pending = len(buf) - pos
+            self.__retry_at = len(buf) + max(pending, _MIN_RETRY_GROWTH)
+            return None
+        if not final and buf[pos] not in '{["' and not buf[end:].strip(_NUMBER_TAIL):
+            # A number or literal at the end of the buffer may continue in the next chunk, e.g. '1' of '1.5'
+            return None
+        self.__retry_at = 0
+        return value, end
+
+    def __parse(self, final):
+        items = []
+        while not self.__done and self.__skip_ws():
+            buf, pos = self.__buf, self.__pos
+            if self.__mode is None:
+                if buf[pos] == '[': self.__mode = 'array'
+                elif buf[pos] == '{': self.__mode = 'object'
+                else:
+                    self.__mode = 'scalar'
+                    break
+                self.__pos = pos + 1
+                self.__expect_item = True
+                continue
+            if self.__mode == 'scalar':
+                break
+            close = ']' if self.__mode == 'array' else '}'
+            if buf[pos] == close and not (self.__expect_item and self.__count):
+                self.__pos = pos + 1
+                self.__done = True
+                break
+            if not self.__expect_item:
+                if buf[pos] != ',':
+                    raise json.JSONDecodeError(f"Expecting ',' or '{close}'", buf, pos)
+                self.__pos = pos + 1
+                self.__expect_item = True
+                continue
+            item = self.__parse_item(pos, final)
+            if item is None:
+                break
+            items.append(item[0])
+            self.__count += 1
+            self.__pos = item[1]
+            self.__expect_item = False
+        if self.__pos > _MIN_RETRY_GROWTH:
+            self.__buf = self.__buf[self.__pos:]
+            if self.__retry_at: self.__retry_at -= self.__pos
+            self.__pos = 0
+        return items
+
+    def __parse_item(self, pos, final):
+        if self.__mode == 'array':
+            return self.__decode(pos, final)
+        key = self.__decode(pos, final)
+        if key is None: return None
+        key, end = key
+        if not isinstance(key, str):
+            raise json.JSONDecodeError('Expecting property name enclosed in double quotes', self.__buf, pos)
+        buf = self.__buf
+        while end < len(buf) and buf[end] in _WHITESPACE:
+            end += 1
+        if end == len(buf):
+            if final: raise json.JSONDecodeError("Expecting ':' delimiter", buf, end)
+            return None
+        if buf[end] != ':':
+            raise json.JSONDecodeError("Expecting ':' delimiter", buf, end)
+        end += 1
+        while end < len(buf) and buf[end] in _WHITESPACE:
+            end += 1
+        if end == len(buf):
+            if final: raise json.JSONDecodeError('Expecting value', buf, end)
+            return None
+        value = self.__decode(end, final)
+        if value is None: return None
+        return (key, value[0]), value[1]
+
+
+def iter_json_items(chunks):
+    """
+    Iterate the top-level items of a JSON document read from an iterable of chunks.
+    Args:
+        chunks: An iterable of bytes or str, e.g. httpx's Response.iter_bytes().
+    """
+    parser = JSONItemParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_json_items(chunks):
+    """
+    Asynchronously iterate the top-level items of a JSON document read from an async iterable of chunks.
+    Args:
+        chunks: An async iterable of bytes or str, e.g. httpx's Response.aiter_bytes().
+    """
+    parser = JSONItemParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
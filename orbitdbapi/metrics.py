@@ -0,0 +1,222 @@
+import threading
+from collections import namedtuple
+
+RequestRecord = namedtuple('RequestRecord', ['method', 'endpoint', 'status', 'seconds', 'request_bytes', 'response_bytes', 'error', 'attempt'], defaults=[1])
+RequestRecord.__doc__ = """
+What a request hook receives after every request to the OrbitDB API.
+    method (str): The HTTP method.
+    endpoint (str): The endpoint template, e.g. 'db/{db}/{key}', see endpoint_template().
+    status (int): The HTTP status, None when the request failed.
+    seconds (float): Time until the response headers arrived (the whole body, unless streamed).
+    request_bytes (int): Size of the request body.
+    response_bytes (int): Size of the response body, None for streamed responses.
+    error (Exception): The exception raised by the request, or None.
+    attempt (int): 1 for the first try of a call, 2 and up for retries.
+"""
+
+DB_ACTIONS = frozenset(['add', 'all', 'inc', 'index', 'iterator', 'peers', 'put', 'rawiterator', 'value'])
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def endpoint_template(endpoint):
+    """
+    Replace the database address and entry keys of an endpoint with placeholders,
+    so requests to the same API route are counted together.
+    Args:
+        endpoint (str): The endpoint path below the base url, e.g. 'db/%2Forbitdb%2Fzdpu...%2Fname/get/key'.
+    Example:
+        endpoint_template('db/%2Forbitdb%2Fzdpu%2Fkv/mykey')  # 'db/{db}/{key}'
+    """
+    parts = endpoint.split('?', 1)[0].split('/')
+    if parts[0] == 'db' and len(parts) > 1:
+        parts[1] = '{db}'
+        if len(parts) == 3 and parts[2] not in DB_ACTIONS:
+            parts[2] = '{key}'
+        elif len(parts) == 4:
+            parts[3] = '{events}' if parts[2] == 'events' else '{key}'
+    elif parts[:3] == ['peers', 'searches', 'db'] and len(parts) == 4:
+        parts[3] = '{db}'
+    return '/'.join(parts)
+
+
+class Metrics ():
+    """
+    A request hook that counts requests, errors, retries, bytes and a latency histogram
+    per method and endpoint template. Thread-safe.
+    Example:
+        metrics = Metrics()
+        client = OrbitDbAPI(base_url='http://localhost:3000', hooks=[metrics])
+        ...
+        print(metrics.stats())
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            buckets (tuple): Upper bounds in seconds of the latency histogram buckets.
+        """
+        self.__buckets = tuple(sorted(buckets))
+        self.__lock = threading.Lock()
+        self.__endpoints = {}
+
+    @property
+    def buckets(self):
+        """
+        Returns the upper bounds of the latency histogram buckets.
+        """
+        return self.__buckets
+
+    def __call__(self, record):
+        bucket = len(self.__buckets)
+        for i, bound in enumerate(self.__buckets):
+            if record.seconds <= bound:
+                bucket = i
+                break
+        with self.__lock:
+            stats = self.__endpoints.get((record.method, record.endpoint))
+            if stats is None:
+                stats = self.__endpoints[(record.method, record.endpoint)] = {
+                    'requests': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0,
+                    'request_bytes': 0, 'response_bytes': 0, 'statuses': {},
+                    'histogram': [0] * (len(self.__buckets) + 1),
+                }
+            stats['requests'] += 1
+            stats['seconds'] += record.seconds
+            stats['histogram'][bucket] += 1
+            stats['request_bytes'] += record.request_bytes or 0
+            stats['response_bytes'] += record.response_bytes or 0
+            if record.attempt > 1: stats['retries'] += 1
+            if record.error is not None or record.status >= 400: stats['errors'] += 1
+            if record.status is not None: stats['statuses'][record.status] = stats['statuses'].get(record.status, 0) + 1
+
+    def stats(self):
+        """
+        Returns a copy of the counters as a dict keyed by (method, endpoint template).
+        'histogram' counts the requests per latency bucket, the last one holding the requests slower than every bucket.
+        """
+        with self.__lock:
+            return {key: {**stats, 'statuses': dict(stats['statuses']), 'histogram': list(stats['histogram'])}
+                    for key, stats in self.__endpoints.items()}
+
+    def reset(self):
+        """
+        Reset all counters.
+        """
+        with self.__lock:
+            self.__endpoints.clear()
+
+
+def cache_stats(client):
+    """
+    Returns the cache counters of the DB objects opened by a client, keyed by database address,
+    plus their sum under 'total'. 'hit_ratio' is None before the first lookup.
+    Args:
+        client (OrbitDbAPI): The client whose db() handles to inspect.
+    """
+    result = {}
+    total = {'hits': 0, 'misses': 0, 'entries': 0}
+    for db in client.db_handles.handles():
+        stats = db.cache_stats
+        result[db.id] = stats
+        for counter in total:
+            total[counter] += stats[counter]
+    lookups = total['hits'] + total['misses']
+    result['total'] = {**total, 'hit_ratio': total['hits'] / lookups if lookups else None}
+    return result
+
+
+class PrometheusCollector ():
+    """
+    Exports a Metrics hook, and the cache counters of a client, to prometheus_client.
+    Requires the prometheus-client package.
+    Example:
+        metrics = Metrics()
+        client = OrbitDbAPI(base_url='http://localhost:3000', hooks=[metrics])
+        PrometheusCollector(metrics, client).register()
+    """
+    def __init__(self, metrics, client=None, prefix='orbitdb_client'):
+        """
+        Args:
+            metrics (Metrics): The hook collecting the request metrics.
+            client (OrbitDbAPI): Also export the cache counters of the DB objects opened by this client.
+            prefix (str): Prefix of the metric names.
+        """
+        try:
+            import prometheus_client.core
+        except ImportError:
+            raise ImportError('PrometheusCollector requires the prometheus-client package, run "pip install orbitdbapi[prometheus]"') from None
+        self.__core = prometheus_client.core
+        self.__metrics = metrics
+        self.__client = client
+        self.__prefix = prefix
+
+    def register(self, registry=None):
+        """
+        Register the collector with a prometheus_client registry (default: the global REGISTRY).
+        """
+        (registry or self.__core.REGISTRY).register(self)
+        return self
+
+    def collect(self):
+        core, prefix = self.__core, self.__prefix
+        labels = ['method', 'endpoint']
+        requests = core.CounterMetricFamily(f'{prefix}_requests', 'Requests to the OrbitDB API', labels=labels + ['status'])
+        errors = core.CounterMetricFamily(f'{prefix}_errors', 'Failed requests to the OrbitDB API', labels=labels)
+        retries = core.CounterMetricFamily(f'{prefix}_retries', 'Retried requests to the OrbitDB API', labels=labels)
+        sent = core.CounterMetricFamily(f'{prefix}_request_bytes', 'Bytes sent in request bodies', labels=labels)
+        received = core.CounterMetricFamily(f'{prefix}_response_bytes', 'Bytes received in response bodies', labels=labels)
+        latency = core.HistogramMetricFamily(f'{prefix}_request_duration_seconds', 'Latency of requests to the OrbitDB API', labels=labels)
+        bounds = [str(bound) for bound in self.__metrics.buckets] + ['+Inf']
+        for (method, endpoint), stats in self.__metrics.stats().items():
+            for status, count in stats['statuses'].items():
+                requests.add_metric([method, endpoint, str(status)], count)
+            errors.add_metric([method, endpoint], stats['errors'])
+            retries.add_metric([method, endpoint], stats['retries'])
+            sent.add_metric([method, endpoint], stats['request_bytes'])
+            received.add_metric([method, endpoint], stats['response_bytes'])
+            cumulative, buckets = 0, []
+            for bound, count in zip(bounds, stats['histogram']):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            latency.add_metric([method, endpoint], buckets, stats['seconds'])
+        yield from (requests, errors, retries, sent, received, latency)
+        if self.__client is None: return
+        hits = core.CounterMetricFamily(f'{prefix}_cache_hits', 'DB cache hits', labels=['db'])
+        misses = core.CounterMetricFamily(f'{prefix}_cache_misses', 'DB cache misses', labels=['db'])
+        for db, stats in cache_stats(self.__client).items():
+            if db == 'total': continue
+            hits.add_metric([db], stats['hits'])
+            misses.add_metric([db], stats['misses'])
+        yield from (hits, misses)
+
+
+class OpenTelemetryHook ():
+    """
+    A request hook recording request metrics with an OpenTelemetry meter.
+    Requires the opentelemetry-api package, and an SDK to export them.
+    Example:
+        client = OrbitDbAPI(base_url='http://localhost:3000', hooks=[OpenTelemetryHook()])
+    """
+    def __init__(self, meter=None):
+        """
+        Args:
+            meter (opentelemetry.metrics.Meter): The meter to create the instruments with (default: the 'orbitdbapi' meter).
+        """
+        try:
+            from opentelemetry import metrics
+        except ImportError:
+            raise ImportError('OpenTelemetryHook requires the opentelemetry-api package, run "pip install orbitdbapi[opentelemetry]"') from None
+        meter = meter or metrics.get_meter('orbitdbapi')
+        self.__requests = meter.create_counter('orbitdb.client.requests', description='Requests to the OrbitDB API')
+        self.__duration = meter.create_histogram('orbitdb.client.duration', unit='s', description='Latency of requests to the OrbitDB API')
+        self.__sent = meter.create_counter('orbitdb.client.request.size', unit='By', description='Bytes sent in request bodies')
+        self.__received = meter.create_counter('orbitdb.client.response.size', unit='By', description='Bytes received in response bodies')
+
+    def __call__(self, record):
+        attributes = {'http.method': record.method, 'orbitdb.endpoint': record.endpoint, 'orbitdb.attempt': record.attempt}
+        if record.status is not None: attributes['http.status_code'] = record.status
+        if record.error is not None: attributes['error.type'] = type(record.error).__name__
+        self.__requests.add(1, attributes)
+        self.__duration.record(record.seconds, attributes)
+        if record.request_bytes: self.__sent.add(record.request_bytes, attributes)
+        if record.response_bytes: self.__received.add(record.response_bytes, attributes)
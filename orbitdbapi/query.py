@@ -0,0 +1,305 @@
+import asyncio
+import threading
+from bisect import bisect_left, bisect_right, insort
+from numbers import Number
+
+from .frozen import freeze
+from .invalidation import AsyncCacheInvalidator, CacheInvalidator, event_entry
+
+
+def _sort_key(value):
+    """
+    Returns a key ordering numbers before strings, or None for values a sorted index can't hold.
+    """
+    if isinstance(value, Number): return (0, value)
+    if isinstance(value, str): return (1, value)
+    return None
+
+
+class DocView ():
+    """
+    A local, read-only materialized view of a docstore, with secondary indexes on document fields.
+    Hash indexes answer equality queries and sorted indexes answer range queries without a round trip.
+    Documents are frozen (read-only mappings and tuples) and returned without copying.
+    Build one with DB.view(), which loads it from all() and keeps it current from the database events.
+    Args:
+        index_by (str): The field holding the document id.
+        hash_indexes (iterable): Fields to index for equality queries.
+        sorted_indexes (iterable): Fields to index for range queries. They also answer equality queries.
+    """
+    def __init__(self, index_by='_id', hash_indexes=(), sorted_indexes=()):
+        self._lock = threading.RLock()
+        self.__index_by = index_by
+        self.__docs = {}
+        self.__hash = {field: {} for field in hash_indexes}
+        self.__sorted = {field: [] for field in sorted_indexes}
+        self.__follower = None
+        self.__loading = None
+
+    def __len__(self):
+        return len(self.__docs)
+
+    def __contains__(self, doc_id):
+        return str(doc_id) in self.__docs
+
+    @property
+    def hash_indexes(self):
+        return tuple(self.__hash)
+
+    @property
+    def sorted_indexes(self):
+        return tuple(self.__sorted)
+
+    @property
+    def follower(self):
+        """
+        Returns the event follower keeping the view current, or None.
+        """
+        return self.__follower
+
+    def load(self, docs):
+        """
+        Replace the contents of the view and rebuild the indexes. Entries received from the
+        database events since _begin_load() are applied on top of the documents.
+        Args:
+            docs (iterable): The documents, e.g. the result of DB.all().
+        """
+        docs = {str(doc[self.__index_by]): freeze(doc) for doc in docs if self.__index_by in doc}
+        hashed = {field: {} for field in self.__hash}
+        ordered = {field: [] for field in self.__sorted}
+        for doc_id, doc in docs.items():
+            for field, index in hashed.items():
+                self.__hash_add(index, doc, field, doc_id)
+            for field, index in ordered.items():
+                key = _sort_key(doc.get(field))
+                if key is not None: index.append((key, doc_id))
+        for index in ordered.values():
+            index.sort()
+        with self._lock:
+            self.__docs, self.__hash, self.__sorted = docs, hashed, ordered
+            self._end_load()
+
+    def _begin_load(self):
+        """
+        Hold back the entries of database events until the next load(), which applies them
+        on top of its documents instead of losing them.
+        """
+        with self._lock:
+            if self.__loading is None: self.__loading = []
+
+    def _end_load(self):
+        """
+        Apply the entries held back since _begin_load() and stop holding them back.
+        """
+        with self._lock:
+            entries, self.__loading = self.__loading or (), None
+            for entry in entries:
+                self._apply_entry(entry)
+
+    def put(self, doc):
+        """
+        Add or replace a document.
+        """
+        doc = freeze(doc)
+        doc_id = str(doc[self.__index_by])
+        with self._lock:
+            self.remove(doc_id)
+            self.__docs[doc_id] = doc
+            for field, index in self.__hash.items():
+                self.__hash_add(index, doc, field, doc_id)
+            for field, index in self.__sorted.items():
+                key = _sort_key(doc.get(field))
+                if key is not None: insort(index, (key, doc_id))
+
+    def remove(self, doc_id):
+        """
+        Remove a document by id, if present.
+        """
+        doc_id = str(doc_id)
+        with self._lock:
+            doc = self.__docs.pop(doc_id, None)
+            if doc is None: return
+            for field, index in self.__hash.items():
+                try:
+                    ids = index.get(doc.get(field))
+                except TypeError:
+                    continue
+                if ids is not None:
+                    ids.discard(doc_id)
+                    if not ids: del index[doc.get(field)]
+            for field, index in self.__sorted.items():
+                key = _sort_key(doc.get(field))
+                if key is None: continue
+                pos = bisect_left(index, (key, doc_id))
+                if pos < len(index) and index[pos] == (key, doc_id): del index[pos]
+
+    @staticmethod
+    def __hash_add(index, doc, field, doc_id):
+        if field not in doc: return
+        try:
+            index.setdefault(doc[field], set()).add(doc_id)
+        except TypeError:
+            pass
+
+    def get(self, doc_id, default=None):
+        """
+        Returns a document by id.
+        """
+        return self.__docs.get(str(doc_id), default)
+
+    def all(self):
+        """
+        Returns every document of the view.
+        """
+        with self._lock:
+            return list(self.__docs.values())
+
+    def find(self, **equals):
+        """
+        Returns the documents whose fields equal the given values, e.g. find(type='post', author='bob').
+        Indexed fields are looked up, the remaining ones filter the indexed candidates,
+        and only a query without any indexed field scans every document.
+        """
+        equals = {field: freeze(value) for field, value in equals.items()}
+        with self._lock:
+            candidates = None
+            rest = {}
+            for field, value in equals.items():
+                ids = self.__lookup(field, value)
+                if ids is None:
+                    rest[field] = value
+                    continue
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates: return []
+            docs = self.__docs.values() if candidates is None else (self.__docs[i] for i in candidates)
+            return [doc for doc in docs if all(field in doc and doc[field] == value for field, value in rest.items())]
+
+    def range(self, field, low=None, high=None, include_low=True, include_high=False, reverse=False):
+        """
+        Returns the documents whose field lies between low and high, ordered by that field.
+        Args:
+            field (str): A field with a sorted index.
+            low: The lower bound, unbounded if None.
+            high: The upper bound, unbounded if None.
+            include_low (bool): Whether the lower bound is inclusive.
+            include_high (bool): Whether the upper bound is inclusive.
+            reverse (bool): Return the documents in descending order.
+        """
+        if field not in self.__sorted:
+            raise KeyError(f"No sorted index on field '{field}'")
+        with self._lock:
+            index = self.__sorted[field]
+            start, stop = 0, len(index)
+            if low is not None:
+                key = _sort_key(low)
+                start = bisect_left(index, (key,)) if include_low else bisect_right(index, (key, chr(0x10ffff)))
+            if high is not None:
+                key = _sort_key(high)
+                stop = bisect_right(index, (key, chr(0x10ffff))) if include_high else bisect_left(index, (key,))
+            if low is None or high is None:
+                # Keep to the type of the given bound, numbers and strings don't compare
+                rank = _sort_key(low if low is not None else high)
+                if rank is not None:
+                    start = max(start, bisect_left(index, ((rank[0],),)))
+                    stop = min(stop, bisect_left(index, ((rank[0] + 1,),)))
+            ids = [doc_id for _key, doc_id in index[start:stop]]
+            if reverse: ids.reverse()
+            return [self.__docs[doc_id] for doc_id in ids]
+
+    def __lookup(self, field, value):
+        """
+        Returns the ids with field equal to value from an index, or None if the field isn't indexed.
+        """
+        if field in self.__hash:
+            try:
+                return set(self.__hash[field].get(value, ()))
+            except TypeError:
+                return set()
+        if field in self.__sorted:
+            key = _sort_key(value)
+            if key is None: return set()
+            index = self.__sorted[field]
+            return {doc_id for _key, doc_id in index[bisect_left(index, (key,)):bisect_right(index, (key, chr(0x10ffff)))]}
+        return None
+
+    def _apply_entry(self, entry):
+        """
+        Apply a docstore oplog entry to the view, or hold it back while the view is loading.
+        """
+        with self._lock:
+            if self.__loading is not None:
+                self.__loading.append(entry)
+                return
+            payload = entry.get('payload', {})
+            if payload.get('op') == 'PUT' and isinstance(payload.get('value'), dict):
+                self.put(payload['value'])
+            elif payload.get('op') == 'DEL' and payload.get('key') is not None:
+                self.remove(payload['key'])
+
+    def _follow(self, follower):
+        self.__follower = follower
+        return self
+
+    def unfollow(self):
+        """
+        Stop following the database events. For a view of an AsyncDB, await the result.
+        """
+        follower, self.__follower = self.__follower, None
+        if follower is not None: return follower.stop()
+
+
+class _ViewEvents ():
+    """
+    Applies database events to a DocView instead of a cache.
+    """
+    def _apply(self, event):
+        with self._lock:
+            self._received += 1
+        entry = event_entry(event.data) if event.event in ('write', 'replicate.progress') else None
+        if entry is not None:
+            self._view._apply_entry(entry)
+        elif event.event != 'write':
+            self._clear()
+
+
+class DocViewFollower (_ViewEvents, CacheInvalidator):
+    """
+    Keeps a DocView current from the write events of its DB; replication or a reconnect reloads it from all().
+    """
+    def __init__(self, db, view, events=('write', 'replicated'), reconnect_delay=1.0):
+        super().__init__(db, events, False, reconnect_delay)
+        self._view = view
+
+    def _clear(self):
+        self._view._begin_load()
+        try:
+            self._view.load(self._db.all(cache=False))
+        except BaseException:
+            self._view._end_load()
+            raise
+        with self._lock:
+            self._cleared += 1
+
+
+class AsyncDocViewFollower (_ViewEvents, AsyncCacheInvalidator):
+    """
+    The asyncio counterpart of DocViewFollower.
+    """
+    def __init__(self, db, view, events=('write', 'replicated'), reconnect_delay=1.0):
+        super().__init__(db, events, False, reconnect_delay)
+        self._view = view
+        self.__reload = None
+
+    def _clear(self):
+        if self.__reload is None or self.__reload.done():
+            self._view._begin_load()
+            self.__reload = asyncio.ensure_future(self.__load())
+        with self._lock:
+            self._cleared += 1
+
+    async def __load(self):
+        try:
+            self._view.load(await self._db.all(cache=False))
+        except Exception:
+            self._view._end_load()
+            self.logger.warning(f'Reloading the view of {self._db.dbname} failed', exc_info=True)
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import os
+import struct
+import threading
+
+from .entry import Entry
+
+MAGIC = b'orbitdb-replica 1\n'
+RECORD_HEADER = struct.Struct('>HI')
+
+
+class _Replica ():
+    """
+    The log file shared by Replica and AsyncReplica.
+
+    The file starts with MAGIC and a JSON line naming the database, followed by one record per
+    entry in log order: the lengths of the hash and of the body, the hash, and the entry encoded by
+    the client's codec. Opening the file reads only the record headers and hashes to rebuild the
+    index from hash to body offset; a record cut short by a crash is truncated.
+    """
+    def __init__(self, db, path, fsync=False):
+        db._require('iterator')
+        self._db = db
+        self._codec = db.client.codec
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._index = {}
+        self._stats = {'syncs': 0, 'fetched': 0, 'skipped': 0}
+        self._file = open(path, 'a+b')
+        try:
+            self._load(path)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _load(self, path):
+        file = self._file
+        file.seek(0)
+        header = file.readline()
+        if not header:
+            file.write(MAGIC + json.dumps({'id': self._db.id}).encode() + b'\n')
+            file.flush()
+            return
+        if header != MAGIC:
+            raise ValueError(f'{path} is not a replica log')
+        db_id = json.loads(file.readline()).get('id')
+        if db_id != self._db.id:
+            raise ValueError(f'{path} is the replica of {db_id}, not of {self._db.id}')
+        size = os.fstat(file.fileno()).st_size
+        offset = file.tell()
+        while offset + RECORD_HEADER.size <= size:
+            hash_length, body_length = RECORD_HEADER.unpack(file.read(RECORD_HEADER.size))
+            body_offset = offset + RECORD_HEADER.size + hash_length
+            if body_offset + body_length > size: break
+            self._index[file.read(hash_length).decode()] = (body_offset, body_length)
+            offset = body_offset + body_length
+            file.seek(offset)
+        if offset < size:
+            file.truncate(offset)
+
+    @property
+    def db(self):
+        return self._db
+
+    @property
+    def head(self):
+        """
+        Returns the hash of the newest local entry, or None while the replica is empty.
+        """
+        return next(reversed(self._index), None)
+
+    @property
+    def stats(self):
+        """
+        Returns the number of local entries and log bytes, syncs made, entries fetched, and entries skipped as already known.
+        """
+        return {**self._stats, 'entries': len(self._index), 'bytes': os.fstat(self._file.fileno()).st_size}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, entry_hash):
+        return entry_hash in self._index
+
+    def get(self, entry_hash, default=None):
+        """
+        Returns the local entry with the given hash, or default.
+        """
+        location = self._index.get(entry_hash)
+        if location is None: return default
+        return self._decode(location)
+
+    def __iter__(self):
+        return self.entries()
+
+    def entries(self, reverse=False, gt=None):
+        """
+        Iterate the local entries in log order.
+        Args:
+            reverse (bool): Start from the newest entry.
+            gt (str): Only the entries after this hash.
+        """
+        hashes = list(self._index)
+        if gt is not None:
+            hashes = hashes[hashes.index(gt) + 1:] if gt in self._index else []
+        for entry_hash in (reversed(hashes) if reverse else hashes):
+            yield self._decode(self._index[entry_hash])
+
+    def _decode(self, location):
+        offset, length = location
+        entry = self._codec.loads(os.pread(self._file.fileno(), length, offset))
+        return Entry.from_dict(entry) if self._db.typed_entries else entry
+
+    def _append(self, entries):
+        """
+        Append the entries not stored yet. The caller holds the lock. Returns the number appended.
+        """
+        records = []
+        offset = os.fstat(self._file.fileno()).st_size
+        appended = {}
+        for entry in entries:
+            entry_hash = entry.get('hash')
+            if entry_hash is None or entry_hash in self._index or entry_hash in appended:
+                self._stats['skipped'] += 1
+                continue
+            hash_bytes = entry_hash.encode()
+            body = self._codec.dumps(entry)
+            records.append(RECORD_HEADER.pack(len(hash_bytes), len(body)) + hash_bytes + body)
+            offset += RECORD_HEADER.size + len(hash_bytes)
+            appended[entry_hash] = (offset, len(body))
+            offset += len(body)
+        if not records: return 0
+        self._file.write(b''.join(records))
+        self._file.flush()
+        if self._fsync: os.fsync(self._file.fileno())
+        self._index.update(appended)
+        self._stats['fetched'] += len(appended)
+        return len(appended)
+
+    def _sync_options(self, full):
+        """
+        Returns the iterator options fetching the entries to sync.
+        """
+        head = self.head
+        return {'limit': -1} if full or head is None else {'gt': head, 'limit': -1}
+
+    def _close(self):
+        if not self._file.closed: self._file.close()
+
+
+class Replica (_Replica):
+    """
+    An incremental local copy of a feed or eventlog in an append-only file. sync() fetches only the
+    entries newer than the local head with the 'gt' iterator option, so each poll costs in proportion
+    to the new entries rather than the size of the log. Entries are read back locally by hash or in log order.
+    Create it with DB.replica().
+    Example:
+        with mydb.replica('/var/lib/app/events.log') as replica:
+            replica.sync()
+            for entry in replica.entries(gt=last_processed):
+                process(entry)
+    """
+    def __init__(self, db, path, fsync=False):
+        """
+        Args:
+            db (DB): The feed or eventlog.
+            path (str): The log file, created if missing.
+            fsync (bool): Force every sync to disk before returning (default=False).
+        """
+        super().__init__(db, path, fsync)
+
+    def sync(self, full=False, chunk_size=1000):
+        """
+        Fetch the entries newer than the local head and append them. Returns the number of new entries.
+        Entries that replication merged in with a clock older than the head are not newer than it:
+        full=True walks the whole log and appends every entry missing locally.
+        Args:
+            full (bool): Walk the whole log instead of the entries after the head.
+            chunk_size (int): Entries written to the file at once while streaming.
+        """
+        with self._lock:
+            endpoint = self._db._endpoint('rawiterator')
+            appended = 0
+            chunk = []
+            for entry in self._db._stream_items(endpoint, json=self._sync_options(full)):
+                chunk.append(entry)
+                if len(chunk) >= chunk_size:
+                    appended += self._append(chunk)
+                    chunk = []
+            appended += self._append(chunk)
+            self._stats['syncs'] += 1
+            return appended
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncReplica (_Replica):
+    """
+    The asyncio counterpart of Replica for an AsyncDB: sync() is a coroutine and writes to the file
+    in the default executor. Local reads are plain file reads. Create it with AsyncDB.replica().
+    """
+    async def sync(self, full=False, chunk_size=1000):
+        """
+        Fetch the entries newer than the local head and append them, see Replica.sync().
+        """
+        loop = asyncio.get_running_loop()
+        endpoint = self._db._endpoint('rawiterator')
+        appended = 0
+        chunk = []
+        async for entry in self._db._stream_items(endpoint, json=self._sync_options(full)):
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                appended += await loop.run_in_executor(None, self._locked_append, chunk)
+                chunk = []
+        appended += await loop.run_in_executor(None, self._locked_append, chunk)
+        self._stats['syncs'] += 1
+        return appended
+
+    def _locked_append(self, entries):
+        with self._lock:
+            return self._append(entries)
+
+    async def close(self):
+        with self._lock:
+            self._close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
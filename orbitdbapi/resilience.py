@@ -0,0 +1,225 @@
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+
+_breakers_lock = threading.Lock()
+_breakers = {}
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'DELETE'])
+
+
+class CircuitOpenError(httpx.TransportError):
+    pass
+
+
+class RetryPolicy ():
+    """
+    Decides which failed requests are retried and how long to back off before the next attempt.
+    Only idempotent calls are retried: GET and DELETE requests, and opening a database.
+    """
+    def __init__(self, retries=0, backoff=0.1, max_backoff=5.0, statuses=(429, 502, 503, 504)):
+        """
+        Args:
+            retries (int): The most retries per call (default=0, never retry).
+            backoff (float): Seconds before the first retry, doubled for every further one (default=0.1).
+            max_backoff (float): The longest back off in seconds (default=5.0).
+            statuses (tuple): HTTP statuses that are retried like connection errors and timeouts.
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+
+    def applies(self, method, endpoint):
+        """
+        Returns whether a call may be retried.
+        Args:
+            method (str): The HTTP method.
+            endpoint (str): The endpoint template, see metrics.endpoint_template().
+        """
+        return self.retries > 0 and (method in IDEMPOTENT_METHODS or (method == 'POST' and endpoint == 'db/{db}'))
+
+    def delay(self, attempt, res=None):
+        """
+        Returns the seconds to wait after a failed attempt: exponential back off with full jitter,
+        or the Retry-After header of the response when it asks for longer.
+        Args:
+            attempt (int): The attempt that failed, starting at 1.
+            res (httpx.Response): The failed response, if there was one.
+        """
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        retry_after = res.headers.get('Retry-After') if res is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(self.max_backoff, float(retry_after)))
+        return delay
+
+
+def retry_policy(config):
+    """
+    Build the retry policy from client configuration options.
+    Args:
+        config (dict): Client configuration options.
+            - 'retries': The most retries per idempotent call (int, default=0).
+            - 'retry_backoff', 'retry_max_backoff': Seconds of the first and the longest back off (float, default=0.1 and 5.0).
+            - 'retry_statuses': HTTP statuses that are retried (tuple, default=(429, 502, 503, 504)).
+    """
+    return RetryPolicy(
+        retries=config.get('retries', 0),
+        backoff=config.get('retry_backoff', 0.1),
+        max_backoff=config.get('retry_max_backoff', 5.0),
+        statuses=config.get('retry_statuses', (429, 502, 503, 504)))
+
+
+class CircuitBreaker ():
+    """
+    Stops sending requests to an API node after consecutive failures, so callers fail fast instead of
+    pinning threads on timeouts. After reset_timeout seconds one trial request is let through: its
+    success closes the circuit again, its failure keeps it open for another reset_timeout. Thread-safe.
+    """
+    def __init__(self, failures=5, reset_timeout=30.0):
+        """
+        Args:
+            failures (int): Consecutive failures (connection errors, timeouts and 5xx responses) that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a trial request.
+        """
+        self.__failures = failures
+        self.__reset_timeout = reset_timeout
+        self.__lock = threading.Lock()
+        self.__consecutive = 0
+        self.__opened_at = None
+        self.__trial = False
+        self.__stats = {'failures': 0, 'rejected': 0, 'opened': 0}
+
+    @property
+    def state(self):
+        """
+        Returns 'closed', 'open' or 'half_open'.
+        """
+        with self.__lock:
+            if self.__opened_at is None: return 'closed'
+            return 'half_open' if time.monotonic() - self.__opened_at >= self.__reset_timeout else 'open'
+
+    @property
+    def stats(self):
+        with self.__lock:
+            return {**self.__stats, 'consecutive_failures': self.__consecutive}
+
+    def allow(self):
+        """
+        Raise CircuitOpenError unless a request may be sent now.
+        """
+        with self.__lock:
+            if self.__opened_at is None: return
+            if not self.__trial and time.monotonic() - self.__opened_at >= self.__reset_timeout:
+                self.__trial = True
+                return
+            self.__stats['rejected'] += 1
+        raise CircuitOpenError('Circuit breaker is open after repeated failures of the OrbitDB API')
+
+    def success(self):
+        with self.__lock:
+            self.__consecutive = 0
+            self.__opened_at = None
+            self.__trial = False
+
+    def release(self):
+        """
+        Report a request that ended without an outcome, e.g. cancelled, so another trial request may be sent.
+        """
+        with self.__lock:
+            self.__trial = False
+
+    def failure(self):
+        with self.__lock:
+            self.__consecutive += 1
+            self.__stats['failures'] += 1
+            if self.__trial or (self.__opened_at is None and self.__consecutive >= self.__failures):
+                if self.__opened_at is None: self.__stats['opened'] += 1
+                self.__opened_at = time.monotonic()
+                self.__trial = False
+
+
+def circuit_breaker(config):
+    """
+    Returns the circuit breaker of the client, or None when it is disabled. Clients of the process
+    talking to the same base url and nodes with the same breaker settings share one breaker.
+    Args:
+        config (dict): Client configuration options.
+            - 'circuit_breaker': Enable the circuit breaker (bool, default=False).
+            - 'breaker_failures': Consecutive failures that open the circuit (int, default=5).
+            - 'breaker_reset_timeout': Seconds before a trial request (float, default=30).
+    """
+    if not config.get('circuit_breaker', False): return None
+    failures, reset_timeout = config.get('breaker_failures', 5), config.get('breaker_reset_timeout', 30.0)
+    key = (config.get('base_url'), tuple(config.get('nodes') or ()), failures, reset_timeout)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker(failures, reset_timeout)
+        return breaker
+
+
+class LatencyTracker ():
+    """
+    Keeps the latencies of recent GET requests and the percentile after which a read is hedged. Thread-safe.
+    """
+    def __init__(self, percentile=95, window=1000, min_samples=50, min_delay=0.005):
+        """
+        Args:
+            percentile (float): The latency percentile after which a second request is sent.
+            window (int): The number of recent latencies kept.
+            min_samples (int): No hedging until this many latencies were seen.
+            min_delay (float): The shortest hedge delay in seconds.
+        """
+        self.__percentile = percentile
+        self.__min_samples = min_samples
+        self.__min_delay = min_delay
+        self.__lock = threading.Lock()
+        self.__latencies = deque(maxlen=window)
+        self.__since_update = 0
+        self.__threshold = None
+        self.__stats = {'hedged': 0, 'hedge_won': 0}
+
+    def record(self, seconds):
+        with self.__lock:
+            self.__latencies.append(seconds)
+            self.__since_update += 1
+            if len(self.__latencies) >= self.__min_samples and (self.__threshold is None or self.__since_update >= self.__min_samples):
+                ordered = sorted(self.__latencies)
+                index = min(len(ordered) - 1, int(len(ordered) * self.__percentile / 100))
+                self.__threshold = max(self.__min_delay, ordered[index])
+                self.__since_update = 0
+
+    def threshold(self):
+        """
+        Returns the seconds to wait before hedging, or None while there are too few samples.
+        """
+        return self.__threshold
+
+    def hedged(self, won):
+        with self.__lock:
+            self.__stats['hedged'] += 1
+            if won: self.__stats['hedge_won'] += 1
+
+    @property
+    def stats(self):
+        """
+        Returns the number of hedged reads, how many of them the second request won, and the current hedge delay.
+        """
+        with self.__lock:
+            return {**self.__stats, 'threshold': self.__threshold}
+
+
+def latency_tracker(config):
+    """
+    Build the latency tracker for hedged reads, or None when they are disabled.
+    Args:
+        config (dict): Client configuration options.
+            - 'hedge_reads': Send a second GET request when the first is slower than usual (bool, default=False).
+            - 'hedge_percentile': The latency percentile of recent GETs after which to hedge (float, default=95).
+    """
+    if not config.get('hedge_reads', False): return None
+    return LatencyTracker(config.get('hedge_percentile', 95))
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+
+class _Call ():
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _AsyncCall ():
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight ():
+    """
+    Deduplicates concurrent calls with the same key: while a call is in flight,
+    callers with the same key wait for it and share its result instead of repeating it.
+    Thread-safe.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._total = 0
+        self._coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Call fn, or wait for the in-flight call with the same key.
+        Args:
+            key (hashable): Identifies calls that can share a result.
+            fn (callable): Performs the call.
+        Returns:
+            A (result, leader) tuple, where leader is False when the result is shared with another caller.
+        """
+        with self._lock:
+            self._total += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None: raise call.error
+            return call.result, False
+        try:
+            call.result = fn()
+            return call.result, True
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @property
+    def stats(self):
+        """
+        Returns the number of calls and how many of them were coalesced into another call.
+        """
+        with self._lock:
+            return {'calls': self._total, 'coalesced': self._coalesced, 'in_flight': len(self._calls)}
+
+
+class AsyncSingleFlight (SingleFlight):
+    """
+    The asyncio counterpart of SingleFlight: concurrent coroutines with the same key share one call,
+    run as a task of its own so that cancelling one caller does not cancel the others.
+    The call is cancelled once all of its callers are.
+    """
+    async def do(self, key, fn):
+        """
+        Await fn(), or the in-flight call with the same key. See SingleFlight.do().
+        Args:
+            key (hashable): Identifies calls that can share a result.
+            fn (callable): Returns the awaitable performing the call.
+        """
+        with self._lock:
+            self._total += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+                call.task.add_done_callback(lambda _task: self.__forget(key, call))
+            else:
+                self._coalesced += 1
+            call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), leader
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = not call.waiters and not call.task.done()
+                if abandoned and self._calls.get(key) is call: del self._calls[key]
+            if abandoned: call.task.cancel()
+
+    def __forget(self, key, call):
+        with self._lock:
+            if self._calls.get(key) is call: del self._calls[key]
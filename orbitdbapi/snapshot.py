@@ -0,0 +1,105 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class Snapshot ():
+    """
+    A persistent copy of DB caches in a local sqlite file, so a restarted process can warm up
+    from disk and only fetch what changed. Each database is keyed by its id and stored with the
+    hash of its head entry, when it has one. Reads are memory-mapped.
+    Args:
+        path (str): The sqlite file, created if missing.
+        mmap_size (int): Bytes of the file to memory-map for reads.
+    Example:
+        snapshot = Snapshot('/var/cache/orbitdb.sqlite')
+        mydb.warm_start(snapshot)
+        ...
+        mydb.save_snapshot(snapshot)
+    """
+    def __init__(self, path, mmap_size=256 * 2**20):
+        self.__path = path
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.execute('PRAGMA synchronous=NORMAL')
+        self.__conn.execute(f'PRAGMA mmap_size={int(mmap_size)}')
+        self.__conn.execute('CREATE TABLE IF NOT EXISTS meta (db_id TEXT PRIMARY KEY, head TEXT, saved_at REAL NOT NULL)')
+        self.__conn.execute('CREATE TABLE IF NOT EXISTS entries (db_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+                            'PRIMARY KEY (db_id, key)) WITHOUT ROWID')
+
+    @property
+    def path(self):
+        return self.__path
+
+    def close(self):
+        with self.__lock:
+            self.__conn.close()
+
+    def meta(self, db_id):
+        """
+        Returns {'head': str or None, 'saved_at': float} for a saved database, or None.
+        """
+        with self.__lock:
+            row = self.__conn.execute('SELECT head, saved_at FROM meta WHERE db_id = ?', (db_id,)).fetchone()
+        if row is None: return None
+        return {'head': row[0], 'saved_at': row[1]}
+
+    def load(self, db_id):
+        """
+        Returns the saved (key, value) pairs of a database.
+        """
+        with self.__lock:
+            rows = self.__conn.execute('SELECT key, value FROM entries WHERE db_id = ?', (db_id,)).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def save(self, db_id, items, head=None, replace=True, removed=()):
+        """
+        Save the entries of a database in one transaction.
+        Args:
+            db_id (str): The id of the database.
+            items: A mapping or iterable of (key, value) pairs.
+            head (str): The hash of the head entry the entries are current to.
+            replace (bool): Replace every saved entry of the database, otherwise merge into them.
+            removed (iterable): Keys to delete when merging.
+        """
+        if hasattr(items, 'items'): items = items.items()
+        rows = [(db_id, str(key), json.dumps(value, default=_thawed)) for key, value in items]
+        with self.__lock:
+            with _transaction(self.__conn):
+                if replace:
+                    self.__conn.execute('DELETE FROM entries WHERE db_id = ?', (db_id,))
+                else:
+                    self.__conn.executemany('DELETE FROM entries WHERE db_id = ? AND key = ?', ((db_id, str(k)) for k in removed))
+                self.__conn.executemany('INSERT OR REPLACE INTO entries (db_id, key, value) VALUES (?, ?, ?)', rows)
+                self.__conn.execute('INSERT OR REPLACE INTO meta (db_id, head, saved_at) VALUES (?, ?, ?)', (db_id, head, time.time()))
+
+    def drop(self, db_id):
+        """
+        Delete everything saved for a database.
+        """
+        with self.__lock:
+            with _transaction(self.__conn):
+                self.__conn.execute('DELETE FROM entries WHERE db_id = ?', (db_id,))
+                self.__conn.execute('DELETE FROM meta WHERE db_id = ?', (db_id,))
+
+
+class _transaction ():
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN')
+
+    def __exit__(self, exc_type, *exc_info):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+def _thawed(value):
+    """
+    JSON-encode the read-only mappings and frozensets of frozen cache values.
+    """
+    if hasattr(value, 'items'): return dict(value.items())
+    if isinstance(value, frozenset): return list(value)
+    raise TypeError(f'Object of type {value.__class__.__name__} is not JSON serializable')
@@ -0,0 +1,80 @@
+class Event ():
+    """
+    A single server-sent event.
+    """
+    def __init__(self, id=None, event='message', data='', retry=None):
+        self.id = id
+        self.event = event
+        self.data = data
+        self.retry = retry
+
+    def __repr__(self):
+        return f'Event(id={self.id!r}, event={self.event!r}, data={self.data!r})'
+
+
+class EventParser ():
+    """
+    Incremental parser turning lines of an SSE stream into Event objects.
+    """
+    def __init__(self):
+        self.__reset()
+
+    def __reset(self):
+        self.__id = None
+        self.__event = 'message'
+        self.__data = []
+        self.__retry = None
+
+    def feed(self, line):
+        """
+        Feed a single line (without its line terminator).
+        Returns an Event when the line completes one, otherwise None.
+        Args:
+            line (str): The line to parse.
+        """
+        if not line:
+            if not self.__data:
+                self.__reset()
+                return None
+            event = Event(self.__id, self.__event, '\n'.join(self.__data), self.__retry)
+            self.__reset()
+            return event
+        if line.startswith(':'):
+            return None
+        field, _sep, value = line.partition(':')
+        if value.startswith(' '): value = value[1:]
+        if field == 'data':
+            self.__data.append(value)
+        elif field == 'event':
+            self.__event = value
+        elif field == 'id':
+            self.__id = value
+        elif field == 'retry' and value.isdigit():
+            self.__retry = int(value)
+        return None
+
+
+def iter_events(lines):
+    """
+    Iterate the events of an SSE stream.
+    Args:
+        lines: An iterable of decoded lines, e.g. httpx's Response.iter_lines().
+    """
+    parser = EventParser()
+    for line in lines:
+        event = parser.feed(line.rstrip('\r\n'))
+        if event is not None:
+            yield event
+
+
+async def aiter_events(lines):
+    """
+    Asynchronously iterate the events of an SSE stream.
+    Args:
+        lines: An async iterable of decoded lines, e.g. httpx's Response.aiter_lines().
+    """
+    parser = EventParser()
+    async for line in lines:
+        event = parser.feed(line.rstrip('\r\n'))
+        if event is not None:
+            yield event
@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import time
+
+from .invalidation import args_entry
+from .resilience import RetryPolicy
+
+
+class DBEvent ():
+    """
+    A decoded event of a database, as delivered by EventSubscriptions.
+    'reconnected' events mark a stream that was reopened, after which events may have been missed.
+    """
+    __slots__ = ('db', 'event', 'args', 'received_at')
+
+    def __init__(self, db, event, args, received_at):
+        self.db = db
+        self.event = event
+        self.args = args
+        self.received_at = received_at
+
+    @property
+    def entry(self):
+        """
+        Returns the oplog entry carried by a write or replicate.progress event, or None.
+        """
+        return args_entry(self.args)
+
+    def __repr__(self):
+        return f'DBEvent(db={self.db!r}, event={self.event!r}, args={self.args!r})'
+
+
+class Subscription ():
+    """
+    The event stream of one database followed by EventSubscriptions.
+    """
+    def __init__(self, db, events):
+        self.db = db
+        self.events = tuple(events)
+        self.task = None
+        self.connected = False
+        self.received = 0
+        self.reconnects = 0
+        self.last_event_at = None
+
+    @property
+    def stats(self):
+        """
+        Returns whether the stream is connected, the events received, reconnects and the time.time() of the last event.
+        """
+        return {'connected': self.connected, 'received': self.received, 'reconnects': self.reconnects,
+                'last_event_at': self.last_event_at}
+
+
+class EventSubscriptions ():
+    """
+    Follows the event streams of many AsyncDBs on one event loop and hands their decoded events
+    to a consumer in micro-batches. A dropped stream is reopened with jittered exponential back off.
+    The queue between the streams and the consumer holds at most max_pending events; while it is full
+    the streams stop reading, so a slow consumer applies back pressure instead of buffering without bound.
+    Every stream holds a connection: raise the client's max_connections above the number of subscriptions,
+    or use http2=True to multiplex them over one connection.
+    Example:
+        async with AsyncOrbitDbAPI(base_url='http://localhost:3000', max_connections=500) as client:
+            subscriptions = EventSubscriptions(max_batch=500, max_delay=0.1)
+            for name in names:
+                subscriptions.subscribe(await client.db(name), ('write', 'replicated'))
+            async for batch in subscriptions:
+                for event in batch:
+                    print(event.db, event.event, event.entry)
+    """
+    def __init__(self, max_batch=100, max_delay=0.05, max_pending=10000, backoff=0.5, max_backoff=30.0):
+        """
+        Args:
+            max_batch (int): The most events per batch (default=100).
+            max_delay (float): Seconds a batch waits for more events after its first one (default=0.05).
+            max_pending (int): The most events queued for the consumer (default=10000).
+            backoff (float): Seconds before the first reconnect, doubled for every further one (default=0.5).
+            max_backoff (float): The longest wait between reconnects in seconds (default=30).
+        """
+        if max_batch < 1: raise ValueError('max_batch must be at least 1')
+        self.logger = logging.getLogger(__name__)
+        self.__max_batch = max_batch
+        self.__max_delay = max_delay
+        self.__queue = asyncio.Queue(max_pending)
+        self.__backoff = RetryPolicy(backoff=backoff, max_backoff=max_backoff)
+        self.__subscriptions = {}
+        self.__closed = False
+        self.__stats = {'delivered': 0, 'batches': 0, 'lag': 0.0, 'max_lag': 0.0}
+
+    @property
+    def subscriptions(self):
+        """
+        Returns the Subscriptions by database address.
+        """
+        return dict(self.__subscriptions)
+
+    @property
+    def stats(self):
+        """
+        Returns the counters of all subscriptions:
+            - 'subscriptions', 'connected': Followed databases and their open streams.
+            - 'received', 'reconnects': Events read from the streams, and streams reopened.
+            - 'delivered', 'batches': Events and batches handed to the consumer.
+            - 'queued': Events waiting for the consumer.
+            - 'lag', 'max_lag': Seconds the oldest event of the last batch, and of any batch, waited for the consumer.
+        """
+        subscriptions = list(self.__subscriptions.values())
+        return {
+            'subscriptions': len(subscriptions),
+            'connected': sum(1 for s in subscriptions if s.connected),
+            'received': sum(s.received for s in subscriptions),
+            'reconnects': sum(s.reconnects for s in subscriptions),
+            'queued': self.__queue.qsize(),
+            **self.__stats,
+        }
+
+    def subscribe(self, db, events=('write',)):
+        """
+        Start following events of a database on the running loop. Subscribing to a database again replaces its event names.
+        Returns the Subscription.
+        Args:
+            db (AsyncDB): The database.
+            events (tuple): The event names, e.g. ('write', 'replicated').
+        """
+        if self.__closed: raise RuntimeError('The subscriptions are closed')
+        previous = self.__subscriptions.pop(db.id, None)
+        if previous is not None: previous.task.cancel()
+        subscription = Subscription(db, events)
+        subscription.task = asyncio.get_running_loop().create_task(self.__follow(subscription))
+        self.__subscriptions[db.id] = subscription
+        return subscription
+
+    async def unsubscribe(self, db):
+        """
+        Stop following a database. Its events still queued are delivered.
+        """
+        subscription = self.__subscriptions.pop(db.id, None)
+        if subscription is None: return
+        subscription.task.cancel()
+        await asyncio.gather(subscription.task, return_exceptions=True)
+
+    async def close(self):
+        """
+        Stop following every database. Batches already queued can still be read, then iteration ends.
+        """
+        self.__closed = True
+        subscriptions = list(self.__subscriptions.values())
+        for subscription in subscriptions: subscription.task.cancel()
+        await asyncio.gather(*[s.task for s in subscriptions], return_exceptions=True)
+        try:
+            self.__queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            if self.__closed and self.__queue.empty(): raise StopAsyncIteration
+            batch = await self.get_batch()
+            if batch: return batch
+
+    async def get_batch(self, timeout=None):
+        """
+        Wait for events and return the next batch: up to max_batch events, collected for at most
+        max_delay seconds after the first one. Returns an empty list after timeout seconds without events.
+        """
+        if self.__closed and self.__queue.empty(): return []
+        try:
+            event = await asyncio.wait_for(self.__queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.__max_delay
+        batch = []
+        while event is not None:
+            batch.append(event)
+            if len(batch) >= self.__max_batch: break
+            try:
+                event = self.__queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0: break
+                try:
+                    event = await asyncio.wait_for(self.__queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        if batch:
+            lag = loop.time() - batch[0].received_at
+            self.__stats['delivered'] += len(batch)
+            self.__stats['batches'] += 1
+            self.__stats['lag'] = lag
+            self.__stats['max_lag'] = max(self.__stats['max_lag'], lag)
+        return batch
+
+    def __decode(self, db, data):
+        try:
+            return db.client.codec.loads(data)
+        except ValueError:
+            return data
+
+    async def __follow(self, subscription):
+        db = subscription.db
+        loop = asyncio.get_running_loop()
+        eventnames = ','.join(subscription.events)
+        connected_before = False
+        attempt = 0
+        while True:
+            try:
+                async with db._open_events(eventnames) as events:
+                    subscription.connected = True
+                    attempt = 0
+                    if connected_before:
+                        subscription.reconnects += 1
+                        await self.__queue.put(DBEvent(db.id, 'reconnected', None, loop.time()))
+                    connected_before = True
+                    async for event in events:
+                        subscription.received += 1
+                        subscription.last_event_at = time.time()
+                        await self.__queue.put(DBEvent(db.id, event.event, self.__decode(db, event.data), loop.time()))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.logger.warning(f'Event stream of {db.dbname} failed, reconnecting', exc_info=True)
+            finally:
+                subscription.connected = False
+            attempt += 1
+            await asyncio.sleep(self.__backoff.delay(attempt))
@@ -0,0 +1,213 @@
+import ssl
+import threading
+
+import httpx
+
+from .balancer import AsyncBalancedTransport, BalancedTransport, node_balancer
+
+_shared_lock = threading.Lock()
+_shared_transports = {}
+
+
+def pool_limits(config):
+    """
+    Build the connection pool limits from client configuration options.
+    Args:
+        config (dict): Client configuration options.
+            - 'max_connections': Maximum number of open connections (int, default=100).
+            - 'max_keepalive_connections': Maximum number of idle connections kept alive (int, default=20).
+            - 'keepalive_expiry': Seconds an idle connection is kept alive (float, default=5.0).
+    """
+    return httpx.Limits(
+        max_connections=config.get('max_connections', 100),
+        max_keepalive_connections=config.get('max_keepalive_connections', 20),
+        keepalive_expiry=config.get('keepalive_expiry', 5.0))
+
+
+def timeouts(config):
+    """
+    Build the request timeouts from client configuration options.
+    Args:
+        config (dict): Client configuration options.
+            - 'timeout': Default for every timeout below (float, default=30).
+            - 'connect_timeout', 'read_timeout', 'write_timeout', 'pool_timeout': Override a single timeout (float).
+    """
+    default = config.get('timeout', 30)
+    return httpx.Timeout(
+        default,
+        connect=config.get('connect_timeout', default),
+        read=config.get('read_timeout', default),
+        write=config.get('write_timeout', default),
+        pool=config.get('pool_timeout', default))
+
+
+def stream_timeout(timeout):
+    """
+    Returns timeout without a read timeout, for long-lived streams such as event subscriptions.
+    Args:
+        timeout (httpx.Timeout): The default timeouts of the client.
+    """
+    return httpx.Timeout(connect=timeout.connect, read=None, write=timeout.write, pool=timeout.pool)
+
+
+class _PoolStats ():
+    """
+    Counts the requests passing through a transport.
+    """
+    def __init__(self, transport, limits):
+        self._transport = transport
+        self._limits = limits
+        self._lock = threading.Lock()
+        self._users = 1
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._requests = 0
+
+    def _started(self):
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def _finished(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _acquire(self):
+        with self._lock:
+            self._users += 1
+        return self
+
+    def _release(self):
+        """
+        Returns True when the last user released the transport.
+        """
+        with self._lock:
+            self._users -= 1
+            return self._users <= 0
+
+    @property
+    def stats(self):
+        """
+        Returns the pool utilization counters as a dict.
+            - 'in_flight': Requests waiting for their response headers.
+            - 'peak_in_flight': The highest in_flight seen.
+            - 'requests': Requests sent.
+            - 'connections', 'idle_connections': Open and idle connections of the pool, if the transport exposes them.
+            - 'max_connections', 'max_keepalive_connections': The pool limits.
+            - 'users': Clients sharing the transport.
+        """
+        pool = getattr(self._transport, '_pool', None)
+        connections = list(getattr(pool, 'connections', []))
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'peak_in_flight': self._peak_in_flight,
+                'requests': self._requests,
+                'connections': len(connections),
+                'idle_connections': sum(1 for c in connections if c.is_idle()),
+                'max_connections': self._limits.max_connections,
+                'max_keepalive_connections': self._limits.max_keepalive_connections,
+                'users': self._users,
+            }
+
+
+class PooledTransport (_PoolStats, httpx.BaseTransport):
+    """
+    Wraps an httpx.HTTPTransport to count pool utilization and to let several clients share it.
+    The wrapped transport is closed when the last client using it is closed.
+    """
+    def __init__(self, transport, limits, key=None):
+        super().__init__(transport, limits)
+        self._key = key
+
+    def handle_request(self, request):
+        self._started()
+        try:
+            return self._transport.handle_request(request)
+        finally:
+            self._finished()
+
+    def close(self):
+        if self._release():
+            _forget(self._key, self)
+            self._transport.close()
+
+
+class AsyncPooledTransport (_PoolStats, httpx.AsyncBaseTransport):
+    """
+    The asyncio counterpart of PooledTransport.
+    """
+    def __init__(self, transport, limits, key=None):
+        super().__init__(transport, limits)
+        self._key = key
+
+    async def handle_async_request(self, request):
+        self._started()
+        try:
+            return await self._transport.handle_async_request(request)
+        finally:
+            self._finished()
+
+    async def aclose(self):
+        if self._release():
+            _forget(self._key, self)
+            await self._transport.aclose()
+
+
+def _forget(key, transport):
+    if key is None: return
+    with _shared_lock:
+        if _shared_transports.get(key) is transport:
+            del _shared_transports[key]
+
+
+def make_transport(config, asynchronous=False):
+    """
+    Build the transport of a client from its configuration options, see pool_limits() for the pool options.
+    Args:
+        config (dict): Client configuration options.
+            - 'http2': Negotiate HTTP/2 over TLS and multiplex requests over few connections (bool, default=False).
+              Requires the h2 package, e.g. pip install orbitdbapi[http2].
+            - 'shared_transport': Share one connection pool between every client of the process created
+              with the same pool options (bool, default=False).
+            - 'nodes': Spread requests over several API nodes, see balancer.node_balancer().
+        asynchronous (bool): Build a transport for httpx.AsyncClient.
+    """
+    transport = _pooled_transport(config, asynchronous)
+    balancer = node_balancer(config)
+    if balancer is None: return transport
+    return (AsyncBalancedTransport if asynchronous else BalancedTransport)(transport, balancer, config['base_url'])
+
+
+def _plain_http(config):
+    """
+    Returns whether the base URL and every node are plain http URLs. Their transports skip loading the
+    CA certificates, which takes most of the time of creating a transport: they get an SSL context
+    without any trusted certificate, so a TLS connection fails instead of going unverified.
+    """
+    urls = [config.get('base_url') or '', *config.get('nodes', ())]
+    return all(url.startswith('http://') for url in urls)
+
+
+def _pooled_transport(config, asynchronous):
+    limits = pool_limits(config)
+    plain = _plain_http(config)
+    http2 = config.get('http2', False)
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            raise ImportError("Using http2=True requires the h2 package, install it with 'pip install orbitdbapi[http2]'") from None
+    transport_class, pooled_class = (httpx.AsyncHTTPTransport, AsyncPooledTransport) if asynchronous else (httpx.HTTPTransport, PooledTransport)
+    verify = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT) if plain else True
+    if not config.get('shared_transport', False):
+        return pooled_class(transport_class(limits=limits, http2=http2, verify=verify), limits)
+    key = (asynchronous, http2, plain, limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry)
+    with _shared_lock:
+        shared = _shared_transports.get(key)
+        if shared is not None:
+            return shared._acquire()
+        shared = pooled_class(transport_class(limits=limits, http2=http2, verify=verify), limits, key)
+        _shared_transports[key] = shared
+        return shared
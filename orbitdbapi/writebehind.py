@@ -0,0 +1,348 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, wait
+
+logger = logging.getLogger(__name__)
+_open_buffers = weakref.WeakSet()
+
+
+def _close_buffers():
+    """
+    Send the queued entries of the WriteBehind buffers still open at interpreter exit.
+    """
+    for buffer in list(_open_buffers):
+        try:
+            buffer.close()
+        except Exception:
+            logger.error(f'Could not send the queued entries of {buffer._db.dbname}', exc_info=True)
+
+
+atexit.register(_close_buffers)
+
+
+def _wake(changed):
+    with changed:
+        changed.notify_all()
+
+
+class BufferFullError(Exception):
+    pass
+
+
+class DroppedError(Exception):
+    pass
+
+
+class _WriteBehind ():
+    """
+    The batching state shared by WriteBehind and AsyncWriteBehind. Not thread-safe, callers hold their lock.
+    """
+    POLICIES = ('block', 'drop_new', 'drop_oldest', 'error')
+
+    def __init__(self, db, max_batch=100, max_delay=0.05, max_pending=10000, policy='block', concurrency=1, cache=None):
+        if max_batch < 1: raise ValueError('max_batch must be at least 1')
+        if max_pending < max_batch: raise ValueError('max_pending must be at least max_batch')
+        if policy not in self.POLICIES: raise ValueError(f'policy must be one of {", ".join(self.POLICIES)}')
+        db._require('add')
+        self._db = db
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._max_pending = max_pending
+        self._policy = policy
+        self._concurrency = concurrency
+        self._cache = cache
+        self._queue = deque()
+        self._sending = []
+        self._seq = 0
+        self._flush_seq = 0
+        self._closed = False
+        self._stats = {'added': 0, 'sent': 0, 'failed': 0, 'dropped': 0, 'batches': 0}
+
+    @property
+    def stats(self):
+        """
+        Returns the counters of the buffer: entries added, sent, failed and dropped, batches sent, and entries queued.
+        """
+        return {**self._stats, 'queued': len(self._queue)}
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def _full(self):
+        return len(self._queue) >= self._max_pending
+
+    def _check_open(self):
+        if self._closed: raise RuntimeError('The write-behind buffer is closed')
+
+    def _overflow(self, future):
+        """
+        Apply a non-blocking policy to an add() while the buffer is full.
+        Returns the future to fail with DroppedError, and whether the new entry is still queued.
+        """
+        if self._policy == 'error':
+            raise BufferFullError(f'{self._max_pending} entries are waiting to be added')
+        self._stats['dropped'] += 1
+        if self._policy == 'drop_new':
+            return future, False
+        return self._queue.popleft()[2], True
+
+    def _enqueue(self, item, future):
+        self._db._touch()
+        self._seq += 1
+        self._stats['added'] += 1
+        self._queue.append((self._seq, item, future, time.monotonic()))
+
+    def _wait_time(self):
+        """
+        Returns 0 when a batch is due, the seconds until the oldest queued entry is due, or None when the queue is empty.
+        """
+        if not self._queue: return None
+        seq, _item, _future, queued_at = self._queue[0]
+        if self._closed or seq <= self._flush_seq or len(self._queue) >= self._max_batch: return 0
+        return max(0, queued_at + self._max_delay - time.monotonic())
+
+    def _take_batch(self):
+        batch = [self._queue.popleft() for _c in range(min(self._max_batch, len(self._queue)))]
+        self._sending = [future for _seq, _item, future, _queued_at in batch]
+        return batch
+
+    def _request_flush(self):
+        """
+        Make everything queued so far due, and return the futures of the entries queued or being sent.
+        """
+        self._flush_seq = self._seq
+        return self._sending + [future for _seq, _item, future, _queued_at in self._queue]
+
+    def _results(self, batch, results):
+        """
+        Pair a sent batch with the (item, result) pairs of add_many() and count them.
+        """
+        if batch: self._stats['batches'] += 1
+        for (_seq, _item, future, _queued_at), (_item, result) in zip(batch, results):
+            self._stats['failed' if isinstance(result, Exception) else 'sent'] += 1
+            yield future, result
+
+    @staticmethod
+    def _dropped():
+        return DroppedError('The write-behind buffer was full')
+
+
+class WriteBehind (_WriteBehind):
+    """
+    A write-behind buffer for DB.add(): add() queues an entry and returns at once with a Future of its hash,
+    while a background thread sends the queued entries in batches with DB.add_many().
+    A batch is sent once max_batch entries are queued or the oldest one waited max_delay seconds.
+    The queued entries are sent by flush(), close(), DB.unload() and at interpreter exit.
+    Create it with DB.write_behind().
+    """
+    def __init__(self, db, **kwargs):
+        """
+        Args:
+            db (DB): The feed or eventlog to add to.
+            max_batch (int): The most entries sent per batch (default=100).
+            max_delay (float): Seconds an entry may wait for its batch to fill up (default=0.05).
+            max_pending (int): The most entries queued before the policy applies (default=10000).
+            policy (str): What add() does while max_pending entries are queued (default='block'):
+                'block' waits for room, 'drop_new' drops the new entry, 'drop_oldest' drops the oldest
+                queued entry, 'error' raises BufferFullError. Dropped entries' futures raise DroppedError.
+            concurrency (int): Requests in flight per batch (default=1). Above 1 the entries of a batch
+                may be appended to the log out of order.
+            cache (bool): Whether to cache the added entries, defaults to the db setting.
+        """
+        super().__init__(db, **kwargs)
+        self.__changed = threading.Condition()
+        self.__thread = threading.Thread(target=self.__run, args=(weakref.ref(self), self.__changed),
+                                         name=f'write-behind {db.dbname}', daemon=True)
+        self.__thread.start()
+        weakref.finalize(self, _wake, self.__changed)
+        _open_buffers.add(self)
+
+    def add(self, item, timeout=None):
+        """
+        Queue an entry to be added. Returns a concurrent.futures.Future of its entry hash.
+        Args:
+            item: The entry to add.
+            timeout (float): With the 'block' policy, seconds to wait for room before raising BufferFullError.
+        """
+        future = Future()
+        dropped = None
+        with self.__changed:
+            self._check_open()
+            if self._full():
+                if self._policy == 'block':
+                    if not self.__changed.wait_for(lambda: self._closed or not self._full(), timeout):
+                        raise BufferFullError(f'{self._max_pending} entries are waiting to be added')
+                    self._check_open()
+                else:
+                    dropped, queued = self._overflow(future)
+                    if not queued:
+                        dropped.set_exception(self._dropped())
+                        return future
+            self._enqueue(item, future)
+            self.__changed.notify_all()
+        if dropped is not None and dropped.set_running_or_notify_cancel(): dropped.set_exception(self._dropped())
+        return future
+
+    def flush(self, timeout=None):
+        """
+        Send everything queued now without waiting for max_delay, and wait until it is written.
+        Returns the futures of the entries that were queued or being sent.
+        Args:
+            timeout (float): Seconds to wait at most.
+        """
+        with self.__changed:
+            futures = self._request_flush()
+            self.__changed.notify_all()
+        wait(futures, timeout)
+        return futures
+
+    def close(self, timeout=None):
+        """
+        Stop accepting entries, send the queued ones and stop the background thread.
+        Returns the futures of the entries that were queued or being sent.
+        """
+        with self.__changed:
+            self._closed = True
+            futures = self._request_flush()
+            self.__changed.notify_all()
+        _open_buffers.discard(self)
+        wait(futures, timeout)
+        self.__thread.join(timeout)
+        return futures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def __run(ref, changed):
+        """
+        Send the queued entries in batches. The buffer is only held while entries are queued,
+        so that a buffer nobody uses any more can be garbage collected, which wakes the thread to end.
+        """
+        while True:
+            with changed:
+                buffer = ref()
+                if buffer is None: return
+                delay = buffer._wait_time()
+                if delay != 0:
+                    if delay is None:
+                        if buffer._closed: return
+                        buffer = None
+                    changed.wait(delay)
+                    continue
+                batch = buffer._take_batch()
+                changed.notify_all()
+            buffer.__send(batch)
+
+    def __send(self, batch):
+        # Claim the futures, so that they can't be cancelled any more, and leave out the cancelled entries
+        batch = [entry for entry in batch if entry[2].set_running_or_notify_cancel()]
+        items = [item for _seq, item, _future, _queued_at in batch]
+        try:
+            results = list(self._db.add_many(items, self._concurrency, self._cache)) if items else []
+        except Exception as ex:
+            results = [(item, ex) for item in items]
+        with self.__changed:
+            resolved = list(self._results(batch, results))
+            self._sending = []
+        for future, result in resolved:
+            if isinstance(result, Exception): future.set_exception(result)
+            else: future.set_result(result)
+
+
+class AsyncWriteBehind (_WriteBehind):
+    """
+    The asyncio counterpart of WriteBehind: batches are sent by a task, and add() returns an asyncio.Future.
+    Create it with AsyncDB.write_behind() from a running event loop.
+    """
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.__changed = asyncio.Condition()
+        self.__task = asyncio.get_running_loop().create_task(self.__run())
+
+    async def add(self, item, timeout=None):
+        """
+        Queue an entry to be added. Returns an asyncio.Future of its entry hash, see WriteBehind.add().
+        """
+        future = asyncio.get_running_loop().create_future()
+        async with self.__changed:
+            self._check_open()
+            if self._full():
+                if self._policy == 'block':
+                    try:
+                        await asyncio.wait_for(self.__changed.wait_for(lambda: self._closed or not self._full()), timeout)
+                    except asyncio.TimeoutError:
+                        raise BufferFullError(f'{self._max_pending} entries are waiting to be added') from None
+                    self._check_open()
+                else:
+                    dropped, queued = self._overflow(future)
+                    if not dropped.done(): dropped.set_exception(self._dropped())
+                    if not queued: return future
+            self._enqueue(item, future)
+            self.__changed.notify_all()
+        return future
+
+    async def flush(self, timeout=None):
+        """
+        Send everything queued now and wait until it is written, see WriteBehind.flush().
+        """
+        async with self.__changed:
+            futures = self._request_flush()
+            self.__changed.notify_all()
+        if futures: await asyncio.wait(futures, timeout=timeout)
+        return futures
+
+    async def close(self, timeout=None):
+        """
+        Stop accepting entries, send the queued ones and stop the task, see WriteBehind.close().
+        """
+        async with self.__changed:
+            self._closed = True
+            futures = self._request_flush()
+            self.__changed.notify_all()
+        if futures: await asyncio.wait(futures, timeout=timeout)
+        await asyncio.wait([self.__task], timeout=timeout)
+        return futures
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def __run(self):
+        while True:
+            async with self.__changed:
+                delay = self._wait_time()
+                while delay != 0:
+                    if delay is None and self._closed: return
+                    try:
+                        await asyncio.wait_for(self.__changed.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    delay = self._wait_time()
+                batch = self._take_batch()
+                self.__changed.notify_all()
+            await self.__send(batch)
+
+    async def __send(self, batch):
+        batch = [entry for entry in batch if not entry[2].cancelled()]
+        items = [item for _seq, item, _future, _queued_at in batch]
+        try:
+            results = [result async for result in self._db.add_many(items, self._concurrency, self._cache)] if items else []
+        except Exception as ex:
+            results = [(item, ex) for item in items]
+        for future, result in self._results(batch, results):
+            if future.done(): continue
+            if isinstance(result, Exception): future.set_exception(result)
+            else: future.set_result(result)
+        self._sending = []
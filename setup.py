@@ -13,9 +13,15 @@ setup(
     url='https://github.com/orbitdb/py-orbit-db-http-client',
     packages=find_packages(),
     install_requires=[
-        'httpx >= 0.7.5',
-        'sseclient==0.0.24'
+        'httpx >= 0.23',
         ],
+    extras_require={
+        'http2': ['httpx[http2]'],
+        'prometheus': ['prometheus-client'],
+        'opentelemetry': ['opentelemetry-api'],
+        'orjson': ['orjson'],
+        'msgspec': ['msgspec'],
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
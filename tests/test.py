@@ -1,14 +1,42 @@
 #!/usr/bin/env python
+import asyncio
+import gc
 import json
 import logging
 import os
+import queue
 import random
 import string
+import subprocess
 import sys
+import tempfile
+import threading
 import unittest
+import weakref
+from concurrent.futures import wait
+from unittest import mock
 from time import sleep
 
+import httpx
+
+from orbitdbapi.asyncclient import AsyncOrbitDbAPI
+from orbitdbapi.balancer import BalancedTransport, NodeBalancer
+from orbitdbapi.cache import LRUCache
+from orbitdbapi.codec import make_codec
+from orbitdbapi.counter import AggregatingCounter
+from orbitdbapi.entry import Entry
+from orbitdbapi.frozen import freeze, thaw
+from orbitdbapi.jsonstream import iter_json_items
+from orbitdbapi.metrics import Metrics, RequestRecord, endpoint_template
+from orbitdbapi.query import DocView
+from orbitdbapi.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, RetryPolicy, circuit_breaker
+from orbitdbapi.singleflight import AsyncSingleFlight, SingleFlight
+from orbitdbapi.snapshot import Snapshot
+from orbitdbapi.sse import iter_events
+from orbitdbapi.subscriptions import EventSubscriptions
+from orbitdbapi.writebehind import WriteBehind
 from orbitdbapi.client import OrbitDbAPI
+from orbitdbapi.db import DB, CapabilityError, capability_set
 
 base_url=os.environ.get('ORBIT_DB_HTTP_API_URL')
 
@@ -19,6 +47,504 @@ def randString(k=5, lowercase=False, both=False):
         return ''.join(random.choices(string.ascii_lowercase + string.digits, k=k))
     return  ''.join(random.choices(string.ascii_uppercase + string.digits, k=k))
 
+class LRUCacheTestCase(unittest.TestCase):
+    def runTest(self):
+        cache = LRUCache(max_entries=3, max_bytes=200, ttl=60)
+        for c in range(5):
+            cache.set(str(c), randString(k=10))
+        self.assertEqual(['2', '3', '4'], list(cache.to_dict()))
+        cache.get('2')
+        cache.set('5', randString(k=10))
+        self.assertEqual(['4', '2', '5'], list(cache.to_dict()))
+        cache.set('big', randString(k=500))
+        self.assertNotIn('big', cache)
+        cache.set('short', 1, ttl=0)
+        self.assertIsNone(cache.get('short'))
+        stats = cache.stats
+        self.assertEqual(4, stats['evictions'])
+        self.assertEqual(1, stats['expirations'])
+        self.assertLessEqual(stats['bytes'], 200)
+
+class FreezeTestCase(unittest.TestCase):
+    def runTest(self):
+        doc = {'_id': randString(), 'tags': ['a', 'b'], 'nested': {'values': [1, {'x': 2}]}}
+        frozen = freeze(doc)
+        with self.assertRaises(TypeError):
+            frozen['_id'] = 'changed'
+        with self.assertRaises(TypeError):
+            frozen['nested']['values'][1]['x'] = 3
+        self.assertEqual(('a', 'b'), frozen['tags'])
+        self.assertEqual(doc, thaw(frozen))
+
+class JSONStreamTestCase(unittest.TestCase):
+    def runTest(self):
+        docs = [{'hash': randString(), 'value': randString(k=random.randrange(1,100), both=True), 'n': c * 1.5} for c in range(100)]
+        encoded = json.dumps(docs).encode()
+        for size in (1, 7, 4096):
+            chunks = (encoded[i:i+size] for i in range(0, len(encoded), size))
+            self.assertEqual(docs, list(iter_json_items(chunks)))
+        mapping = {d['hash']: d for d in docs}
+        self.assertEqual(list(mapping.items()), list(iter_json_items([json.dumps(mapping)])))
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_items([encoded[:-1]]))
+        numbers = [1.5, -0.25, 1e3, 1.5e-3, -2E+10, 12, 0, True, None]
+        for encoded, expected in ((b'[1.5, -0.25, 1e3, 1.5e-3, -2E+10, 12, 0, true, null]', numbers),
+                                  (b'{"a": 1.5e-3, "b": -2E+10, "c": 12}', [('a', 1.5e-3), ('b', -2E+10), ('c', 12)])):
+            for cut in range(len(encoded) + 1):
+                self.assertEqual(expected, list(iter_json_items([encoded[:cut], encoded[cut:]])))
+
+class SSEParserTestCase(unittest.TestCase):
+    def runTest(self):
+        lines = [': keep-alive', '', 'event: write', 'id: 1', 'data: ["a",', 'data: 1]', '', 'data: plain', '']
+        events = list(iter_events(lines))
+        self.assertEqual([('write', '1', '["a",\n1]'), ('message', None, 'plain')], [(e.event, e.id, e.data) for e in events])
+
+class DocViewTestCase(unittest.TestCase):
+    def runTest(self):
+        docs = [{'_id': f'doc{c}', 'author': f'author{c % 3}', 'created': c} for c in range(30)]
+        view = DocView(hash_indexes=['author'], sorted_indexes=['created'])
+        view.load(docs)
+        self.assertEqual([d for d in docs if d['author'] == 'author1'], sorted(view.find(author='author1'), key=lambda d: d['created']))
+        self.assertEqual(docs[10:15], view.range('created', 10, 15))
+        self.assertEqual(docs[25:], view.range('created', 25))
+        view.put({'_id': 'doc5', 'author': 'author9', 'created': 100})
+        view.remove('doc6')
+        self.assertEqual(['doc5'], [d['_id'] for d in view.find(author='author9')])
+        self.assertEqual([4, 7], [d['created'] for d in view.range('created', 4, 8)])
+        view._begin_load()
+        view._apply_entry({'payload': {'op': 'PUT', 'key': 'doc40', 'value': {'_id': 'doc40', 'author': 'author9', 'created': 40}}})
+        view._apply_entry({'payload': {'op': 'DEL', 'key': 'doc0', 'value': None}})
+        self.assertNotIn('doc40', view)
+        view.load(docs)
+        self.assertEqual(['doc40'], [d['_id'] for d in view.find(author='author9')])
+        self.assertNotIn('doc0', view)
+        self.assertEqual(len(docs), len(view))
+
+class DocViewLoadTestCase(unittest.TestCase):
+    class Events ():
+        """
+        A streamed event response, delivering the events published while it is open.
+        """
+        def __init__(self, eventname):
+            self.eventname = eventname
+            self.lines = queue.Queue()
+            self.extensions = {'network_stream': self}
+        def get_extra_info(self, name): return self
+        def shutdown(self, how): self.lines.put(None)
+        def close(self): pass
+        def iter_lines(self): return iter(self.lines.get, None)
+        def publish(self, eventname, data):
+            if eventname == self.eventname:
+                for line in (f'event: {eventname}', f'data: {data}', ''): self.lines.put(line)
+
+    def runTest(self):
+        client = OrbitDbAPI(base_url='http://localhost:1', reuse_dbs=False)
+        db = client._make_db({'id': '/orbitdb/zdpu/docs', 'dbname': 'docs', 'type': 'docstore', 'options': {},
+                              'capabilities': ['get', 'put', 'query', 'remove'], 'write': ['*']})
+        docs, streams = [{'_id': 'doc0'}], []
+        def open_events(db, eventname, **kwargs):
+            sleep(0.1)
+            streams.append(self.Events(eventname))
+            return streams[-1]
+        def load_all(db, cache=None):
+            result, written = list(docs), {'_id': f'doc{len(docs)}'}
+            docs.append(written)
+            for stream in streams:
+                stream.publish('write', json.dumps([db.id, {'payload': {'op': 'PUT', 'key': written['_id'], 'value': written}}]))
+            return result
+        with mock.patch.object(DB, '_open_events', open_events), mock.patch.object(DB, 'all', load_all):
+            view = db.view()
+            follower = view.follower
+            try:
+                for _c in range(50):
+                    if 'doc1' in view: break
+                    sleep(0.01)
+                self.assertEqual(['doc0', 'doc1'], sorted(d['_id'] for d in view.all()))
+            finally:
+                view.unfollow()
+        self.assertFalse(follower.running)
+
+class SingleFlightTestCase(unittest.TestCase):
+    def runTest(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+        results = []
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return 'result'
+        threads = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _c in range(10)]
+        for t in threads: t.start()
+        while flight.stats['calls'] < 10: sleep(0.01)
+        release.set()
+        for t in threads: t.join()
+        self.assertEqual(1, len(calls))
+        self.assertEqual(['result'] * 10, [r for r, _leader in results])
+        self.assertEqual(1, len([leader for _r, leader in results if leader]))
+        self.assertEqual(9, flight.stats['coalesced'])
+
+class CoalesceAfterWriteTestCase(unittest.TestCase):
+    def runTest(self):
+        client = OrbitDbAPI(base_url='http://localhost:1', reuse_dbs=False)
+        release, requests = threading.Event(), []
+        def do_request(method, url, **kwargs):
+            requests.append((method, url))
+            count = len(requests)
+            if method == 'GET': release.wait(5)
+            return httpx.Response(200, json=count, request=httpx.Request(method, url))
+        results = []
+        def get(endpoint):
+            results.append(client._call('GET', endpoint))
+        with mock.patch.object(client, '_do_request', do_request):
+            before = threading.Thread(target=get, args=('db/kv/key',))
+            before.start()
+            while not requests: sleep(0.01)
+            client._call('POST', 'db/kv/put', json={'key': 'key', 'value': 1})
+            client._call('POST', 'db/other/put', json={'key': 'key', 'value': 1})
+            after = [threading.Thread(target=get, args=('db/kv/key',)) for _c in range(2)]
+            for t in after: t.start()
+            for _c in range(100):
+                if client.coalesce_stats['calls'] == 3 and len(requests) == 4: break
+                sleep(0.01)
+            release.set()
+            for t in [before, *after]: t.join()
+        self.assertEqual(4, len(requests))
+        self.assertEqual([1, 4, 4], sorted(results))
+
+class AsyncSingleFlightTestCase(unittest.TestCase):
+    def runTest(self):
+        async def main():
+            flight = AsyncSingleFlight()
+            release = asyncio.Event()
+            calls = []
+            async def slow():
+                calls.append(1)
+                await release.wait()
+                return 'result'
+            leader = asyncio.create_task(flight.do('key', slow))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do('key', slow))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            self.assertEqual(('result', False), await follower)
+            self.assertTrue(leader.cancelled())
+            self.assertEqual(1, len(calls))
+            release.clear()
+            abandoned = asyncio.create_task(flight.do('other', slow))
+            await asyncio.sleep(0)
+            abandoned.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(0, flight.stats['in_flight'])
+            self.assertEqual(2, len(calls))
+        asyncio.run(main())
+
+class WriteBehindCancelTestCase(unittest.TestCase):
+    class Feed ():
+        dbname = 'feed'
+        def __init__(self):
+            self.added = []
+            self.release = threading.Event()
+        def _require(self, capability): pass
+        def _touch(self): pass
+        def add_many(self, items, concurrency, cache):
+            self.release.wait(5)
+            self.added.extend(items)
+            return [(item, f'hash{item}') for item in items]
+
+    def runTest(self):
+        feed = self.Feed()
+        feed.release.set()
+        buffer = WriteBehind(feed, max_batch=10, max_delay=60)
+        first, second = buffer.add(1), buffer.add(2)
+        first.cancel()
+        buffer.flush(timeout=5)
+        self.assertEqual('hash2', second.result(timeout=2))
+        self.assertEqual([2], feed.added)
+        feed.release.clear()
+        buffer = WriteBehind(feed, max_batch=2, max_pending=2, max_delay=60, policy='drop_oldest')
+        sending = [buffer.add(3), buffer.add(4)]
+        while buffer.stats['queued']: sleep(0.01)
+        dropped = buffer.add(5)
+        dropped.cancel()
+        queued = [buffer.add(6), buffer.add(7)]
+        self.assertTrue(dropped.cancelled())
+        feed.release.set()
+        buffer.close(timeout=5)
+        self.assertEqual(['hash3', 'hash4', 'hash6', 'hash7'], [f.result(timeout=2) for f in sending + queued])
+
+class WriteBehindLifetimeTestCase(unittest.TestCase):
+    def runTest(self):
+        feed = WriteBehindCancelTestCase.Feed()
+        feed.release.set()
+        buffer = WriteBehind(feed, max_batch=10, max_delay=60)
+        future = buffer.add(1)
+        buffer.flush(timeout=5)
+        self.assertEqual('hash1', future.result(timeout=2))
+        thread = [t for t in threading.enumerate() if t.name == 'write-behind feed'][-1]
+        collected = weakref.ref(buffer)
+        del buffer
+        gc.collect()
+        self.assertIsNone(collected())
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        code = ('from orbitdbapi.writebehind import WriteBehind\n'
+                'class Feed:\n'
+                '    dbname = "feed"\n'
+                '    def _require(self, capability): pass\n'
+                '    def _touch(self): pass\n'
+                '    def add_many(self, items, concurrency, cache): print(items); return [(i, "hash") for i in items]\n'
+                'buffer = WriteBehind(Feed(), max_delay=60)\n'
+                'buffer.add(1)\n')
+        self.assertEqual('[1]', subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip())
+
+class AggregatingCounterTestCase(unittest.TestCase):
+    class Counter ():
+        dbname = 'counter'
+        def __init__(self):
+            self.counter = 0
+        def _require(self, capability): pass
+        def _touch(self): pass
+        def inc(self, val): self.counter += val
+        def value(self): return self.counter
+
+    def runTest(self):
+        db = self.Counter()
+        counter = AggregatingCounter(db, max_delay=60)
+        counter.inc(2)
+        counter.inc(3)
+        self.assertEqual(5, counter.value())
+        self.assertEqual(0, db.counter)
+        counter.flush()
+        self.assertEqual(5, db.counter)
+        self.assertEqual(1, counter.stats['requests'])
+        thread = [t for t in threading.enumerate() if t.name == 'counter counter'][-1]
+        collected = weakref.ref(counter)
+        del counter
+        gc.collect()
+        self.assertIsNone(collected())
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+class EntryCodecTestCase(unittest.TestCase):
+    def runTest(self):
+        raw = {'hash': randString(k=46), 'id': '/orbitdb/feed', 'payload': {'op': 'ADD', 'key': None, 'value': {'n': 1, 'text': 'h\u00e9'}},
+               'next': [randString(k=46)], 'refs': [], 'v': 2, 'clock': {'id': randString(k=66), 'time': 3},
+               'key': randString(k=66), 'identity': {'id': randString()}, 'sig': randString(k=140)}
+        self.assertEqual('json', make_codec().name)
+        payload = [raw, {1: 'int key', 'float': 1.5, 'big': 2**62, 'tuple': (1, 2), 'none': None}]
+        for name in ('json', 'orjson', 'msgspec', 'auto'):
+            try:
+                codec = make_codec(name)
+            except ImportError:
+                continue
+            self.assertEqual(raw, codec.loads(codec.dumps(raw)))
+            self.assertEqual(make_codec('json').dumps(payload), codec.dumps(payload))
+        entry = Entry.from_dict(raw)
+        self.assertEqual(raw['payload']['value'], entry.payload.value)
+        self.assertEqual(raw['hash'], entry['hash'])
+        self.assertEqual(3, entry['clock']['time'])
+        self.assertEqual(raw, entry.to_dict())
+
+class MetricsTestCase(unittest.TestCase):
+    def runTest(self):
+        self.assertEqual('db/{db}/{key}', endpoint_template('db/%2Forbitdb%2Fzdpu%2Fkv/mykey'))
+        self.assertEqual('db/{db}/raw/{key}', endpoint_template('db/%2Forbitdb%2Fzdpu%2Fkv/raw/mykey'))
+        self.assertEqual('db/{db}/rawiterator', endpoint_template('db/%2Forbitdb%2Fzdpu%2Ffeed/rawiterator'))
+        metrics = Metrics(buckets=(0.01, 0.1))
+        metrics(RequestRecord('GET', 'db/{db}/{key}', 200, 0.005, 0, 120, None))
+        metrics(RequestRecord('GET', 'db/{db}/{key}', 404, 0.05, 0, 40, None))
+        metrics(RequestRecord('GET', 'db/{db}/{key}', None, 1.5, None, None, TimeoutError(), attempt=2))
+        stats = metrics.stats()[('GET', 'db/{db}/{key}')]
+        self.assertEqual(3, stats['requests'])
+        self.assertEqual(2, stats['errors'])
+        self.assertEqual(1, stats['retries'])
+        self.assertEqual(160, stats['response_bytes'])
+        self.assertEqual([1, 1, 1], stats['histogram'])
+        self.assertEqual({200: 1, 404: 1}, stats['statuses'])
+
+class ResilienceTestCase(unittest.TestCase):
+    def runTest(self):
+        policy = RetryPolicy(retries=3, backoff=0.1, max_backoff=0.3)
+        self.assertTrue(policy.applies('GET', 'db/{db}/{key}'))
+        self.assertTrue(policy.applies('POST', 'db/{db}'))
+        self.assertFalse(policy.applies('PUT', 'db/{db}/put'))
+        self.assertFalse(policy.applies('POST', 'db/{db}/add'))
+        self.assertFalse(RetryPolicy().applies('GET', 'db/{db}/{key}'))
+        for attempt in range(1, 6):
+            self.assertTrue(0 <= policy.delay(attempt) <= 0.3)
+        breaker = CircuitBreaker(failures=2, reset_timeout=0.05)
+        breaker.failure()
+        self.assertEqual('closed', breaker.state)
+        breaker.failure()
+        self.assertRaises(CircuitOpenError, breaker.allow)
+        sleep(0.06)
+        self.assertEqual('half_open', breaker.state)
+        breaker.allow()
+        self.assertRaises(CircuitOpenError, breaker.allow)
+        breaker.success()
+        self.assertEqual('closed', breaker.state)
+        self.assertEqual(1, breaker.stats['opened'])
+        config = {'base_url': 'http://localhost:1', 'circuit_breaker': True}
+        self.assertIs(circuit_breaker(config), circuit_breaker(dict(config)))
+        self.assertIsNot(circuit_breaker(config), circuit_breaker({**config, 'breaker_failures': 2}))
+        self.assertIsNot(circuit_breaker(config), circuit_breaker({**config, 'nodes': ['http://localhost:1', 'http://localhost:2']}))
+        tracker = LatencyTracker(percentile=90, min_samples=10, min_delay=0)
+        for i in range(1, 10): tracker.record(i / 1000)
+        self.assertIsNone(tracker.threshold())
+        tracker.record(0.01)
+        self.assertEqual(0.01, tracker.threshold())
+
+class HedgedReadTestCase(unittest.TestCase):
+    def runTest(self):
+        client = OrbitDbAPI(base_url='http://localhost:1', hedge_reads=True)
+        outcomes = []
+        def send_once(args, kwargs, stream=False, attempt=1):
+            outcome = outcomes.pop(0)
+            sleep(0.05)
+            if isinstance(outcome, Exception): raise outcome
+            return outcome
+        def settled(futures, timeout=None, return_when=None):
+            # Let both requests finish before looking at them, the failed one first
+            if return_when is None: return wait(futures, timeout)
+            wait(futures)
+            return sorted(futures, key=lambda f: f.exception() is None), set()
+        args = ('GET', 'http://localhost:1/db/kv/key')
+        with mock.patch.object(LatencyTracker, 'threshold', return_value=0.01), mock.patch.object(client, '_send_once', send_once), \
+                mock.patch('orbitdbapi.client.wait', settled):
+            outcomes[:] = [httpx.ReadError('failed'), 'second']
+            self.assertEqual('second', client._send_hedged(args, {}, 1))
+            first, second = mock.Mock(), mock.Mock()
+            outcomes[:] = [first, second]
+            self.assertIs(first, client._send_hedged(args, {}, 1))
+            second.close.assert_called_once_with()
+            first.close.assert_not_called()
+            outcomes[:] = [httpx.ReadError('first failed'), httpx.ReadError('second failed')]
+            self.assertRaisesRegex(httpx.ReadError, 'first failed', client._send_hedged, args, {}, 1)
+        client.close()
+
+class NodeBalancerTestCase(unittest.TestCase):
+    def runTest(self):
+        seen = []
+        def handler(request):
+            seen.append(request.url.host)
+            if request.url.host == 'b': raise httpx.ConnectError('Connection refused', request=request)
+            if request.url.path.endswith('/slow'): raise httpx.ReadTimeout('Timed out', request=request)
+            return httpx.Response(200, json={'host': request.url.host})
+        balancer = NodeBalancer(['http://b', 'http://a', 'http://c'], failures=1, health_interval=60)
+        # Break ties between idle nodes in node order
+        with mock.patch('random.random', return_value=0), \
+                httpx.Client(transport=BalancedTransport(httpx.MockTransport(handler), balancer, 'http://b')) as session:
+            for _i in range(5):
+                self.assertEqual('a', session.get('http://b/db/kv/key').json()['host'])
+            self.assertEqual(['b', 'a', 'a', 'a', 'a', 'a'], seen)
+            self.assertFalse(balancer.stats['http://b']['up'])
+            self.assertRaises(httpx.ReadTimeout, session.get, 'http://b/db/kv/slow')
+            self.assertEqual('a', seen[-1])
+            self.assertRaises(httpx.ConnectError, session.post, 'http://b/db/kv/put', json={})
+            self.assertEqual('b', seen[-1])
+        sticky = NodeBalancer(['http://a', 'http://b', 'http://c'], write_policy='sticky')
+        self.assertEqual(sticky.pick('POST', 'db/feed').url, sticky.pick('POST', 'db/%2Forbitdb%2Fzdpu%2Ffeed/add').url)
+        self.assertEqual(3, len({sticky.pick('POST', f'db/feed{i}/add').url for i in range(30)}))
+
+class LazyStartupTestCase(unittest.TestCase):
+    def runTest(self):
+        code = 'import sys, orbitdbapi; print([m for m in ("httpx", "sqlite3") if m in sys.modules])'
+        self.assertEqual('[]', subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip())
+        code = ('import sys\nfrom orbitdbapi import OrbitDbAPI\n'
+                'OrbitDbAPI(base_url="http://localhost:1")._make_db({"id": "/orbitdb/zdpu/kv", "dbname": "kv", "type": "keyvalue",'
+                ' "options": {}, "capabilities": ["get", "put"], "write": ["*"]})\n'
+                'print([m for m in ("counter", "invalidation", "jsonstream", "query", "replica", "sse", "writebehind")'
+                ' if "orbitdbapi." + m in sys.modules])')
+        self.assertEqual('[]', subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip())
+        client = OrbitDbAPI(base_url='http://localhost:1')
+        client.close()
+        self.assertRaises(RuntimeError, lambda: client.session)
+
+class CompactHandleTestCase(unittest.TestCase):
+    def runTest(self):
+        client = OrbitDbAPI(base_url='http://localhost:1', reuse_dbs=False)
+        params = lambda name: {'id': f'/orbitdb/zdpu/{name}', 'dbname': name, 'type': 'feed', 'options': {},
+                               'capabilities': ['add', 'get', 'iterator', 'remove'], 'write': ['*']}
+        first, second = client._make_db(params('a')), client._make_db(params('b'))
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertTrue(first.addable and first.iterable and not first.putable)
+        self.assertRaises(CapabilityError, first._require, 'put')
+        self.assertIs(capability_set(first.capabilities), capability_set(second.capabilities))
+        first.params['capabilities'].append('put')
+        self.assertEqual(['add', 'get', 'iterator', 'remove'], second.capabilities)
+        frozen = client._make_db(params('c'), {'immutable_reads': True})
+        self.assertEqual(('add', 'get', 'iterator', 'remove'), frozen.capabilities)
+
+class HandleLastUsedTestCase(unittest.TestCase):
+    def runTest(self):
+        client = OrbitDbAPI(base_url='http://localhost:1', reuse_dbs=False)
+        db = client._make_db({'id': '/orbitdb/zdpu/kv', 'dbname': 'kv', 'type': 'keyvalue', 'options': {},
+                              'capabilities': ['get', 'put', 'remove'], 'write': ['*']})
+        db._cache_store('key', 'value', True)
+        for read in (lambda: db.get('key'), lambda: db.get_many(['key']), lambda: db.cache_get('key')):
+            used = db.last_used
+            sleep(0.01)
+            read()
+            self.assertGreater(db.last_used, used)
+
+class WriteManyArgsTestCase(unittest.TestCase):
+    def runTest(self):
+        client = OrbitDbAPI(base_url='http://localhost:1', reuse_dbs=False)
+        db = client._make_db({'id': '/orbitdb/zdpu/feed', 'dbname': 'feed', 'type': 'feed', 'options': {},
+                              'capabilities': ['add', 'get', 'iterator', 'remove'], 'write': ['*']})
+        self.assertRaises(ValueError, db.add_many, [{'n': 1}], concurrency=0)
+
+class CacheBackendTestCase(unittest.TestCase):
+    def runTest(self):
+        self.assertRaises(ValueError, OrbitDbAPI, base_url='http://localhost:1', cache_backend=LRUCache())
+        client = OrbitDbAPI(base_url='http://localhost:1', reuse_dbs=False, cache_backend=LRUCache)
+        params = lambda name: {'id': f'/orbitdb/zdpu/{name}', 'dbname': name, 'type': 'keyvalue', 'options': {},
+                               'capabilities': ['get', 'put', 'remove'], 'write': ['*']}
+        first, second = client._make_db(params('a')), client._make_db(params('b'))
+        self.assertIsInstance(first.cache_backend, LRUCache)
+        self.assertIsNot(first.cache_backend, second.cache_backend)
+        own = LRUCache(max_entries=10)
+        self.assertIs(own, client._make_db(params('c'), {'cache_backend': own}).cache_backend)
+
+class SnapshotValidationTestCase(unittest.TestCase):
+    def runTest(self):
+        client = OrbitDbAPI(base_url='http://localhost:1', reuse_dbs=False)
+        def params(name, kind, capabilities):
+            return {'id': f'/orbitdb/zdpu/{name}', 'dbname': name, 'type': kind, 'options': {}, 'capabilities': capabilities, 'write': ['*']}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            snapshot = Snapshot(os.path.join(tmpdir, 'snapshot.sqlite'))
+            kv = client._make_db(params('kv', 'keyvalue', ['get', 'put', 'all']))
+            snapshot.save(kv.id, {'key': 'saved'})
+            def load_all(db, cache=None):
+                db._cache_all({'key': 'current'})
+                return {'key': 'current'}
+            with mock.patch.object(DB, 'all', load_all):
+                self.assertEqual({'loaded': 1, 'fetched': 0}, kv.warm_start(snapshot, max_age=60))
+                self.assertEqual('saved', kv.cache_get('key'))
+                self.assertEqual({'loaded': 0, 'fetched': 1}, kv.warm_start(snapshot))
+                self.assertEqual('current', kv.cache_get('key'))
+            feed = client._make_db(params('feed', 'feed', ['add', 'get', 'iterator']))
+            log, calls = [], []
+            def iterator_raw(db, **kwargs):
+                calls.append(kwargs)
+                if kwargs.get('limit') == 1: return log[-1:]
+                return [e for e in log if 'gt' not in kwargs or e['hash'] > kwargs['gt']]
+            with mock.patch.object(DB, 'iterator_raw', iterator_raw):
+                log[:] = [{'hash': f'h{c}', 'payload': {'value': c}} for c in range(3)]
+                snapshot.save(feed.id, [('h0', 0), ('h1', 1), ('h2', 2)], 'h2')
+                self.assertEqual({'loaded': 3, 'fetched': 0}, feed.warm_start(snapshot))
+                self.assertEqual([{'limit': 1}], calls)
+                log.append({'hash': 'h3', 'payload': {'value': 3}})
+                self.assertEqual({'loaded': 3, 'fetched': 1}, feed.warm_start(snapshot))
+                log.clear()
+                feed.clear_cache()
+                self.assertEqual({'loaded': 0, 'fetched': 0}, feed.warm_start(snapshot))
+                self.assertIsNone(feed.cache_get('h0'))
+            snapshot.close()
+
 class CapabilitiesTestCase(unittest.TestCase):
     def setUp(self):
         client = OrbitDbAPI(base_url=base_url)
@@ -60,6 +586,31 @@ class CounterIncrementTestCase(unittest.TestCase):
         self.counter_test.unload()
 
 
+class CounterAggregationTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url)
+        self.counter_test = client.db('counter_test', json={'create':True, 'type': 'counter'})
+
+    def runTest(self):
+        counter = self.counter_test.aggregating_counter(max_batch=50, max_delay=60)
+        localVal = counter.value()
+        for _c in range(1,100):
+            incVal = random.randrange(1,100)
+            localVal += incVal
+            counter.inc(incVal)
+            self.assertEqual(localVal, counter.value())
+        counter.flush()
+        self.assertEqual(localVal, self.counter_test.value())
+        self.assertLess(counter.stats['requests'], 99)
+        counter.inc(1)
+        counter.close()
+        self.assertEqual(localVal + 1, self.counter_test.value())
+        self.assertRaises(RuntimeError, counter.inc)
+
+    def tearDown(self):
+        self.counter_test.unload()
+
+
 class KVStoreGetPutTestCase(unittest.TestCase):
     def setUp(self):
         client = OrbitDbAPI(base_url=base_url, use_db_cache=False)
@@ -79,6 +630,138 @@ class KVStoreGetPutTestCase(unittest.TestCase):
     def tearDown(self):
         self.kevalue_test.unload()
 
+class KVStorePutManyTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url, use_db_cache=False)
+        self.kevalue_test = client.db('keyvalue_test', json={'create':True, 'type': 'keyvalue'})
+
+    def runTest(self):
+        localKV = {randString(): randString(k=100, both=True) for _c in range(1,100)}
+        items = [{'key':k, 'value':v} for k, v in localKV.items()]
+        results = list(self.kevalue_test.put_many(items, concurrency=16))
+        self.assertEqual(items, [item for item, _hash in results])
+        self.assertFalse([h for _item, h in results if isinstance(h, Exception)])
+        self.assertDictContainsSubset(localKV, self.kevalue_test.all())
+
+    def tearDown(self):
+        self.kevalue_test.unload()
+
+class KVStoreGetManyTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url)
+        self.kevalue_test = client.db('keyvalue_test', json={'create':True, 'type': 'keyvalue'})
+
+    def runTest(self):
+        localKV = {randString(): randString(k=100, both=True) for _c in range(1,50)}
+        for k, v in localKV.items(): self.kevalue_test.put({'key':k, 'value':v}, cache=False)
+        keys = list(localKV)
+        self.kevalue_test.get(keys[0])
+        self.assertEqual(localKV, self.kevalue_test.get_many(keys, concurrency=8, bulk=False))
+        self.assertEqual(localKV[keys[1]], self.kevalue_test.cache_get(keys[1]))
+        self.kevalue_test.clear_cache()
+        self.assertEqual(localKV, self.kevalue_test.get_many(keys, bulk=True))
+
+    def tearDown(self):
+        self.kevalue_test.unload()
+
+class KVStoreHandleReuseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = OrbitDbAPI(base_url=base_url, use_db_cache=False, db_idle_timeout=60)
+        self.kevalue_test = self.client.db('keyvalue_test', json={'create':True, 'type': 'keyvalue'})
+
+    def runTest(self):
+        self.assertIs(self.kevalue_test, self.client.db('keyvalue_test', json={'create':True, 'type': 'keyvalue'}))
+        self.assertIs(self.kevalue_test, self.client.db(self.kevalue_test.id, json={'create':True, 'type': 'keyvalue'}))
+        self.assertEqual([], self.client.evict_idle_dbs())
+        self.assertEqual([self.kevalue_test], self.client.evict_idle_dbs(timeout=0))
+        self.kevalue_test = self.client.db('keyvalue_test', json={'create':True, 'type': 'keyvalue'})
+        self.assertEqual(1, len(self.client.db_handles))
+
+    def tearDown(self):
+        self.kevalue_test.unload()
+
+class AsyncKVStoreGetPutTestCase(unittest.TestCase):
+    async def _run(self):
+        async with AsyncOrbitDbAPI(base_url=base_url, use_db_cache=False) as client:
+            kevalue_test = await client.db('keyvalue_test', json={'create':True, 'type': 'keyvalue'})
+            try:
+                localKV = {}
+                for _c in range(1,100):
+                    k = randString()
+                    v = randString(k=100, both=True)
+                    localKV[k] = v
+                    await kevalue_test.put({'key':k, 'value':v})
+                    self.assertEqual(localKV.get(k), await kevalue_test.get(k))
+                self.assertDictContainsSubset(localKV, await kevalue_test.all())
+            finally:
+                await kevalue_test.unload()
+
+    def runTest(self):
+        asyncio.run(self._run())
+
+class AsyncFeedSubscriptionsTestCase(unittest.TestCase):
+    async def _run(self):
+        async with AsyncOrbitDbAPI(base_url=base_url, use_db_cache=False) as client:
+            feeds = [await client.db(f'feed_test_{i}', json={'create':True, 'type': 'feed'}) for i in range(3)]
+            try:
+                async with EventSubscriptions(max_batch=100, max_delay=0.05) as subscriptions:
+                    for feed in feeds: subscriptions.subscribe(feed, ('write',))
+                    while subscriptions.stats['connected'] < len(feeds): await asyncio.sleep(0.05)
+                    hashes = {feed.id: [await feed.add({'value': randString()}) for _c in range(5)] for feed in feeds}
+                    received = {feed.id: [] for feed in feeds}
+                    while sum(len(h) for h in received.values()) < 15:
+                        batch = await subscriptions.get_batch(timeout=10)
+                        self.assertTrue(batch)
+                        for event in batch: received[event.db].append(event.entry['hash'])
+                    self.assertEqual(hashes, received)
+                    self.assertEqual(15, subscriptions.stats['delivered'])
+            finally:
+                for feed in feeds: await feed.unload()
+
+    def runTest(self):
+        asyncio.run(self._run())
+
+class KVStoreImmutableReadsTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url)
+        self.kevalue_test = client.db('keyvalue_test', json={'create':True, 'type': 'keyvalue'}, local_options={'immutable_reads': True})
+
+    def runTest(self):
+        k = randString()
+        v = {'value': randString(k=100, both=True), 'tags': ['a']}
+        self.kevalue_test.put({'key':k, 'value':v}, cache=False)
+        cached = self.kevalue_test.get(k)
+        self.assertIs(cached, self.kevalue_test.get(k))
+        with self.assertRaises(TypeError):
+            cached['value'] = None
+        mutable = self.kevalue_test.get(k, mutable=True)
+        mutable['tags'].append('b')
+        self.assertEqual(('a',), self.kevalue_test.get(k)['tags'])
+        self.assertIsInstance(self.kevalue_test.capabilities, tuple)
+
+    def tearDown(self):
+        self.kevalue_test.unload()
+
+class KVStoreWatchCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.kevalue_test = OrbitDbAPI(base_url=base_url).db('keyvalue_test', json={'create':True, 'type': 'keyvalue'})
+        self.kevalue_writer = OrbitDbAPI(base_url=base_url, use_db_cache=False).db('keyvalue_test')
+
+    def runTest(self):
+        k = randString()
+        self.kevalue_writer.put({'key':k, 'value':'old'})
+        self.assertEqual('old', self.kevalue_test.get(k))
+        watcher = self.kevalue_test.watch_cache(refresh=True)
+        sleep(1)
+        self.kevalue_writer.put({'key':k, 'value':'new'})
+        for _c in range(50):
+            if watcher.stats['invalidated']: break
+            sleep(0.1)
+        self.assertEqual('new', self.kevalue_test.get(k))
+
+    def tearDown(self):
+        self.kevalue_test.unload()
+
 class DocStoreGetPutTestCase(unittest.TestCase):
     def setUp(self):
         client = OrbitDbAPI(base_url=base_url, use_db_cache=False)
@@ -100,6 +783,115 @@ class DocStoreGetPutTestCase(unittest.TestCase):
         self.docstore_test.unload()
 
 
+class FeedIteratorStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url, use_db_cache=False)
+        self.feed_test = client.db('feed_test', json={'create':True, 'type': 'feed'})
+
+    def runTest(self):
+        for _c in range(1,20):
+            self.feed_test.add({'value': randString(k=100, both=True)})
+        self.assertEqual(self.feed_test.iterator_raw(limit=-1), list(self.feed_test.iterator_raw_stream(limit=-1)))
+        entries = self.feed_test.iterator_raw_stream(limit=-1)
+        self.assertIn('hash', next(entries))
+        entries.close()
+        self.assertEqual(list(reversed(self.feed_test.iterator_raw(limit=-1))), list(self.feed_test.scan(page_size=3)))
+
+    def tearDown(self):
+        self.feed_test.unload()
+
+
+class FeedWriteBehindTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url, use_db_cache=False)
+        self.feed_test = client.db('feed_test', json={'create':True, 'type': 'feed'})
+
+    def runTest(self):
+        write_buffer = self.feed_test.write_behind(max_batch=10, max_delay=0.05)
+        values = [randString(k=100, both=True) for _c in range(1,50)]
+        futures = [write_buffer.add({'value': v}) for v in values]
+        write_buffer.flush()
+        hashes = [f.result() for f in futures]
+        entries = self.feed_test.iterator_raw(limit=len(values))
+        self.assertEqual(hashes, [e['hash'] for e in entries])
+        self.assertEqual(values, [e['payload']['value']['value'] for e in entries])
+        self.assertEqual(len(values), write_buffer.stats['sent'])
+
+    def tearDown(self):
+        self.feed_test.unload()
+
+
+class FeedReplicaTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url, use_db_cache=False)
+        self.feed_test = client.db('feed_test', json={'create':True, 'type': 'feed'})
+        self.directory = tempfile.TemporaryDirectory()
+
+    def runTest(self):
+        path = os.path.join(self.directory.name, 'feed_test.log')
+        with self.feed_test.replica(path) as replica:
+            replica.sync()
+            hashes = [self.feed_test.add({'value': randString()}) for _c in range(1,20)]
+            self.assertEqual(len(hashes), replica.sync())
+            self.assertEqual(0, replica.sync())
+            self.assertEqual(hashes[-1], replica.head)
+            self.assertEqual(hashes, [e['hash'] for e in replica.entries()][-len(hashes):])
+        with self.feed_test.replica(path) as replica:
+            self.assertEqual(hashes[-1], replica.head)
+            self.assertEqual(hashes[5], replica.get(hashes[5])['hash'])
+
+    def tearDown(self):
+        self.feed_test.unload()
+        self.directory.cleanup()
+
+
+class DocStoreViewTestCase(unittest.TestCase):
+    def setUp(self):
+        client = OrbitDbAPI(base_url=base_url, use_db_cache=False)
+        self.docstore_test = client.db('docstore_test', json={'create':True, 'type': 'docstore'})
+
+    def runTest(self):
+        author = randString()
+        self.docstore_test.put({'_id':randString(), 'author':author, 'created':1})
+        view = self.docstore_test.view(hash_indexes=['author'], sorted_indexes=['created'])
+        try:
+            self.assertEqual(1, len(view.find(author=author)))
+            sleep(1)
+            self.docstore_test.put({'_id':randString(), 'author':author, 'created':2})
+            for _c in range(50):
+                if len(view.find(author=author)) == 2: break
+                sleep(0.1)
+            self.assertEqual(2, len(view.find(author=author)))
+        finally:
+            view.unfollow()
+
+    def tearDown(self):
+        self.docstore_test.unload()
+
+
+class FeedSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.snapshot = Snapshot(os.path.join(self.tmpdir.name, 'snapshot.sqlite'))
+        self.feed_test = OrbitDbAPI(base_url=base_url).db('feed_test', json={'create':True, 'type': 'feed'})
+
+    def runTest(self):
+        for _c in range(1,10):
+            self.feed_test.add({'value': randString(k=100, both=True)})
+        self.feed_test.warm_start(self.snapshot)
+        entry_hash = self.feed_test.add({'value': randString(k=100, both=True)}, cache=False)
+        restarted = OrbitDbAPI(base_url=base_url).db('feed_test')
+        stats = restarted.warm_start(self.snapshot)
+        self.assertEqual(1, stats['fetched'])
+        self.assertGreaterEqual(stats['loaded'], 9)
+        self.assertIsNotNone(restarted.cache_get(entry_hash))
+
+    def tearDown(self):
+        self.feed_test.unload()
+        self.snapshot.close()
+        self.tmpdir.cleanup()
+
+
 class SearchesTestCase(unittest.TestCase):
     def setUp(self):
         self.client = OrbitDbAPI(base_url=base_url)